@@ -0,0 +1,394 @@
+"""
+Async Rippling API Client for Capitol Engineering (capitolaz.com)
+asyncio counterpart of RipplingAPIClient built on httpx
+
+Lets callers that need several independent datasets (employees, time
+entries, job dimensions) request them at the same time instead of paying
+for each round trip serially.
+
+Date created: 2025-10-31
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from metrics import RIPPLING_PAGES, RIPPLING_REQUEST_SECONDS, RIPPLING_RETRIES
+from rate_limiter import (
+    RETRYABLE_STATUS_CODES,
+    RateLimitScheduler,
+    endpoint_key,
+    get_shared_scheduler,
+    parse_retry_after,
+)
+from request_timing import stage
+from response_cache import ResponseCache
+from rippling_api_client import (
+    DEFAULT_BASE_URL,
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_POOL_MAXSIZE,
+    DEFAULT_SPLIT_RANGE_DAYS,
+    RecentIds,
+    dedupe_by_id,
+    stream_spans,
+)
+
+
+class AsyncRipplingAPIClient:
+    """asyncio client for interacting with Rippling REST API"""
+
+    def __init__(self, api_token: Optional[str] = None,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                 keep_alive: bool = True,
+                 http2: bool = False,
+                 timeout: Optional[float] = 30,
+                 max_workers: int = DEFAULT_MAX_WORKERS,
+                 split_range_days: int = DEFAULT_SPLIT_RANGE_DAYS,
+                 scheduler: Optional[RateLimitScheduler] = None,
+                 cache: Optional[ResponseCache] = None,
+                 base_url: Optional[str] = None):
+        """
+        Initialize the async Rippling API client
+
+        Args:
+            api_token: Rippling API token. If not provided, will look for RIPPLING_API_TOKEN env var
+            pool_maxsize: Maximum open connections
+            keep_alive: Reuse connections between requests
+            http2: Negotiate HTTP/2 (requires the httpx[http2] extra)
+            timeout: Request timeout in seconds
+            max_workers: Maximum concurrent sub-range requests for long date ranges
+            split_range_days: Date ranges longer than this are fetched as concurrent per-day requests
+            scheduler: Rate limit scheduler (defaults to the one shared by all clients in the process)
+            cache: Response cache for GET requests (no caching if None)
+            base_url: API root (defaults to DEFAULT_BASE_URL)
+        """
+        self.api_token = api_token or os.getenv('RIPPLING_API_TOKEN')
+        if not self.api_token:
+            raise ValueError("API token must be provided or set in RIPPLING_API_TOKEN environment variable")
+
+        self.base_url = (base_url or DEFAULT_BASE_URL).rstrip('/')
+        self.headers = {
+            'Authorization': f'Bearer {self.api_token}',
+            'Accept': 'application/json',
+            'Content-Type': 'application/json'
+        }
+        self.max_workers = max(1, max_workers)
+        self.split_range_days = split_range_days
+        self.scheduler = scheduler or get_shared_scheduler()
+        self.cache = cache
+
+        limits = httpx.Limits(
+            max_connections=pool_maxsize,
+            max_keepalive_connections=pool_maxsize if keep_alive else 0
+        )
+        self.session = httpx.AsyncClient(
+            headers=self.headers,
+            limits=limits,
+            http2=http2,
+            timeout=timeout
+        )
+
+    async def aclose(self):
+        """Close pooled connections"""
+        await self.session.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+
+    async def _make_request(self, method: str, endpoint: str, params: Optional[Dict] = None,
+                            data: Optional[Dict] = None) -> Dict:
+        """
+        Make an authenticated request to the Rippling API
+
+        Paced and retried through the shared rate limit scheduler, like
+        RipplingAPIClient._make_request.
+
+        Args:
+            method: HTTP method (GET, POST, etc.)
+            endpoint: API endpoint (without base URL)
+            params: Query parameters
+            data: Request body data
+
+        Returns:
+            JSON response as dictionary
+        """
+        cacheable = self.cache is not None and method.upper() == 'GET' and data is None
+        if cacheable:
+            cached = self.cache.get(endpoint, params)
+            if cached is not None:
+                return cached
+
+        url = f"{self.base_url}{endpoint}"
+        idempotent = method.upper() in ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+        metric_endpoint = endpoint_key(endpoint)
+
+        try:
+            attempt = 0
+            while True:
+                with stage('rippling_wait'):
+                    await self.scheduler.acquire_async(endpoint)
+                started = time.perf_counter()
+                status = 'error'
+                try:
+                    with stage('rippling'):
+                        response = await self.session.request(method, url, params=params, json=data)
+                    status = response.status_code
+                finally:
+                    RIPPLING_REQUEST_SECONDS.observe(time.perf_counter() - started,
+                                                     endpoint=metric_endpoint, status=status)
+
+                retryable = status == 429 or (idempotent and status in RETRYABLE_STATUS_CODES)
+                if not retryable or attempt >= self.scheduler.max_retries:
+                    break
+                RIPPLING_RETRIES.inc(endpoint=metric_endpoint, status=status)
+
+                delay = self.scheduler.retry_delay(
+                    endpoint, attempt, status,
+                    parse_retry_after(response.headers.get('Retry-After'))
+                )
+                with stage('rippling_wait'):
+                    await asyncio.sleep(delay)
+                attempt += 1
+
+            response.raise_for_status()
+            result = response.json()
+            if cacheable:
+                self.cache.set(endpoint, params, result)
+            return result
+        except httpx.HTTPStatusError as e:
+            print(f"API Request Error: {e}")
+            print(f"Response: {e.response.text}")
+            raise
+        except httpx.HTTPError as e:
+            print(f"API Request Error: {e}")
+            raise
+
+    async def _iter_pages(self, endpoint: str, params: Optional[Dict] = None) -> AsyncIterator[List[Dict]]:
+        """
+        Iterate over the pages of a cursor-paginated endpoint
+
+        The next page request is started before the current page is handed
+        to the caller, matching RipplingAPIClient's prefetching.
+
+        Yields:
+            The 'data' list of each page, in order
+        """
+        params = dict(params or {})
+
+        def fetch(cursor: Optional[str]):
+            page_params = dict(params)
+            if cursor:
+                page_params['cursor'] = cursor
+            return asyncio.ensure_future(self._make_request('GET', endpoint, params=page_params))
+
+        pending = fetch(None)
+        try:
+            while pending is not None:
+                response = await pending
+                RIPPLING_PAGES.inc(endpoint=endpoint_key(endpoint))
+
+                cursor = response.get('next_cursor')
+                pending = fetch(cursor) if cursor else None
+
+                yield response.get('data', [])
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    async def get_employees(self, limit: int = 100) -> List[Dict]:
+        """
+        Get list of all employees
+
+        Args:
+            limit: Maximum number of results per page (default 100)
+
+        Returns:
+            List of employee dictionaries
+        """
+        return [employee async for employee in self.iter_employees(limit)]
+
+    async def iter_employees(self, limit: int = 100) -> AsyncIterator[Dict]:
+        """
+        Iterate over all employees as pages arrive
+
+        Args:
+            limit: Maximum number of results per page (default 100)
+
+        Yields:
+            Employee dictionaries, skipping repeated ids
+        """
+        seen = RecentIds()
+        async for page in self._iter_pages('/users', {'limit': limit}):
+            for employee in page:
+                if not seen.seen(employee):
+                    yield employee
+
+    async def get_time_entries(self, start_date: Optional[str] = None,
+                               end_date: Optional[str] = None,
+                               limit: int = 100) -> List[Dict]:
+        """
+        Get time entries for a date range
+
+        Args:
+            start_date: Start date in YYYY-MM-DD format (defaults to today)
+            end_date: End date in YYYY-MM-DD format (defaults to today)
+            limit: Maximum number of results per page
+
+        Returns:
+            List of time entry dictionaries
+        """
+        if not start_date:
+            start_date = datetime.now().strftime('%Y-%m-%d')
+        if not end_date:
+            end_date = datetime.now().strftime('%Y-%m-%d')
+
+        start = datetime.strptime(start_date, '%Y-%m-%d')
+        end = datetime.strptime(end_date, '%Y-%m-%d')
+        num_days = (end - start).days + 1
+
+        if num_days > self.split_range_days and self.max_workers > 1:
+            semaphore = asyncio.Semaphore(self.max_workers)
+
+            async def fetch_day(day: str) -> List[Dict]:
+                async with semaphore:
+                    return await self._fetch_time_entries_range(day, day, limit)
+
+            days = [(start + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(num_days)]
+            daily_results = await asyncio.gather(*(fetch_day(day) for day in days))
+            time_entries = [entry for entries in daily_results for entry in entries]
+        else:
+            time_entries = await self._fetch_time_entries_range(start_date, end_date, limit)
+
+        return dedupe_by_id(time_entries)
+
+    async def iter_time_entries(self, start_date: Optional[str] = None,
+                                end_date: Optional[str] = None,
+                                limit: int = 100) -> AsyncIterator[Dict]:
+        """
+        Iterate over time entries for a date range as pages arrive
+
+        Long ranges are walked one day at a time, so memory stays bounded
+        by a page or two however long the range is.
+
+        Args:
+            start_date: Start date in YYYY-MM-DD format (defaults to today)
+            end_date: End date in YYYY-MM-DD format (defaults to today)
+            limit: Maximum number of results per page
+
+        Yields:
+            Time entry dictionaries in day order, skipping repeated ids
+        """
+        if not start_date:
+            start_date = datetime.now().strftime('%Y-%m-%d')
+        if not end_date:
+            end_date = datetime.now().strftime('%Y-%m-%d')
+
+        seen = RecentIds()
+        for span_start, span_end in stream_spans(start_date, end_date, self.split_range_days):
+            seen.next_span()
+            params = {
+                'limit': limit,
+                'start_date': span_start,
+                'end_date': span_end
+            }
+            async for page in self._iter_pages('/time-entries', params):
+                for entry in page:
+                    if not seen.seen(entry):
+                        yield entry
+
+    async def _fetch_time_entries_range(self, start_date: str, end_date: str,
+                                        limit: int) -> List[Dict]:
+        """Fetch every page of time entries for a single date range"""
+        params = {
+            'limit': limit,
+            'start_date': start_date,
+            'end_date': end_date
+        }
+
+        time_entries = []
+        async for page in self._iter_pages('/time-entries', params):
+            time_entries.extend(page)
+
+        return time_entries
+
+    async def get_job_dimensions(self) -> List[Dict]:
+        """
+        Get list of job dimensions (projects/cost centers)
+
+        Returns:
+            List of job dimension dictionaries
+        """
+        response = await self._make_request('GET', '/job-dimensions')
+        return response.get('data', [])
+
+    async def get_jobs_for_dimension(self, dimension_id: str) -> List[Dict]:
+        """
+        Get list of jobs for a specific dimension
+
+        Args:
+            dimension_id: ID of the job dimension
+
+        Returns:
+            List of job dictionaries
+        """
+        response = await self._make_request('GET', f'/job-dimensions/{dimension_id}/jobs')
+        return response.get('data', [])
+
+    async def get_all_dimension_jobs(self) -> Dict[str, List[Dict]]:
+        """
+        Get the jobs of every job dimension, requested concurrently
+
+        Returns:
+            Dictionary mapping dimension ID to its list of jobs
+        """
+        dimensions = await self.get_job_dimensions()
+        dimension_ids = [dim['id'] for dim in dimensions if 'id' in dim]
+        jobs = await asyncio.gather(*(self.get_jobs_for_dimension(dim_id) for dim_id in dimension_ids))
+        return dict(zip(dimension_ids, jobs))
+
+    async def fetch_report_inputs(self, start_date: Optional[str] = None,
+                                  end_date: Optional[str] = None,
+                                  include_job_dimensions: bool = False) -> Dict[str, List[Dict]]:
+        """
+        Fetch the independent inputs of a labor report concurrently
+
+        Args:
+            start_date: Start date in YYYY-MM-DD format (defaults to today)
+            end_date: End date in YYYY-MM-DD format (defaults to today)
+            include_job_dimensions: Also fetch job dimensions
+
+        Returns:
+            Dictionary with 'employees', 'time_entries' and, when requested,
+            'job_dimensions'
+        """
+        requests = {
+            'employees': self.get_employees(),
+            'time_entries': self.get_time_entries(start_date, end_date),
+        }
+        if include_job_dimensions:
+            requests['job_dimensions'] = self.get_job_dimensions()
+
+        results = await asyncio.gather(*requests.values())
+        return dict(zip(requests.keys(), results))
+
+
+def fetch_report_inputs(start_date: Optional[str] = None, end_date: Optional[str] = None,
+                        include_job_dimensions: bool = False,
+                        api_token: Optional[str] = None) -> Dict[str, List[Dict]]:
+    """
+    Synchronous wrapper around AsyncRipplingAPIClient.fetch_report_inputs
+
+    For scripts and worker threads that are not already running an event loop.
+    """
+    async def run():
+        async with AsyncRipplingAPIClient(api_token) as client:
+            return await client.fetch_report_inputs(start_date, end_date, include_job_dimensions)
+
+    return asyncio.run(run())
@@ -0,0 +1,245 @@
+"""
+Batch Report Generation for Capitol Engineering
+Renders foreman reports for a range of dates or projects in parallel
+
+Back-filling a month, or regenerating after a payroll correction, used to
+mean running the daily report once per date, refetching the roster and
+the trailing week each time. A batch fetches the union of the data once
+(the roster plus every day the reports need), builds every report's sheets
+from that one pull, and writes the files on a process pool, since
+rendering xlsx is CPU-bound.
+
+    python batch_reports.py --start 2025-10-01 --end 2025-10-31
+    python batch_reports.py --start 2025-10-01 --end 2025-10-31 --by project --projects 25-1998,25-2001
+
+Date created: 2025-10-31
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from project_labor_reports import ProjectLaborReportGenerator
+from report_context import date_range
+from report_writers import FORMAT_EXTENSIONS, REPORT_FORMATS, write_report
+
+# Reports are written one file per date or one file per project
+GROUP_BY = ('date', 'project')
+
+DEFAULT_OUTPUT_DIR = 'reports'
+
+# (sheet name, data, write index)
+Sheets = List[Tuple[str, pd.DataFrame, bool]]
+
+
+def render_report(output_path: str, sheets: Sheets, report_format: str = 'xlsx') -> Dict:
+    """
+    Write one report file (runs in a worker process)
+
+    Args:
+        output_path: Path of the file to create
+        sheets: (sheet name, DataFrame, write index) in sheet order
+        report_format: One of REPORT_FORMATS
+
+    Returns:
+        Dictionary with path, rows and seconds
+    """
+    started = time.perf_counter()
+    rows = write_report(output_path, sheets, report_format)
+    return {
+        'path': output_path,
+        'rows': rows,
+        'seconds': time.perf_counter() - started
+    }
+
+
+def project_report_sheets(entries: pd.DataFrame, project: str) -> Sheets:
+    """
+    Build the sheets of one project's report for a date range
+
+    Args:
+        entries: Report frame for the range (daily summary columns plus Date)
+        project: Job code
+
+    Returns:
+        Entries, Daily Totals and Employee Totals sheets (empty list if the
+        project has no entries)
+    """
+    project_entries = entries[entries['Project'] == project]
+    if project_entries.empty:
+        return []
+
+    columns = ['Date'] + ProjectLaborReportGenerator.DAILY_SUMMARY_COLUMNS
+    project_entries = project_entries[columns].sort_values(['Date', 'Employee'])
+
+    daily_totals = project_entries.groupby('Date', observed=True).agg(
+        Total_Hours=('Hours', 'sum'),
+        Employee_Count=('Employee', 'nunique')
+    ).reset_index()
+
+    employee_totals = project_entries.groupby(['Employee', 'Employee_ID'], observed=True).agg(
+        Total_Hours=('Hours', 'sum'),
+        Days_Worked=('Date', 'nunique')
+    ).reset_index().sort_values('Total_Hours', ascending=False)
+
+    return [
+        ('Entries', project_entries, False),
+        ('Daily Totals', daily_totals, False),
+        ('Employee Totals', employee_totals, False)
+    ]
+
+
+def _safe_filename(name: str) -> str:
+    """Replace characters that are not safe in file names"""
+    return ''.join(char if char.isalnum() or char in '-_.' else '_' for char in name)
+
+
+def generate_batch_reports(generator: ProjectLaborReportGenerator, start_date: str, end_date: str,
+                           output_dir: str = DEFAULT_OUTPUT_DIR, projects: Optional[List[str]] = None,
+                           group_by: str = 'date', report_format: str = 'xlsx',
+                           max_workers: Optional[int] = None) -> Dict:
+    """
+    Generate one report per date (or per project) for a date range
+
+    Args:
+        generator: Report generator whose client the data is fetched from
+        start_date: First day (YYYY-MM-DD)
+        end_date: Last day (YYYY-MM-DD)
+        output_dir: Directory the reports are written to (created if missing)
+        projects: Optional job codes to limit the reports to. With
+                  group_by='project', every project with entries if not given
+        group_by: 'date' for foreman reports per day, 'project' for one
+                  range report per project
+        report_format: One of REPORT_FORMATS
+        max_workers: Render processes (defaults to the CPU count; 1 renders inline)
+
+    Returns:
+        Dictionary with the files written, row and report counts, per-stage
+        timings in seconds and throughput
+    """
+    if group_by not in GROUP_BY:
+        raise ValueError(f"group_by must be one of {', '.join(GROUP_BY)}")
+    if report_format not in REPORT_FORMATS:
+        raise ValueError(f"report_format must be one of {', '.join(REPORT_FORMATS)}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    extension = FORMAT_EXTENSIONS[report_format]
+    timings = {}
+    started = time.perf_counter()
+
+    # Stage 1: one pull for the roster and every day any report needs
+    # (per-date reports include the week leading up to each date)
+    fetch_start = start_date
+    if group_by == 'date':
+        fetch_start = generator.weekly_range(start_date)[0]
+    context = generator.build_report_context(fetch_start, end_date)
+    timings['fetch'] = time.perf_counter() - started
+
+    # Stage 2: build every report's sheets from the shared data
+    stage_started = time.perf_counter()
+    tasks = []
+    if group_by == 'date':
+        for date in date_range(start_date, end_date):
+            sheets = generator.foreman_report_sheets(date, context, projects, include_rejected=False)
+            if sheets:
+                tasks.append((os.path.join(output_dir, f'Capitol_Labor_Report_{date}{extension}'), sheets))
+    else:
+        entries = generator.range_entry_frame(context, start_date, end_date)
+        if not entries.empty:
+            for project in projects or sorted(entries['Project'].dropna().unique()):
+                sheets = project_report_sheets(entries, project)
+                if sheets:
+                    filename = f'Capitol_Project_Report_{_safe_filename(project)}_{start_date}_to_{end_date}{extension}'
+                    tasks.append((os.path.join(output_dir, filename), sheets))
+
+    # Rejected rows are not split by date, so they go in one file for the batch
+    rejected_rows = generator.get_rejected_rows(context, projects)
+    if not rejected_rows.empty:
+        tasks.append((os.path.join(output_dir, f'Rejected_Rows_{start_date}_to_{end_date}{extension}'),
+                      [('Rejected Rows', rejected_rows, False)]))
+    timings['prepare'] = time.perf_counter() - stage_started
+
+    # Stage 3: render the files in parallel
+    stage_started = time.perf_counter()
+    if max_workers == 1 or len(tasks) <= 1:
+        results = [render_report(path, sheets, report_format) for path, sheets in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(render_report, path, sheets, report_format)
+                       for path, sheets in tasks]
+            results = [future.result() for future in futures]
+    timings['render'] = time.perf_counter() - stage_started
+    timings['render_cpu'] = sum(result['seconds'] for result in results)
+
+    total_seconds = time.perf_counter() - started
+    rows = sum(result['rows'] for result in results)
+    return {
+        'start_date': start_date,
+        'end_date': end_date,
+        'group_by': group_by,
+        'files': [result['path'] for result in results],
+        'reports': len(results),
+        'rows': rows,
+        'api_fetches': context.fetch_count,
+        'timings': {stage: round(seconds, 3) for stage, seconds in timings.items()},
+        'total_seconds': round(total_seconds, 3),
+        'reports_per_second': round(len(results) / total_seconds, 2) if total_seconds else 0.0,
+        'rows_per_second': round(rows / total_seconds) if total_seconds else 0
+    }
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Capitol Engineering batch report generation')
+    parser.add_argument('--start', required=True, help='First day (YYYY-MM-DD)')
+    parser.add_argument('--end', help='Last day (YYYY-MM-DD, defaults to --start)')
+    parser.add_argument('--by', choices=GROUP_BY, default='date',
+                        help='One report per date or per project')
+    parser.add_argument('--projects', help='Comma-separated job codes to include')
+    parser.add_argument('--foreman', help="Include a foreman's projects (see foreman_scopes.py)")
+    parser.add_argument('--format', choices=REPORT_FORMATS, default='xlsx', help='Report file format')
+    parser.add_argument('--workers', type=int, help='Render processes (defaults to the CPU count)')
+    parser.add_argument('--out', default=DEFAULT_OUTPUT_DIR, help='Output directory')
+    parser.add_argument('--db', default=os.getenv('RIPPLING_STORE_PATH'),
+                        help='Read closed days from this local time entry store')
+    args = parser.parse_args()
+
+    projects = [code.strip() for code in args.projects.split(',') if code.strip()] if args.projects else None
+    if args.foreman:
+        from foreman_scopes import ForemanDirectory
+
+        try:
+            foreman_projects = ForemanDirectory.from_file().projects_for(args.foreman)
+        except KeyError:
+            parser.error(f'unknown foreman: {args.foreman}')
+        projects = sorted(set(projects or []) | set(foreman_projects))
+
+    from response_cache import get_shared_cache
+    from rippling_api_client import RipplingAPIClient
+
+    client = RipplingAPIClient(shared_session=True, cache=get_shared_cache())
+    if args.db:
+        from time_entry_store import TimeEntryStore
+        client = TimeEntryStore(args.db, live_client=client)
+
+    stats = generate_batch_reports(
+        ProjectLaborReportGenerator(client=client), args.start, args.end or args.start,
+        output_dir=args.out, projects=projects, group_by=args.by,
+        report_format=args.format, max_workers=args.workers
+    )
+
+    timings = stats['timings']
+    print(f"Generated {stats['reports']} reports for {stats['start_date']} to {stats['end_date']} in {args.out}")
+    print(f"  Fetch:   {timings['fetch']:.2f}s ({stats['api_fetches']} time entry requests)")
+    print(f"  Prepare: {timings['prepare']:.2f}s")
+    print(f"  Render:  {timings['render']:.2f}s wall, {timings['render_cpu']:.2f}s across workers")
+    print(f"  Total:   {stats['total_seconds']:.2f}s, {stats['reports_per_second']} reports/s, "
+          f"{stats['rows_per_second']:,} rows/s")
+
+
+if __name__ == "__main__":
+    main()
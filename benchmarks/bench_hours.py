@@ -0,0 +1,115 @@
+"""
+Benchmark: per-entry _calculate_hours vs vectorized labor_hours.compute_hours
+
+Usage:
+    python benchmarks/bench_hours.py [--rows N] [--repeat N]
+
+Date created: 2025-10-31
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from demo_data_generator import DemoDataGenerator
+from labor_hours import compute_hours, entries_to_frame
+from project_labor_reports import ProjectLaborReportGenerator
+from time_entry_batch import TimeEntryBatch
+
+
+def build_entries(rows: int):
+    """Build demo entries with a mix of hour sources and some bad rows"""
+    generator = DemoDataGenerator()
+    entries = []
+    day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    while len(entries) < rows:
+        entries.extend(generator.generate_daily_time_entries(day))
+        day -= timedelta(days=1)
+    entries = entries[:rows]
+
+    for i, entry in enumerate(entries):
+        if i % 3 == 0:
+            # Force the start/end path, as for live Rippling entries
+            entry.pop('hours')
+        if i % 1000 == 999:
+            entry.pop('hours', None)
+            entry['start_time'] = 'not-a-timestamp'
+    return entries
+
+
+def time_call(func, repeat: int) -> float:
+    """Best wall time of repeat calls"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark hours calculation')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    entries = build_entries(args.rows)
+    generator = ProjectLaborReportGenerator(client=object())
+
+    def per_entry():
+        # The per-entry path prints every failure; keep that off the console
+        with contextlib.redirect_stdout(io.StringIO()):
+            return [generator._calculate_hours(entry) for entry in entries]
+
+    def vectorized():
+        return compute_hours(entries_to_frame(entries))
+
+    employee_map = {emp['id']: emp for emp in DemoDataGenerator().employees}
+
+    def per_entry_report():
+        # The report loop as it was before vectorization
+        with contextlib.redirect_stdout(io.StringIO()):
+            report_data = []
+            for entry in entries:
+                employee = employee_map.get(entry.get('employee_id') or entry.get('user_id'), {})
+                report_data.append({
+                    'Employee': f"{employee.get('first_name', '')} {employee.get('last_name', '')}",
+                    'Employee_ID': employee.get('employee_id', 'N/A'),
+                    'Project': entry.get('job_code', 'No Project'),
+                    'Job_Dimension': entry.get('dimension_name', 'N/A'),
+                    'Hours': generator._calculate_hours(entry),
+                    'Clock_In': entry.get('start_time', ''),
+                    'Clock_Out': entry.get('end_time', ''),
+                    'Status': entry.get('status', 'Active')
+                })
+            return pd.DataFrame(report_data)
+
+    def vectorized_report():
+        return generator._build_entry_frame(TimeEntryBatch.from_entries(entries), employee_map)
+
+    _, rejected = vectorized()
+    print(f"Rows: {len(entries):,}  (rejected: {len(rejected):,})")
+
+    comparisons = [
+        ('hours only', per_entry, vectorized),
+        ('report frame', per_entry_report, vectorized_report),
+    ]
+    for label, baseline, candidate in comparisons:
+        baseline_seconds = time_call(baseline, args.repeat)
+        candidate_seconds = time_call(candidate, args.repeat)
+        print(f"\n{label}:")
+        print(f"  per-entry  : {baseline_seconds:8.3f} s  {len(entries) / baseline_seconds:12,.0f} rows/sec")
+        print(f"  vectorized : {candidate_seconds:8.3f} s  {len(entries) / candidate_seconds:12,.0f} rows/sec")
+        print(f"  speedup    : {baseline_seconds / candidate_seconds:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Benchmark: pandas/openpyxl Excel export vs the streaming report writers
+
+Each writer runs in its own process so peak RSS is measured per writer.
+The sheet is a daily-summary frame built from demo entries.
+
+Usage:
+    python benchmarks/bench_report_export.py [--rows N]
+
+Date created: 2025-10-31
+"""
+
+import argparse
+import importlib.util
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from report_writers import CsvReportWriter, ParquetReportWriter, XlsxReportWriter, xlsxwriter
+
+WRITERS = ['pandas-openpyxl', 'xlsx-openpyxl', 'xlsx-xlsxwriter', 'csv', 'parquet']
+
+
+def build_frame(rows: int) -> pd.DataFrame:
+    """Build a daily summary frame of the given size from demo entries"""
+    from bench_hours import build_entries
+    from demo_data_generator import DemoDataGenerator
+    from project_labor_reports import ProjectLaborReportGenerator
+    from time_entry_batch import TimeEntryBatch
+
+    generator = ProjectLaborReportGenerator.__new__(ProjectLaborReportGenerator)
+    employee_map = {emp['id']: emp for emp in DemoDataGenerator().employees}
+    batch = TimeEntryBatch.from_entries(build_entries(rows))
+    frame = generator._build_entry_frame(batch, employee_map)
+    return frame[ProjectLaborReportGenerator.DAILY_SUMMARY_COLUMNS]
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process (Linux)"""
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+
+
+class PeakRss:
+    """Samples RSS on a thread while the block runs and keeps the maximum"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = 0.0
+        self._done = threading.Event()
+
+    def _sample(self):
+        while not self._done.is_set():
+            self.peak = max(self.peak, rss_mb())
+            self._done.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = rss_mb()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._done.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_mb())
+
+
+def write(writer_name: str, frame: pd.DataFrame, output_path: str):
+    """Write the frame as one sheet with the named writer"""
+    if writer_name == 'pandas-openpyxl':
+        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
+            frame.to_excel(writer, sheet_name='Daily Summary', index=False)
+        return
+
+    if writer_name == 'xlsx-openpyxl':
+        writer = XlsxReportWriter(output_path, engine='openpyxl')
+    elif writer_name == 'xlsx-xlsxwriter':
+        writer = XlsxReportWriter(output_path, engine='xlsxwriter')
+    elif writer_name == 'csv':
+        writer = CsvReportWriter(output_path)
+    else:
+        writer = ParquetReportWriter(output_path)
+    with writer:
+        writer.write_frame('Daily Summary', frame)
+
+
+def run_child(writer_name: str, frame_path: str):
+    """Child process body: load the frame, write it, print timings"""
+    frame = pd.read_pickle(frame_path)
+    output_path = os.path.join(os.path.dirname(frame_path), f'out_{writer_name}')
+    if writer_name == 'parquet':
+        # Keep the one-off pyarrow import out of the measured write
+        import pyarrow.parquet  # noqa: F401
+
+    baseline = rss_mb()
+    with PeakRss() as peak:
+        started = time.perf_counter()
+        write(writer_name, frame, output_path)
+        seconds = time.perf_counter() - started
+
+    print(f"{seconds} {baseline} {peak.peak} {os.path.getsize(output_path)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark report export writers')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--frame', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.frame)
+        return
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        frame_path = os.path.join(temp_dir, 'frame.pkl')
+        frame = build_frame(args.rows)
+        frame.to_pickle(frame_path)
+        rows = len(frame)
+        del frame
+
+        print(f"Rows: {rows:,}")
+        print(f"  {'writer':<16} {'s/100k rows':>11} {'peak RSS':>10} {'growth':>10} {'file':>9}")
+        for writer_name in WRITERS:
+            if writer_name == 'xlsx-xlsxwriter' and xlsxwriter is None:
+                print(f"  {writer_name:<16} skipped (xlsxwriter not installed)")
+                continue
+            if writer_name == 'parquet' and importlib.util.find_spec('pyarrow') is None:
+                print(f"  {writer_name:<16} skipped (pyarrow not installed)")
+                continue
+
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--child', writer_name, '--frame', frame_path],
+                check=True, capture_output=True, text=True
+            ).stdout.split()
+            seconds, baseline, peak, size = (float(value) for value in output[-4:])
+            print(f"  {writer_name:<16} {seconds * 100000 / rows:10.2f}s {peak:8.0f} MB "
+                  f"{peak - baseline:7.0f} MB {size / 2**20:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+"""
+Benchmark suite: report and dashboard hot paths on synthetic workloads
+
+Runs every case against SyntheticWorkload companies of increasing size,
+each size in its own process:
+
+    reports    ProjectLaborReportGenerator (daily summary, project
+               breakdown, weekly hours, foreman export) over an in-process
+               client, so the numbers are report code only
+    ultra      calculate_project_costs and get_overtime_predictions
+    routes     every JSON route of the dashboard and demo apps through the
+               Flask test client; the foreman dashboard reads from a
+               mock_rippling_server.py on a local port
+
+Each case reports latency percentiles over repeated calls (plus the first,
+cold call on its own), throughput, peak traced memory and the net number
+of memory blocks a call leaves allocated. Results are written as JSON;
+--compare flags cases whose median latency regressed against an earlier run.
+
+Usage:
+    python benchmarks/bench_suite.py [--sizes small,medium,large] [--iterations N]
+    python benchmarks/bench_suite.py --compare benchmarks/results/<earlier run>.json
+
+Date created: 2025-10-31
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Dataset size -> (employees, projects)
+SIZES = {
+    'small': (50, 20),
+    'medium': (500, 200),
+    'large': (2000, 400)
+}
+
+# Fixed report date so runs are comparable (a Wednesday)
+BENCH_DATE = '2025-10-15'
+
+SEED = 42
+
+DEFAULT_RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+# Median latency growth (and absolute floor) counted as a regression
+DEFAULT_THRESHOLD = 0.2
+MIN_REGRESSION_MS = 0.5
+
+
+class WorkloadClient:
+    """In-process stand-in for RipplingAPIClient over pre-generated days"""
+
+    def __init__(self, workload, start_date: str, end_date: str):
+        self.workload = workload
+        start = datetime.strptime(start_date, '%Y-%m-%d')
+        days = (datetime.strptime(end_date, '%Y-%m-%d') - start).days + 1
+        self._days = {}
+        for offset in range(days):
+            day = start + timedelta(days=offset)
+            self._days[day.strftime('%Y-%m-%d')] = workload.generate_daily_time_entries(day)
+
+    def get_employees(self, limit: int = 100) -> List[Dict]:
+        return self.workload.employees
+
+    def get_time_entries(self, start_date: str = None, end_date: str = None, limit: int = 100) -> List[Dict]:
+        return [entry for day, entries in self._days.items()
+                if start_date <= day <= end_date for entry in entries]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def measure(func: Callable, iterations: int) -> Dict:
+    """
+    Time repeated calls of func, then trace one more call's memory
+
+    Returns:
+        Dictionary of latency percentiles (ms), throughput and memory stats
+    """
+    started = time.perf_counter()
+    func()
+    cold = time.perf_counter() - started
+
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+
+    tracemalloc.start()
+    blocks_before = sys.getallocatedblocks()
+    func()
+    blocks_after = sys.getallocatedblocks()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    def ms(seconds):
+        return round(seconds * 1000, 3)
+
+    return {
+        'iterations': iterations,
+        'cold_ms': ms(cold),
+        'p50_ms': ms(percentile(timings, 0.5)),
+        'p90_ms': ms(percentile(timings, 0.9)),
+        'p99_ms': ms(percentile(timings, 0.99)),
+        'max_ms': ms(timings[-1]),
+        'mean_ms': ms(sum(timings) / len(timings)),
+        'ops_per_sec': round(len(timings) / sum(timings), 2) if sum(timings) else None,
+        'peak_traced_mb': round(peak / 2**20, 3),
+        'net_blocks': blocks_after - blocks_before
+    }
+
+
+def get_route(client, path: str) -> Callable:
+    """Return a call that GETs path and fails on an error status"""
+    def call():
+        response = client.get(path)
+        if response.status_code >= 400:
+            raise RuntimeError(f"GET {path} returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+        return response
+    return call
+
+
+def start_mock_server(workload) -> str:
+    """Serve the workload from a mock Rippling server thread; returns its base URL"""
+    from werkzeug.serving import make_server
+
+    from mock_rippling_server import MockServerConfig, create_mock_app
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, create_mock_app(MockServerConfig(page_size=1000, seed=SEED), workload),
+                         threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.server_port}'
+
+
+def run_size(size: str, iterations: int, work_dir: str) -> Dict:
+    """Child process body: run every case for one dataset size"""
+    employees, projects = SIZES[size]
+
+    # The demo apps and the dashboard read their configuration at import
+    os.environ.update({
+        'DEMO_EMPLOYEES': str(employees),
+        'DEMO_PROJECTS': str(projects),
+        'DEMO_SEED': str(SEED),
+        'RIPPLING_API_TOKEN': 'bench',
+        'RIPPLING_RATE_LIMIT': '10000',
+        'RIPPLING_RATE_BURST': '10000',
+        'DASHBOARD_BACKGROUND_REFRESH': 'false',
+        'EXPORT_DIR': os.path.join(work_dir, 'exports'),
+        'FOREMAN_PROJECTS_PATH': os.path.join(work_dir, 'foremen.json')
+    })
+
+    from synthetic_workload import SyntheticWorkload
+    workload = SyntheticWorkload(employees=employees, projects=projects, seed=SEED)
+
+    # One foreman running a tenth of the projects
+    foreman_projects = [project['code'] for project in workload.projects[::10]]
+    with open(os.environ['FOREMAN_PROJECTS_PATH'], 'w') as f:
+        json.dump({'bench': {'name': 'Bench Foreman', 'projects': foreman_projects}}, f)
+    os.environ['RIPPLING_API_BASE_URL'] = start_mock_server(workload)
+
+    from project_labor_reports import ProjectLaborReportGenerator
+
+    generator = ProjectLaborReportGenerator(client=object())
+    week_start, week_end = generator.weekly_range(BENCH_DATE)
+    generator.client = WorkloadClient(workload, week_start, week_end)
+    entries = len(generator.client.get_time_entries(BENCH_DATE, BENCH_DATE))
+    export_path = os.path.join(work_dir, 'report.xlsx')
+    export_iterations = max(3, iterations // 5)
+
+    cases = [
+        ('reports', 'get_daily_project_summary', lambda: generator.get_daily_project_summary(BENCH_DATE), iterations),
+        ('reports', 'get_project_breakdown', lambda: generator.get_project_breakdown(BENCH_DATE), iterations),
+        ('reports', 'get_employee_weekly_hours', lambda: generator.get_employee_weekly_hours(end_date=BENCH_DATE),
+         iterations),
+        ('reports', 'export_foreman_report', lambda: generator.export_foreman_report(export_path, BENCH_DATE),
+         export_iterations),
+    ]
+
+    import demo_mode_ultra
+    cases += [
+        ('ultra', 'calculate_project_costs', lambda: demo_mode_ultra.calculate_project_costs(BENCH_DATE), iterations),
+        ('ultra', 'get_overtime_predictions', demo_mode_ultra.get_overtime_predictions, iterations),
+    ]
+
+    import demo_mode
+    import demo_mode_enhanced
+    import foreman_dashboard
+
+    routes = [
+        (demo_mode, ['/api/daily-summary', '/api/project-breakdown', '/api/stats']),
+        (demo_mode_enhanced, ['/api/daily-summary', '/api/project-breakdown', '/api/weekly-trends',
+                              '/api/employee-analytics', '/api/capabilities']),
+        (demo_mode_ultra, ['/api/project-costs', '/api/overtime-predictions', '/api/smart-alerts',
+                           '/api/future-features']),
+        (foreman_dashboard, ['/api/dashboard', '/api/dashboard?foreman=bench', '/api/daily-summary?limit=100',
+                             '/api/project-breakdown', '/api/weekly-hours', '/api/foremen',
+                             '/api/export-excel']),
+    ]
+    for module, paths in routes:
+        client = module.app.test_client()
+        for path in paths:
+            dated = path + ('&' if '?' in path else '?') + f'date={BENCH_DATE}'
+            cases.append(('routes', f'{module.__name__} {path}', get_route(client, dated), iterations))
+
+    results = []
+    for group, name, func, case_iterations in cases:
+        try:
+            result = {'group': group, 'case': name, **measure(func, case_iterations)}
+        except Exception as e:
+            result = {'group': group, 'case': name, 'error': str(e)}
+        results.append(result)
+
+    return {
+        'size': size,
+        'employees': employees,
+        'projects': projects,
+        'entries_per_day': entries,
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'cases': results
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """
+    Find cases whose median latency grew by more than threshold
+
+    Returns:
+        One line per regression
+    """
+    previous = {(run['size'], case['case']): case
+                for run in baseline.get('runs', []) for case in run['cases'] if 'p50_ms' in case}
+    regressions = []
+    for run in results['runs']:
+        for case in run['cases']:
+            before = previous.get((run['size'], case['case']))
+            if before is None or 'p50_ms' not in case:
+                continue
+            growth = case['p50_ms'] - before['p50_ms']
+            if growth > MIN_REGRESSION_MS and case['p50_ms'] > before['p50_ms'] * (1 + threshold):
+                regressions.append(f"{run['size']:<7} {case['case']:<50} p50 {before['p50_ms']:.2f} -> "
+                                   f"{case['p50_ms']:.2f} ms (+{growth / before['p50_ms']:.0%})")
+    return regressions
+
+
+def print_run(run: Dict):
+    print(f"\n{run['size']}: {run['employees']} employees x {run['projects']} projects, "
+          f"{run['entries_per_day']:,} entries/day, peak RSS {run['peak_rss_mb']:.0f} MB")
+    print(f"  {'case':<50} {'cold':>9} {'p50':>9} {'p90':>9} {'p99':>9} {'ops/s':>9} {'peak MB':>8} {'blocks':>8}")
+    for case in run['cases']:
+        if 'error' in case:
+            print(f"  {case['case']:<50} error: {case['error']}")
+            continue
+        print(f"  {case['case']:<50} {case['cold_ms']:9.2f} {case['p50_ms']:9.2f} {case['p90_ms']:9.2f} "
+              f"{case['p99_ms']:9.2f} {case['ops_per_sec'] or 0:9.1f} {case['peak_traced_mb']:8.2f} "
+              f"{case['net_blocks']:8d}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark report and dashboard hot paths')
+    parser.add_argument('--sizes', default=','.join(SIZES), help='Comma-separated dataset sizes')
+    parser.add_argument('--iterations', type=int, default=20, help='Timed calls per case')
+    parser.add_argument('--output', help='Results file (defaults to benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--compare', help='Earlier results file to check for regressions')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Median latency growth counted as a regression')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--result-file', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        with tempfile.TemporaryDirectory() as work_dir:
+            run = run_size(args.child, args.iterations, work_dir)
+        with open(args.result_file, 'w') as f:
+            json.dump(run, f)
+        # Skip waiting on the dashboard's and export queue's worker threads
+        os._exit(0)
+
+    sizes = [size.strip() for size in args.sizes.split(',') if size.strip()]
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        parser.error(f"unknown sizes: {', '.join(unknown)} (expected {', '.join(SIZES)})")
+
+    results = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'date': BENCH_DATE,
+        'seed': SEED,
+        'iterations': args.iterations,
+        'runs': []
+    }
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for size in sizes:
+            result_file = os.path.join(temp_dir, f'{size}.json')
+            subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--child', size,
+                 '--iterations', str(args.iterations), '--result-file', result_file],
+                check=True, cwd=ROOT, stdout=subprocess.DEVNULL
+            )
+            with open(result_file) as f:
+                run = json.load(f)
+            results['runs'].append(run)
+            print_run(run)
+
+    output = args.output or os.path.join(DEFAULT_RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.compare}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Benchmark: memory of raw time entry dicts vs a columnar TimeEntryBatch
+
+Usage:
+    python benchmarks/bench_time_entry_memory.py [--rows N]
+
+Date created: 2025-10-31
+"""
+
+import argparse
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_hours import build_entries
+from time_entry_batch import TimeEntryBatch
+
+
+def traced_bytes(build):
+    """Bytes still allocated by build() once it returns, and its result"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark time entry memory')
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    # Round-trip through JSON text so the dicts own their strings, as they
+    # do when decoded from an API response
+    payload = json.dumps(build_entries(args.rows))
+
+    dict_bytes, entries = traced_bytes(lambda: json.loads(payload))
+    batch_bytes, batch = traced_bytes(lambda: TimeEntryBatch.from_entries(entries))
+
+    print(f"Rows: {len(entries):,}")
+    print(f"  dicts : {dict_bytes / 2**20:8.1f} MB")
+    print(f"  batch : {batch_bytes / 2**20:8.1f} MB  (deep column size {batch.nbytes / 2**20:.1f} MB, incl. strings shared with the dicts)")
+    print(f"  ratio : {dict_bytes / batch_bytes:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Dashboard Event Broadcaster for Capitol Engineering
+Pushes data changes to open dashboards as server-sent events
+
+One producer (the background refresher, through the aggregates' change
+listener) publishes each change once. Every open dashboard holds a
+small queue and streams what lands in it, so N open tabs cost one data
+refresh, not N polls. A stream can carry a scope (e.g. one foreman's
+projects): each change is narrowed once per scope, and scopes it does
+not touch get nothing.
+
+Each SSE connection holds a server thread for its lifetime. Run the
+dashboard threaded (Flask's default) or under gunicorn with gthread or
+gevent workers.
+
+Date created: 2025-10-31
+"""
+
+import json
+import queue
+import threading
+from typing import Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+# Events buffered per connection before it is told to reload instead
+DEFAULT_QUEUE_SIZE = 100
+
+# Seconds between keep-alive comments on an idle stream
+DEFAULT_HEARTBEAT = 15
+
+
+def format_sse(event: str, data: Dict, event_id: Optional[str] = None) -> str:
+    """
+    Format one server-sent event
+
+    Args:
+        event: Event name (the EventSource listener type)
+        data: JSON-serializable payload
+        event_id: Optional id, sent back by the browser as Last-Event-ID
+
+    Returns:
+        Event text, terminated by a blank line
+    """
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data, default=str)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+# (scope key, function narrowing a payload to the scope, or returning None to skip it)
+Scope = Tuple[Hashable, Callable[[Dict], Optional[Dict]]]
+
+
+class _Subscriber:
+    """One open event stream"""
+
+    def __init__(self, date: Optional[str], max_queue: int, scope: Optional[Scope] = None):
+        self.date = date
+        self.scope = scope
+        self.queue: 'queue.Queue[tuple]' = queue.Queue(maxsize=max_queue)
+        self.overflowed = False
+
+
+class EventBroadcaster:
+    """Fans published events out to every subscribed stream"""
+
+    def __init__(self, max_queue: int = DEFAULT_QUEUE_SIZE,
+                 heartbeat: float = DEFAULT_HEARTBEAT):
+        """
+        Initialize the broadcaster
+
+        Args:
+            max_queue: Events buffered per subscriber; a subscriber that
+                       falls further behind is sent a 'resync' event
+            heartbeat: Seconds between keep-alive comments on idle streams
+        """
+        self.max_queue = max_queue
+        self.heartbeat = heartbeat
+        self.published = 0
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    @property
+    def subscriber_count(self) -> int:
+        """Number of open streams"""
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, event: str, data: Dict, date: Optional[str] = None):
+        """
+        Send an event to every subscriber of the date (or to all if date is None)
+
+        Never blocks: a subscriber whose queue is full is marked for resync.
+        Scoped subscribers get the payload narrowed once per scope.
+        """
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self.published += 1
+
+        scoped: Dict[Hashable, Optional[Dict]] = {}
+        for subscriber in subscribers:
+            if date is not None and subscriber.date not in (None, date):
+                continue
+
+            payload = data
+            if subscriber.scope is not None:
+                key, narrow = subscriber.scope
+                if key not in scoped:
+                    try:
+                        scoped[key] = narrow(data)
+                    except Exception as e:
+                        print(f"Error scoping {event} event: {e}")
+                        scoped[key] = None
+                payload = scoped[key]
+                if payload is None:
+                    continue
+
+            try:
+                subscriber.queue.put_nowait((event, payload))
+            except queue.Full:
+                subscriber.overflowed = True
+
+    def on_aggregate_change(self, date: str, change: Dict):
+        """MaterializedLaborAggregates listener: publish a day's change as an 'update' event"""
+        self.publish('update', change, date=date)
+
+    def stream(self, date: Optional[str] = None, initial: Optional[Dict] = None,
+               scope: Optional[Scope] = None) -> Iterator[str]:
+        """
+        Yield server-sent event text for one connection until it closes
+
+        Args:
+            date: Only forward events for this date (all dates if None)
+            initial: Optional payload sent first as a 'hello' event, e.g.
+                     the current data version so the client can tell
+                     whether its copy is current
+            scope: Optional (key, narrow) pair; narrow(payload) returns the
+                   payload limited to the scope, or None to skip the event.
+                   Streams with the same key share one narrowed payload.
+
+        Yields:
+            SSE-formatted strings
+        """
+        subscriber = _Subscriber(date, self.max_queue, scope)
+        with self._lock:
+            self._subscribers.add(subscriber)
+
+        try:
+            # Tell the browser how long to wait before reconnecting
+            yield 'retry: 5000\n\n'
+            if initial is not None:
+                yield format_sse('hello', initial)
+
+            while True:
+                if subscriber.overflowed:
+                    # Too far behind to patch; the client reloads everything
+                    subscriber.overflowed = False
+                    with subscriber.queue.mutex:
+                        subscriber.queue.queue.clear()
+                    yield format_sse('resync', {'date': date})
+                    continue
+
+                try:
+                    event, data = subscriber.queue.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield format_sse(event, data, event_id=str(data.get('version', '')) or None)
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
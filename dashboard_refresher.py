@@ -0,0 +1,141 @@
+"""
+Background Dashboard Refresher for Capitol Engineering
+Keeps recent days of foreman dashboard data warm between requests
+
+At shift start every foreman opens the dashboard at once. The refresher
+re-reads today and the previous days on a fixed schedule in a daemon
+thread, so requests are answered from the latest snapshot and report its
+age instead of waiting on Rippling.
+
+Date created: 2025-10-31
+"""
+
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+from labor_aggregates import MaterializedLaborAggregates
+
+# Seconds between scheduled refreshes
+DEFAULT_INTERVAL = 60
+
+# Days kept warm, counting today
+DEFAULT_DAYS = 8
+
+
+class DashboardRefresher:
+    """Refreshes dashboard aggregates and the weekly pivot on a schedule"""
+
+    def __init__(self, aggregates: MaterializedLaborAggregates,
+                 interval: float = DEFAULT_INTERVAL, days: int = DEFAULT_DAYS):
+        """
+        Initialize the refresher
+
+        Args:
+            aggregates: Aggregates to refresh and build the weekly pivot from
+            interval: Seconds between refreshes
+            days: Number of days to keep warm, counting back from today
+        """
+        self.aggregates = aggregates
+        self.generator = aggregates.generator
+        self.interval = interval
+        self.days = days
+
+        self.last_run: Optional[float] = None
+        self.last_duration = 0.0
+        self.error_count = 0
+
+        self._weekly_hours: Optional[pd.DataFrame] = None
+        self._weekly_refreshed_at = 0.0
+        self._weekly_hash = ''
+        self._weekly_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def recent_days(self) -> List[str]:
+        """List the days kept warm, today first"""
+        today = datetime.now()
+        return [(today - timedelta(days=i)).strftime('%Y-%m-%d') for i in range(self.days)]
+
+    def refresh_once(self):
+        """Refresh every recent day and the weekly pivot; errors are printed, not raised"""
+        started = time.monotonic()
+        for day in self.recent_days():
+            try:
+                self.aggregates.refresh(day)
+            except Exception as e:
+                self.error_count += 1
+                print(f"Error refreshing dashboard data for {day}: {e}")
+
+        try:
+            self._refresh_weekly_hours()
+        except Exception as e:
+            self.error_count += 1
+            print(f"Error refreshing weekly hours: {e}")
+
+        self.last_run = time.time()
+        self.last_duration = time.monotonic() - started
+
+    def _refresh_weekly_hours(self) -> pd.DataFrame:
+        """Rebuild the weekly hours pivot snapshot from the materialized days"""
+        weekly_hours = self.aggregates.weekly_hours(*self.generator.weekly_range())
+        weekly_hash = hashlib.sha1(
+            weekly_hours.reset_index().to_json(orient='split', date_format='iso').encode()
+        ).hexdigest()[:20]
+        with self._weekly_lock:
+            self._weekly_hours = weekly_hours
+            self._weekly_hash = weekly_hash
+            self._weekly_refreshed_at = time.monotonic()
+        return weekly_hours
+
+    def get_weekly_hours(self) -> Tuple[pd.DataFrame, float, str]:
+        """
+        Get the latest weekly hours pivot
+
+        Built on the spot only if no snapshot exists yet.
+
+        Returns:
+            Tuple of (weekly hours DataFrame, age in seconds, content hash)
+        """
+        with self._weekly_lock:
+            weekly_hours = self._weekly_hours
+        if weekly_hours is None:
+            self._refresh_weekly_hours()
+        with self._weekly_lock:
+            return (self._weekly_hours, time.monotonic() - self._weekly_refreshed_at,
+                    self._weekly_hash)
+
+    def _run(self):
+        """Thread body: refresh immediately, then every interval until stopped"""
+        while not self._stop.is_set():
+            self.refresh_once()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Start the background thread (does nothing if already running)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='dashboard-refresher', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the background thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def get_stats(self) -> dict:
+        """Get refresher timing and error counts"""
+        return {
+            'interval': self.interval,
+            'days': self.days,
+            'running': self._thread is not None and self._thread.is_alive(),
+            'last_run': datetime.fromtimestamp(self.last_run).isoformat() if self.last_run else None,
+            'last_duration': round(self.last_duration, 3),
+            'error_count': self.error_count
+        }
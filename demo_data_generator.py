@@ -7,15 +7,21 @@ Date created: 2025-10-30
 
 import random
 from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Dict, List, Optional
 import json
 
 
 class DemoDataGenerator:
     """Generate realistic demo data for time tracking demonstrations"""
 
-    def __init__(self):
-        """Initialize demo data generator with Capitol Engineering specific data"""
+    def __init__(self, seed: Optional[int] = None):
+        """
+        Initialize demo data generator with Capitol Engineering specific data
+
+        Args:
+            seed: Seed for reproducible entries (random each run if not provided)
+        """
+        self.random = random.Random(seed)
 
         # Capitol Engineering employees
         self.employees = [
@@ -88,11 +94,11 @@ class DemoDataGenerator:
         """
         if hours is None:
             # Random hours between 6-10
-            hours = round(random.uniform(6.0, 10.0), 2)
+            hours = round(self.random.uniform(6.0, 10.0), 2)
 
         # Generate clock in time (between 6 AM - 8 AM)
-        clock_in_hour = random.randint(6, 8)
-        clock_in_minute = random.choice([0, 15, 30, 45])
+        clock_in_hour = self.random.randint(6, 8)
+        clock_in_minute = self.random.choice([0, 15, 30, 45])
         clock_in = date.replace(hour=clock_in_hour, minute=clock_in_minute, second=0)
 
         # Calculate clock out time
@@ -109,7 +115,7 @@ class DemoDataGenerator:
             "job_code": project["code"],
             "job_name": project["name"],
             "dimension_name": "Project Code",
-            "status": "Approved" if random.random() > 0.1 else "Pending",
+            "status": "Approved" if self.random.random() > 0.1 else "Pending",
             "notes": ""
         }
 
@@ -131,12 +137,12 @@ class DemoDataGenerator:
         # Assign employees to projects (some employees may work on multiple projects)
         for employee in self.employees:
             # 90% chance employee works today
-            if random.random() < 0.9:
+            if self.random.random() < 0.9:
                 # Most employees work on one project
-                num_projects = 1 if random.random() < 0.8 else 2
+                num_projects = 1 if self.random.random() < 0.8 else 2
 
                 # Select random projects
-                employee_projects = random.sample(self.projects, num_projects)
+                employee_projects = self.random.sample(self.projects, num_projects)
 
                 if num_projects == 1:
                     # Full day on one project
@@ -145,8 +151,8 @@ class DemoDataGenerator:
                     )
                 else:
                     # Split day between two projects
-                    hours_1 = round(random.uniform(3.0, 6.0), 2)
-                    hours_2 = round(random.uniform(3.0, 6.0), 2)
+                    hours_1 = round(self.random.uniform(3.0, 6.0), 2)
+                    hours_2 = round(self.random.uniform(3.0, 6.0), 2)
 
                     time_entries.append(
                         self.generate_time_entry(employee, employee_projects[0], date, hours_1)
@@ -7,22 +7,33 @@ Date created: 2025-10-30
 
 from flask import Flask, render_template, jsonify, request, send_file
 from datetime import datetime, timedelta
-from demo_data_generator import DemoDataGenerator
+from synthetic_workload import create_demo_generator
+from export_jobs import ExportJobQueue, export_response, register_export_routes
+from metrics import register_metrics
+from request_timing import register_request_timing
+from time_entry_batch import TimeEntryBatch
 import pandas as pd
 import os
 import json
 import random
 
 app = Flask(__name__)
+register_request_timing(app)
+register_metrics(app, 'demo_mode_enhanced')
+
+# Excel exports are built in the background and downloaded by job id
+export_queue = ExportJobQueue()
+register_export_routes(app, export_queue)
 
 # Initialize demo data generator
-demo_generator = DemoDataGenerator()
+demo_generator = create_demo_generator()
 
 # Generate demo data cache
 demo_cache = {
     'employees': demo_generator.generate_sample_employees(),
     'projects': demo_generator.generate_sample_projects(),
     'time_entries': {},
+    'batches': {},
     'generated_at': datetime.now()
 }
 
@@ -35,33 +46,47 @@ def get_demo_time_entries(date_str: str):
     return demo_cache['time_entries'][date_str]
 
 
+def get_demo_time_batch(date_str: str) -> TimeEntryBatch:
+    """Get the columnar batch of a date's time entries, built once per date"""
+    if date_str not in demo_cache['batches']:
+        demo_cache['batches'][date_str] = TimeEntryBatch.from_entries(
+            get_demo_time_entries(date_str), default_date=date_str
+        )
+    return demo_cache['batches'][date_str]
+
+
+def _format_clock(values):
+    """Format ISO clock times as 12-hour times (e.g. 07:30 AM)"""
+    return [datetime.fromisoformat(value).strftime('%I:%M %p') if value else 'N/A'
+            for value in values]
+
+
 def process_demo_daily_summary(date: str):
     """Process demo time entries into daily summary format"""
-    time_entries = get_demo_time_entries(date)
-    employee_map = {emp['id']: emp for emp in demo_cache['employees']}
-
-    report_data = []
-
-    for entry in time_entries:
-        employee_id = entry.get('employee_id')
-        employee = employee_map.get(employee_id, {})
-
-        report_data.append({
-            'Employee': f"{employee.get('first_name', '')} {employee.get('last_name', '')}",
-            'Employee_ID': employee.get('employee_id', 'N/A'),
-            'Role': employee.get('role', 'N/A'),
-            'Project': entry.get('job_code', 'No Project'),
-            'Project_Name': entry.get('job_name', 'N/A'),
-            'Job_Dimension': entry.get('dimension_name', 'N/A'),
-            'Hours': entry.get('hours', 0),
-            'Clock_In': datetime.fromisoformat(entry['start_time']).strftime('%I:%M %p'),
-            'Clock_Out': datetime.fromisoformat(entry['end_time']).strftime('%I:%M %p'),
-            'Status': entry.get('status', 'Active')
-        })
+    batch = get_demo_time_batch(date)
+    if not len(batch):
+        return pd.DataFrame()
 
-    df = pd.DataFrame(report_data)
-    if not df.empty:
-        df = df.sort_values(['Project', 'Employee'])
+    # Employee fields are looked up once per employee, then broadcast per entry
+    employee_map = {emp['id']: emp for emp in demo_cache['employees']}
+    names = {emp_id: f"{emp.get('first_name', '')} {emp.get('last_name', '')}"
+             for emp_id, emp in employee_map.items()}
+    badge_ids = {emp_id: emp.get('employee_id', 'N/A') for emp_id, emp in employee_map.items()}
+    roles = {emp_id: emp.get('role', 'N/A') for emp_id, emp in employee_map.items()}
+
+    df = pd.DataFrame({
+        'Employee': batch.map_values('employee_id', names, ' '),
+        'Employee_ID': batch.map_values('employee_id', badge_ids, 'N/A'),
+        'Role': batch.map_values('employee_id', roles, 'N/A'),
+        'Project': batch.values('job_code'),
+        'Project_Name': batch.values('job_name', 'N/A'),
+        'Job_Dimension': batch.values('dimension_name'),
+        'Hours': batch['hours'],
+        'Clock_In': _format_clock(batch['start_time']),
+        'Clock_Out': _format_clock(batch['end_time']),
+        'Status': batch.values('status')
+    })
+    df = df.sort_values(['Project', 'Employee'])
 
     return df
 
@@ -314,52 +339,53 @@ def get_api_capabilities():
     return jsonify(capabilities)
 
 
+def build_enhanced_report(output_path: str, date: str):
+    """Write the enhanced demo Excel report for a date to output_path"""
+    with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
+        # Sheet 1: Daily summary
+        daily_summary = process_demo_daily_summary(date)
+        if not daily_summary.empty:
+            daily_summary.to_excel(writer, sheet_name='Daily Summary', index=False)
+
+        # Sheet 2: Project breakdown
+        project_breakdown = process_demo_project_breakdown(date)
+        if not project_breakdown.empty:
+            project_breakdown.to_excel(writer, sheet_name='Project Totals', index=False)
+
+        # Sheet 3: Weekly trends
+        trends = get_weekly_trends()
+        trends_df = pd.DataFrame(trends)
+        trends_df.to_excel(writer, sheet_name='Weekly Trends', index=False)
+
+        # Sheet 4: Employee analytics
+        analytics = get_employee_analytics()
+        analytics_df = pd.DataFrame(analytics)
+        analytics_df.to_excel(writer, sheet_name='Employee Analytics', index=False)
+
+        # Sheet 5: API Info
+        api_info = pd.DataFrame([{
+            'System': 'Rippling Time Tracking Integration',
+            'Company': 'Capitol Engineering',
+            'Website': 'www.capitolaz.com',
+            'API Base URL': 'https://rest.ripplingapis.com',
+            'Demo Mode': 'Yes - Sample Data',
+            'Generated': datetime.now().strftime('%Y-%m-%d %I:%M %p')
+        }])
+        api_info.to_excel(writer, sheet_name='System Info', index=False)
+
+
 @app.route('/api/export-excel')
 def export_to_excel():
-    """Generate enhanced Excel report"""
+    """Start (or reuse) a background enhanced Excel report build"""
     date = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
 
     try:
-        output_path = f"Capitol_Labor_Report_ENHANCED_{date}.xlsx"
-
-        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-            # Sheet 1: Daily summary
-            daily_summary = process_demo_daily_summary(date)
-            if not daily_summary.empty:
-                daily_summary.to_excel(writer, sheet_name='Daily Summary', index=False)
-
-            # Sheet 2: Project breakdown
-            project_breakdown = process_demo_project_breakdown(date)
-            if not project_breakdown.empty:
-                project_breakdown.to_excel(writer, sheet_name='Project Totals', index=False)
-
-            # Sheet 3: Weekly trends
-            trends = get_weekly_trends()
-            trends_df = pd.DataFrame(trends)
-            trends_df.to_excel(writer, sheet_name='Weekly Trends', index=False)
-
-            # Sheet 4: Employee analytics
-            analytics = get_employee_analytics()
-            analytics_df = pd.DataFrame(analytics)
-            analytics_df.to_excel(writer, sheet_name='Employee Analytics', index=False)
-
-            # Sheet 5: API Info
-            api_info = pd.DataFrame([{
-                'System': 'Rippling Time Tracking Integration',
-                'Company': 'Capitol Engineering',
-                'Website': 'www.capitolaz.com',
-                'API Base URL': 'https://rest.ripplingapis.com',
-                'Demo Mode': 'Yes - Sample Data',
-                'Generated': datetime.now().strftime('%Y-%m-%d %I:%M %p')
-            }])
-            api_info.to_excel(writer, sheet_name='System Info', index=False)
+        # Demo data is fixed per date once generated, so the date is the data version
+        filename = f"Capitol_Labor_Report_ENHANCED_{date}.xlsx"
+        job = export_queue.submit(('enhanced', date), filename,
+                                  lambda path: build_enhanced_report(path, date))
 
-        return jsonify({
-            'success': True,
-            'file': output_path,
-            'message': f'Enhanced demo report generated: {output_path}',
-            'demo_mode': True
-        })
+        return export_response(job, f'Enhanced demo report generated: {filename}')
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1034,13 +1060,27 @@ def create_enhanced_html_template():
                 .then(response => response.json())
                 .then(data => {
                     if (data.success) {
-                        alert('Enhanced Demo Report Generated!\\n\\n' + data.message + '\\n\\nIncludes: Daily Summary, Project Totals, Weekly Trends, Employee Analytics, and System Info');
+                        waitForExport(data);
                     } else {
                         alert('Error: ' + (data.error || 'Unknown error'));
                     }
                 });
         }
 
+        function waitForExport(data) {
+            // The workbook is built in the background; poll until it can be downloaded
+            if (data.status === 'done') {
+                alert('Enhanced Demo Report Generated!\\n\\n' + data.message + '\\n\\nIncludes: Daily Summary, Project Totals, Weekly Trends, Employee Analytics, and System Info');
+                window.location = data.download_url;
+            } else if (data.status === 'failed') {
+                alert('Error: ' + (data.error || 'Export failed'));
+            } else {
+                setTimeout(() => fetch(data.status_url)
+                    .then(response => response.json())
+                    .then(status => waitForExport({...status, message: data.message})), 1000);
+            }
+        }
+
         loadAllData();
     </script>
 </body>
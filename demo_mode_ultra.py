@@ -7,15 +7,19 @@ Date created: 2025-10-30
 
 from flask import Flask, render_template, jsonify, request
 from datetime import datetime, timedelta
-from demo_data_generator import DemoDataGenerator
+from synthetic_workload import create_demo_generator
+from metrics import register_metrics
+from request_timing import register_request_timing
 import pandas as pd
 import os
 import random
 
 app = Flask(__name__)
+register_request_timing(app)
+register_metrics(app, 'demo_mode_ultra')
 
 # Initialize demo data generator
-demo_generator = DemoDataGenerator()
+demo_generator = create_demo_generator()
 
 # Generate demo data cache
 demo_cache = {
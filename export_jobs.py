@@ -0,0 +1,225 @@
+"""
+Background Export Jobs for Capitol Engineering
+Builds Excel reports off the request thread and serves them for download
+
+Building a workbook inside the request blocks the worker, and writing it
+to a fixed name in the working directory lets concurrent exports clobber
+each other. An ExportJobQueue runs builds on a small thread pool, writes
+each artifact to its own file under the export directory, and hands back
+a job id with status and download URLs.
+
+Artifacts are keyed by the data they were built from (e.g. date plus data
+version), so asking again for unchanged data returns the finished file at
+once, and identical requests made while a build runs share that build. A
+build that reads its data on the worker can report the key of what it
+actually read, and the job is filed under that key.
+
+Date created: 2025-10-31
+"""
+
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from flask import jsonify, send_file
+
+from metrics import EXPORT_SECONDS
+
+DEFAULT_EXPORT_DIR = os.getenv('EXPORT_DIR', 'exports')
+
+# Concurrent builds
+DEFAULT_MAX_WORKERS = 2
+
+# Finished jobs kept (with their files) before the oldest are removed
+DEFAULT_MAX_JOBS = 50
+
+# Seconds a finished artifact is kept regardless of max_jobs, so a client
+# that was just handed its download URL (or is still downloading) gets it
+DEFAULT_RETENTION_SECONDS = 15 * 60
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class ExportJob:
+    """One export build and its artifact"""
+
+    def __init__(self, key: Hashable, filename: str, output_dir: str):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.filename = filename
+        # Prefixed with the job id so concurrent exports never share a file
+        self.path = os.path.join(output_dir, f'{self.id}_{filename}')
+        self.status = QUEUED
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict:
+        """Describe the job for a JSON response"""
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'file': self.filename,
+            'error': self.error,
+            'status_url': f'/api/exports/{self.id}',
+            'download_url': f'/api/exports/{self.id}/download' if self.status == DONE else None,
+            'duration': round(self.finished_at - self.created_at, 3) if self.finished_at else None
+        }
+
+
+class ExportJobQueue:
+    """Thread pool of export builds with artifacts cached by data key"""
+
+    def __init__(self, output_dir: str = DEFAULT_EXPORT_DIR,
+                 max_workers: int = DEFAULT_MAX_WORKERS,
+                 max_jobs: int = DEFAULT_MAX_JOBS,
+                 retention_seconds: float = DEFAULT_RETENTION_SECONDS):
+        """
+        Initialize the queue
+
+        Args:
+            output_dir: Directory artifacts are written to (created if missing)
+            max_workers: Concurrent builds
+            max_jobs: Finished jobs kept before the oldest (and their files) are removed
+            retention_seconds: Seconds after finishing before a job may be removed
+        """
+        self.output_dir = output_dir
+        self.max_jobs = max_jobs
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='export')
+        self._jobs: Dict[str, ExportJob] = {}
+        self._by_key: Dict[Hashable, str] = {}
+        self._lock = threading.Lock()
+        os.makedirs(output_dir, exist_ok=True)
+
+    def submit(self, key: Hashable, filename: str, build: Callable[[str], Any],
+               rekey: bool = False) -> ExportJob:
+        """
+        Start an export, or reuse the job already built or building for key
+
+        Args:
+            key: Identifies the data the artifact is built from, e.g.
+                 ('foreman', date, data_version)
+            filename: Download name of the artifact
+            build: Called as build(path) on a worker thread; writes the artifact to path
+            rekey: build returns the key of the data it actually wrote (which
+                   may be newer than key), and the finished job is filed
+                   under that key instead
+
+        Returns:
+            The ExportJob (check its status)
+        """
+        with self._lock:
+            existing = self._jobs.get(self._by_key.get(key))
+            if existing is not None and (
+                existing.status in (QUEUED, RUNNING)
+                or (existing.status == DONE and os.path.exists(existing.path))
+            ):
+                return existing
+
+            job = ExportJob(key, filename, self.output_dir)
+            self._jobs[job.id] = job
+            self._by_key[key] = job.id
+            self._prune()
+
+        self._executor.submit(self._run, job, build, rekey)
+        return job
+
+    def _run(self, job: ExportJob, build: Callable[[str], Any], rekey: bool = False):
+        """Worker body: build into a temporary file, then move it into place"""
+        job.status = RUNNING
+        started = time.perf_counter()
+        # Keep the extension so writers that check it still work
+        partial_path = os.path.join(self.output_dir, f'{job.id}_partial_{job.filename}')
+        try:
+            built_key = build(partial_path)
+            os.replace(partial_path, job.path)
+            if rekey:
+                self._rekey(job, built_key)
+            job.status = DONE
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(e)
+            print(f"Error building export {job.filename}: {e}")
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+        finally:
+            job.finished_at = time.time()
+            EXPORT_SECONDS.observe(time.perf_counter() - started, status=job.status)
+
+    def _rekey(self, job: ExportJob, key: Hashable):
+        """File a job under the key of the data it was built from"""
+        with self._lock:
+            if self._by_key.get(job.key) == job.id:
+                del self._by_key[job.key]
+            job.key = key
+            self._by_key[key] = job.id
+
+    def _prune(self):
+        """
+        Drop the oldest finished jobs and their files beyond max_jobs (caller holds the lock)
+
+        Jobs finished less than retention_seconds ago are kept even past
+        max_jobs, since their download URLs may still be in use.
+        """
+        now = time.time()
+        # finished_at is set just after the status, so a job can briefly lack it
+        finished = sorted((job for job in self._jobs.values() if job.status in (DONE, FAILED)),
+                          key=lambda job: job.finished_at or now)
+        for job in finished[:max(0, len(finished) - self.max_jobs)]:
+            if now - (job.finished_at or now) < self.retention_seconds:
+                break
+            try:
+                if os.path.exists(job.path):
+                    os.remove(job.path)
+            except OSError as e:
+                # e.g. still open for a download on Windows; kept for the next prune
+                print(f"Error removing export {job.path}: {e}")
+                continue
+            del self._jobs[job.id]
+            if self._by_key.get(job.key) == job.id:
+                del self._by_key[job.key]
+
+    def get(self, job_id: str) -> Optional[ExportJob]:
+        """Look up a job by id"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+
+def export_response(job: ExportJob, message: str):
+    """JSON response for a submitted export: 200 if the artifact is ready, else 202"""
+    body = job.to_dict()
+    body['success'] = job.status != FAILED
+    body['message'] = message if job.status == DONE else f'{message} (building in background)'
+    return jsonify(body), 200 if job.status == DONE else 202
+
+
+def register_export_routes(app, queue: ExportJobQueue):
+    """
+    Add the job status and download routes to a Flask app
+
+        GET /api/exports/<job_id>           job status
+        GET /api/exports/<job_id>/download  the finished artifact
+    """
+
+    @app.route('/api/exports/<job_id>')
+    def export_status(job_id):
+        job = queue.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Export job not found'}), 404
+        return jsonify(job.to_dict())
+
+    @app.route('/api/exports/<job_id>/download')
+    def export_download(job_id):
+        job = queue.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Export job not found'}), 404
+        if job.status != DONE:
+            return jsonify(job.to_dict()), 409
+        return send_file(os.path.abspath(job.path), as_attachment=True, download_name=job.filename)
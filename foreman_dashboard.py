@@ -5,19 +5,73 @@ Provides an easy-to-use web interface for viewing daily labor reports
 Date created: 2025-10-30
 """
 
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, render_template, jsonify, request
+from dashboard_events import EventBroadcaster
+from dashboard_refresher import DashboardRefresher
+from export_jobs import ExportJobQueue, export_response, register_export_routes
+from foreman_scopes import ForemanDirectory
+from http_caching import cached_json_response, content_hash
 from datetime import datetime, timedelta
+from labor_aggregates import SORTABLE_COLUMNS, MaterializedLaborAggregates
 from project_labor_reports import ProjectLaborReportGenerator
+from report_context import date_range
+from report_writers import FORMAT_EXTENSIONS, REPORT_FORMATS, write_report
+from metrics import register_metrics
+from request_timing import register_request_timing
+from response_cache import get_shared_cache
+from rippling_api_client import RipplingAPIClient
+from time_entry_store import TimeEntryStore
 import os
 
 app = Flask(__name__)
 
-# Initialize report generator
+# Server-Timing breakdown on every response; slow requests are logged
+register_request_timing(app)
+register_metrics(app, 'foreman_dashboard')
+
+# Excel exports are built in the background and downloaded by job id
+export_queue = ExportJobQueue()
+register_export_routes(app, export_queue)
+
+# Rows of the employee table sent with the page and per "load more"
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Initialize report generator. When RIPPLING_STORE_PATH is set, closed days
+# are read from the local store (kept current by `time_entry_store.py sync`)
+# and only recent days go to the live API.
 try:
-    generator = ProjectLaborReportGenerator()
+    client = RipplingAPIClient(shared_session=True, cache=get_shared_cache())
+    store_path = os.getenv('RIPPLING_STORE_PATH')
+    if store_path:
+        client = TimeEntryStore(store_path, live_client=client)
+    generator = ProjectLaborReportGenerator(client=client)
+
+    # Per-day totals shared by every open dashboard; polls read these
+    # instead of re-grouping the day's entries. Stale days are served as-is
+    # and refreshed in the background.
+    refresh_seconds = float(os.getenv('DASHBOARD_REFRESH_SECONDS', '60'))
+    aggregates = MaterializedLaborAggregates(
+        generator, max_age=refresh_seconds, stale_while_revalidate=True
+    )
+
+    # Changes found by any refresh are pushed once to every open dashboard
+    broadcaster = EventBroadcaster()
+    aggregates.add_listener(broadcaster.on_aggregate_change)
+
+    # Keep today and the past week warm so requests never wait on Rippling
+    refresher = DashboardRefresher(aggregates, interval=refresh_seconds)
+    if os.getenv('DASHBOARD_BACKGROUND_REFRESH', 'true').lower() != 'false':
+        refresher.start()
 except Exception as e:
     print(f"Warning: Could not initialize report generator: {e}")
     generator = None
+    aggregates = None
+    broadcaster = None
+    refresher = None
+
+# Foreman -> projects; ?foreman=<id> limits any endpoint to those projects
+foremen = ForemanDirectory.from_file()
 
 
 @app.route('/')
@@ -26,32 +80,172 @@ def index():
     return render_template('dashboard.html')
 
 
+def parse_summary_query(default_limit=None) -> dict:
+    """
+    Read daily summary filters, sort and paging from the query string
+
+    Supported: project, employee, status, sort (a column name, prefixed
+    with '-' for descending), offset and limit.
+
+    Raises:
+        ValueError: If a parameter is invalid
+    """
+    args = request.args
+    query = {
+        'project': args.get('project') or None,
+        'employee': args.get('employee') or None,
+        'status': args.get('status') or None,
+        'offset': int(args.get('offset', 0)),
+        'limit': int(args['limit']) if args.get('limit') else default_limit
+    }
+    if query['offset'] < 0 or (query['limit'] is not None and not 0 < query['limit'] <= MAX_PAGE_SIZE):
+        raise ValueError(f'offset must be >= 0 and limit between 1 and {MAX_PAGE_SIZE}')
+
+    sort = args.get('sort')
+    if sort:
+        descending = sort.startswith('-')
+        column = sort.lstrip('-')
+        if column not in SORTABLE_COLUMNS:
+            raise ValueError(f"sort must be one of: {', '.join(SORTABLE_COLUMNS)}")
+        query['sort'] = column
+        query['descending'] = descending
+    return query
+
+
+def parse_scope():
+    """
+    Read the foreman scope from the query string
+
+    Returns:
+        Tuple of the foreman's job codes, or None for every project
+
+    Raises:
+        ValueError: If the foreman is unknown
+    """
+    foreman = request.args.get('foreman')
+    try:
+        return foremen.projects_for(foreman)
+    except KeyError:
+        raise ValueError(f'Unknown foreman: {foreman}')
+
+
+def weekly_snapshot(projects=None):
+    """
+    Get the weekly hours pivot for a scope
+
+    The company-wide pivot comes from the refresher's snapshot; a foreman's
+    is built from just their projects' stored rows.
+
+    Returns:
+        Tuple of (weekly hours DataFrame, age in seconds, content hash)
+    """
+    if projects is None:
+        return refresher.get_weekly_hours()
+
+    start_date, end_date = generator.weekly_range()
+    weekly_hours = aggregates.weekly_hours(start_date, end_date, projects)
+    weekly_hash = content_hash(*(aggregates.get_content_hash(day, projects)
+                                 for day in date_range(start_date, end_date)))
+    return weekly_hours, aggregates.get_age(end_date), weekly_hash
+
+
+def summary_page(date: str, query: dict, projects=None) -> dict:
+    """Run a daily summary query and describe the page for the response"""
+    rows, total = aggregates.query_daily_summary(date, projects, **query)
+    end = query['offset'] + len(rows)
+    return {
+        'data': rows,
+        'total_records': total,
+        'offset': query['offset'],
+        'limit': query['limit'],
+        'next_offset': end if end < total else None
+    }
+
+
+@app.route('/api/dashboard')
+def get_dashboard():
+    """API endpoint with everything the dashboard page shows, from one snapshot"""
+    date = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
+
+    try:
+        if not generator:
+            return jsonify({'error': 'Report generator not initialized. Check API token.'}), 500
+
+        try:
+            query = parse_summary_query(default_limit=PAGE_SIZE)
+            scope = parse_scope()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        day_hash = aggregates.get_content_hash(date, scope)
+        weekly_hours, _, weekly_hash = weekly_snapshot(scope)
+
+        def build():
+            daily = summary_page(date, query, scope)
+            projects = aggregates.project_breakdown(date, scope)
+            total_hours = round(sum(item['Total_Hours'] for item in projects), 2)
+            total_employees = sum(item['Employee_Count'] for item in projects)
+
+            return {
+                'date': date,
+                'content_hash': day_hash,
+                'daily': daily,
+                'projects': {
+                    'data': projects,
+                    'total_hours': total_hours,
+                    'total_employees': total_employees
+                },
+                'stats': {
+                    'total_hours': total_hours,
+                    'active_projects': len(projects),
+                    'total_employees': total_employees,
+                    'total_records': daily['total_records']
+                },
+                'weekly': {
+                    'data': [] if weekly_hours.empty else weekly_hours.reset_index().to_dict(orient='records')
+                }
+            }
+
+        tag = content_hash(day_hash, weekly_hash, request.query_string)
+        # The page re-requests this after pushed changes, so the browser must
+        # revalidate (a 304 when nothing changed) rather than reuse its copy
+        return cached_json_response('dashboard', tag, build, age=aggregates.get_age(date))
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/api/daily-summary')
 def get_daily_summary():
-    """API endpoint to get daily summary data"""
+    """API endpoint to get daily summary data (optionally filtered, sorted and paged)"""
     date = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
 
     try:
         if not generator:
             return jsonify({'error': 'Report generator not initialized. Check API token.'}), 500
 
-        daily_summary = generator.get_daily_project_summary(date)
+        try:
+            query = parse_summary_query()
+            scope = parse_scope()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
-        if daily_summary.empty:
-            return jsonify({
-                'date': date,
-                'data': [],
-                'message': 'No time entries found for this date'
-            })
+        def build():
+            page = summary_page(date, query, scope)
 
-        # Convert DataFrame to list of dictionaries
-        data = daily_summary.to_dict(orient='records')
+            if not page['total_records']:
+                return {
+                    'date': date,
+                    'data': [],
+                    'message': 'No time entries found for this date'
+                }
 
-        return jsonify({
-            'date': date,
-            'data': data,
-            'total_records': len(data)
-        })
+            return {'date': date, **page}
+
+        # Each filter/sort/page combination is its own cached response
+        tag = content_hash(aggregates.get_content_hash(date, scope), request.query_string)
+        # Revalidated on every request, like /api/dashboard
+        return cached_json_response('daily-summary', tag, build, age=aggregates.get_age(date))
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -66,23 +260,30 @@ def get_project_breakdown():
         if not generator:
             return jsonify({'error': 'Report generator not initialized. Check API token.'}), 500
 
-        project_breakdown = generator.get_project_breakdown(date)
+        try:
+            scope = parse_scope()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
-        if project_breakdown.empty:
-            return jsonify({
-                'date': date,
-                'data': [],
-                'message': 'No projects found for this date'
-            })
+        def build():
+            data = aggregates.project_breakdown(date, scope)
 
-        data = project_breakdown.to_dict(orient='records')
+            if not data:
+                return {
+                    'date': date,
+                    'data': [],
+                    'message': 'No projects found for this date'
+                }
 
-        return jsonify({
-            'date': date,
-            'data': data,
-            'total_hours': sum(item['Total_Hours'] for item in data),
-            'total_employees': sum(item['Employee_Count'] for item in data)
-        })
+            return {
+                'date': date,
+                'data': data,
+                'total_hours': sum(item['Total_Hours'] for item in data),
+                'total_employees': sum(item['Employee_Count'] for item in data)
+            }
+
+        return cached_json_response('project-breakdown', aggregates.get_content_hash(date, scope), build,
+                                    max_age=refresh_seconds, age=aggregates.get_age(date))
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -95,42 +296,116 @@ def get_weekly_hours():
         if not generator:
             return jsonify({'error': 'Report generator not initialized. Check API token.'}), 500
 
-        weekly_hours = generator.get_employee_weekly_hours()
+        try:
+            scope = parse_scope()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        weekly_hours, age, weekly_hash = weekly_snapshot(scope)
+
+        def build():
+            if weekly_hours.empty:
+                return {
+                    'data': [],
+                    'message': 'No weekly data found'
+                }
+
+            # Convert to format suitable for JSON
+            data = weekly_hours.reset_index().to_dict(orient='records')
+
+            return {
+                'data': data
+            }
+
+        return cached_json_response('weekly-hours', weekly_hash, build,
+                                    max_age=refresh_seconds, age=age)
 
-        if weekly_hours.empty:
-            return jsonify({
-                'data': [],
-                'message': 'No weekly data found'
-            })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/foremen')
+def get_foremen():
+    """API endpoint listing foremen and their projects, for scoping the dashboard"""
+    return jsonify({'data': foremen.list_foremen()})
 
-        # Convert to format suitable for JSON
-        data = weekly_hours.reset_index().to_dict(orient='records')
 
-        return jsonify({
-            'data': data
-        })
+@app.route('/api/events')
+def stream_events():
+    """Server-sent event stream of data changes for one date"""
+    date = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
+
+    if not generator:
+        return jsonify({'error': 'Report generator not initialized. Check API token.'}), 500
+
+    try:
+        scope = parse_scope()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
+    try:
+        initial = {
+            'date': date,
+            'version': aggregates.get_version(date),
+            'content_hash': aggregates.get_content_hash(date, scope)
+        }
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+    # A foreman's stream only carries changes to their projects
+    stream_scope = None
+    if scope is not None:
+        stream_scope = (scope, lambda change: aggregates.scope_change(change, scope))
+
+    return Response(
+        broadcaster.stream(date, initial, stream_scope),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+def export_key(date: str, report_format: str, scope, day_hashes) -> tuple:
+    """Export job key for a foreman report (data part None while any day is unloaded)"""
+    data_hash = None if None in day_hashes else content_hash(*day_hashes)
+    return ('foreman', date, report_format, scope, data_hash)
+
 
 @app.route('/api/export-excel')
 def export_to_excel():
-    """Generate and download Excel report"""
+    """Start (or reuse) a background report build for a date (?format=xlsx|csv|parquet)"""
     date = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
+    report_format = request.args.get('format', 'xlsx')
 
     try:
         if not generator:
             return jsonify({'error': 'Report generator not initialized. Check API token.'}), 500
-
-        output_path = f"Capitol_Labor_Report_{date}.xlsx"
-        generator.export_foreman_report(output_path, date)
-
-        return jsonify({
-            'success': True,
-            'file': output_path,
-            'message': f'Report generated: {output_path}'
-        })
+        if report_format not in REPORT_FORMATS:
+            return jsonify({'error': f"format must be one of {', '.join(REPORT_FORMATS)}"}), 400
+        try:
+            scope = parse_scope()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # Keyed by the hashes of the week's stored rows, so a repeat request
+        # for unchanged data returns the finished job without building any
+        # sheets. Days not loaded yet are not fetched here: the key is left
+        # open and the build, which loads them, files the job under the
+        # hashes of the snapshot it actually wrote.
+        day_hashes = [aggregates.peek_content_hash(day, scope)
+                      for day in date_range(*generator.weekly_range(date))]
+        key = export_key(date, report_format, scope, day_hashes)
+        foreman = request.args.get('foreman')
+        suffix = (f'_{foreman}' if foreman else '') + ('' if report_format == 'xlsx' else f'_{report_format}')
+        filename = f"Capitol_Labor_Report_{date}{suffix}{FORMAT_EXTENSIONS[report_format]}"
+
+        def build(path):
+            snapshot_hashes, sheets = aggregates.report_snapshot(date, scope)
+            write_report(path, sheets, report_format)
+            return export_key(date, report_format, scope, snapshot_hashes)
+
+        job = export_queue.submit(key, filename, build, rekey=True)
+
+        return export_response(job, f'Report generated: {filename}')
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -301,10 +576,13 @@ def create_html_template():
     <div class="container">
         <div class="header">
             <h1>Capitol Engineering - Daily Labor Dashboard</h1>
-            <p>Real-time project labor monitoring from Rippling</p>
+            <p>Real-time project labor monitoring from Rippling <span id="dataAge"></span></p>
             <div class="controls">
                 <label for="reportDate">Select Date:</label>
                 <input type="date" id="reportDate" value="">
+                <select id="foremanSelect" onchange="loadData()" style="display: none;">
+                    <option value="">All projects</option>
+                </select>
                 <button onclick="loadData()">Load Report</button>
                 <button onclick="exportExcel()">Export to Excel</button>
                 <button onclick="loadData()">Refresh</button>
@@ -329,9 +607,25 @@ def create_html_template():
 
         <div class="card">
             <h2>Employee Time Details</h2>
+            <div class="controls">
+                <input type="text" id="filterEmployee" placeholder="Employee" onchange="reloadRows()">
+                <input type="text" id="filterProject" placeholder="Project" onchange="reloadRows()">
+                <input type="text" id="filterStatus" placeholder="Status" onchange="reloadRows()">
+            </div>
             <div id="employeeDetails">
                 <div class="loading">Loading employee data...</div>
             </div>
+            <div id="loadMore" style="display: none;">
+                <button onclick="loadMoreRows()">Load more</button>
+                <span id="rowCount"></span>
+            </div>
+        </div>
+
+        <div class="card">
+            <h2>Weekly Hours</h2>
+            <div id="weeklyHours">
+                <div class="loading">Loading weekly data...</div>
+            </div>
         </div>
     </div>
 
@@ -339,56 +633,233 @@ def create_html_template():
         // Set today's date on load
         document.getElementById('reportDate').valueAsDate = new Date();
 
+        // Rows of the employee table loaded so far; the server filters,
+        // sorts and pages them
+        const PAGE_SIZE = 100;
+        let loadedRows = [];
+        let nextOffset = null;
+        let totalRows = 0;
+        let sortColumn = '';
+        // Content hash (from the ETag) of the daily summary currently shown
+        let loadedHash = null;
+        let events = null;
+
         function loadData() {
             const date = document.getElementById('reportDate').value;
-            loadProjectBreakdown(date);
-            loadDailySummary(date);
+            loadDashboard(date);
+            connectEvents(date);
+        }
+
+        function currentForeman() {
+            // Empty for the whole company
+            return document.getElementById('foremanSelect').value;
         }
 
-        function loadProjectBreakdown(date) {
-            fetch(`/api/project-breakdown?date=${date}`)
+        function loadForemen() {
+            // The foreman picker only appears when a foreman mapping is configured
+            return fetch('/api/foremen')
                 .then(response => response.json())
+                .then(result => {
+                    const select = document.getElementById('foremanSelect');
+                    (result.data || []).forEach(foreman => {
+                        const option = document.createElement('option');
+                        option.value = foreman.id;
+                        option.textContent = foreman.name;
+                        select.appendChild(option);
+                    });
+                    if (select.options.length > 1) select.style.display = 'inline-block';
+                })
+                .catch(() => {});
+        }
+
+        function showDataAge(age) {
+            // Age header: seconds since the server last pulled this data from Rippling
+            if (age === null) return;
+            const seconds = parseInt(age, 10);
+            document.getElementById('dataAge').textContent = seconds < 60
+                ? '(data updated just now)'
+                : `(data updated ${Math.round(seconds / 60)} min ago)`;
+        }
+
+        function connectEvents(date) {
+            // One stream per tab; the server pushes changes for the selected
+            // date, limited to the selected foreman's projects
+            const foreman = currentForeman();
+            const key = `${date}|${foreman}`;
+            if (!window.EventSource || (events && events.key === key)) return;
+            if (events) events.close();
+
+            const params = new URLSearchParams({date: date});
+            if (foreman) params.set('foreman', foreman);
+            events = new EventSource(`/api/events?${params}`);
+            events.key = key;
+            events.addEventListener('hello', e => {
+                const info = JSON.parse(e.data);
+                if (loadedHash !== null && info.content_hash !== loadedHash) {
+                    // Changed while disconnected
+                    loadDashboard(date);
+                }
+            });
+            events.addEventListener('update', e => applyUpdate(JSON.parse(e.data)));
+            events.addEventListener('resync', () => loadDashboard(date));
+        }
+
+        function applyUpdate(change) {
+            loadedHash = change.content_hash;
+            renderProjects({
+                data: change.projects,
+                total_hours: change.total_hours,
+                total_employees: change.total_employees
+            });
+            if (mergeRows(change)) {
+                renderEmployeeRows();
+            } else {
+                // Rows past the loaded pages are involved; let the server page them
+                reloadRows(Math.max(PAGE_SIZE, loadedRows.length));
+            }
+            showDataAge('0');
+        }
+
+        function activeFilters() {
+            const value = id => document.getElementById(id).value.trim();
+            return {project: value('filterProject'), employee: value('filterEmployee'),
+                    status: value('filterStatus')};
+        }
+
+        function rowMatches(row, filters) {
+            // Same rules as the server: exact project and status, employee
+            // name substring (any case) or exact badge number
+            if (filters.project && row.Project !== filters.project) return false;
+            if (filters.status && row.Status !== filters.status) return false;
+            if (filters.employee) {
+                const name = (row.Employee || '').toLowerCase();
+                if (!name.includes(filters.employee.toLowerCase()) && row.Employee_ID !== filters.employee) {
+                    return false;
+                }
+            }
+            return true;
+        }
+
+        function compareValues(a, b) {
+            // Missing values sort last (first when descending), as on the server
+            if ((a === null) !== (b === null)) return a === null ? 1 : -1;
+            return a < b ? -1 : a > b ? 1 : 0;
+        }
+
+        function compareRows(a, b) {
+            const column = sortColumn.replace(/^-/, '');
+            if (column) {
+                const order = compareValues(a[column], b[column]);
+                if (order !== 0) return sortColumn.startsWith('-') ? -order : order;
+            }
+            return compareValues(a.Project, b.Project) || compareValues(a.Employee, b.Employee);
+        }
+
+        function mergeRows(change) {
+            // Apply pushed rows to the loaded ones. Returns false when that
+            // cannot give the same rows the server would page back.
+            const filters = activeFilters();
+            const removed = new Set(change.removed || []);
+            const upserted = new Map((change.upserted || []).map(row => [row.Entry_ID, row]));
+            const complete = nextOffset === null;
+
+            if (!complete) {
+                // Only in-place updates that stay inside the loaded page are
+                // unambiguous: anything else may move rows across the page edge
+                const last = loadedRows[loadedRows.length - 1];
+                const loaded = new Set(loadedRows.map(row => row.Entry_ID));
+                if (removed.size || !last) return false;
+                for (const row of upserted.values()) {
+                    if (!loaded.has(row.Entry_ID) || !rowMatches(row, filters)) return false;
+                    const order = compareRows(row, last);
+                    if (order > 0 || (order === 0 && row.Entry_ID !== last.Entry_ID)) return false;
+                }
+            }
+
+            const rows = loadedRows
+                .filter(row => !removed.has(row.Entry_ID) && !upserted.has(row.Entry_ID));
+            upserted.forEach(row => {
+                if (rowMatches(row, filters)) rows.push(row);
+            });
+            rows.sort(compareRows);
+            loadedRows = rows;
+            if (complete) totalRows = rows.length;
+            return true;
+        }
+
+        function summaryParams(offset, limit) {
+            const params = new URLSearchParams({
+                date: document.getElementById('reportDate').value,
+                offset: offset,
+                limit: limit
+            });
+            [['employee', 'filterEmployee'], ['project', 'filterProject'], ['status', 'filterStatus']]
+                .forEach(([name, id]) => {
+                    const value = document.getElementById(id).value.trim();
+                    if (value) params.set(name, value);
+                });
+            if (sortColumn) params.set('sort', sortColumn);
+            if (currentForeman()) params.set('foreman', currentForeman());
+            return params;
+        }
+
+        function showRows(page, append) {
+            loadedRows = append ? loadedRows.concat(page.data) : page.data;
+            nextOffset = page.next_offset ?? null;
+            totalRows = page.total_records || 0;
+            renderEmployeeRows();
+        }
+
+        function reloadRows(limit = PAGE_SIZE) {
+            fetch(`/api/daily-summary?${summaryParams(0, limit)}`)
+                .then(response => response.json())
+                .then(page => {
+                    if (page.error) {
+                        document.getElementById('employeeDetails').innerHTML =
+                            `<div class="error">Error: ${page.error}</div>`;
+                        return;
+                    }
+                    showRows(page, false);
+                });
+        }
+
+        function loadMoreRows() {
+            if (nextOffset === null) return;
+            fetch(`/api/daily-summary?${summaryParams(nextOffset, PAGE_SIZE)}`)
+                .then(response => response.json())
+                .then(page => {
+                    if (!page.error) showRows(page, true);
+                });
+        }
+
+        function setSort(column) {
+            // Click once for ascending, again for descending
+            sortColumn = sortColumn === column ? `-${column}` : column;
+            reloadRows();
+        }
+
+        function loadDashboard(date) {
+            // One request returns rows, project totals, stats and the weekly pivot
+            fetch(`/api/dashboard?${summaryParams(0, PAGE_SIZE)}`)
+                .then(response => {
+                    showDataAge(response.headers.get('Age'));
+                    return response.json();
+                })
                 .then(data => {
                     if (data.error) {
-                        document.getElementById('projectSummary').innerHTML =
-                            `<div class="error">Error: ${data.error}</div>`;
+                        ['projectSummary', 'employeeDetails', 'weeklyHours'].forEach(id =>
+                            document.getElementById(id).innerHTML = `<div class="error">Error: ${data.error}</div>`);
                         document.getElementById('quickStats').innerHTML =
                             `<div class="error">Error loading stats</div>`;
                         return;
                     }
 
-                    // Update project summary
-                    let html = '';
-                    if (data.data.length === 0) {
-                        html = '<p>No projects found for this date.</p>';
-                    } else {
-                        html = '<table><thead><tr><th>Project</th><th>Hours</th><th>Employees</th></tr></thead><tbody>';
-                        data.data.forEach(project => {
-                            html += `<tr>
-                                <td><span class="project-badge">${project.Project}</span></td>
-                                <td>${project.Total_Hours.toFixed(2)} hrs</td>
-                                <td>${project.Employee_Count}</td>
-                            </tr>`;
-                        });
-                        html += '</tbody></table>';
-                    }
-                    document.getElementById('projectSummary').innerHTML = html;
-
-                    // Update quick stats
-                    document.getElementById('quickStats').innerHTML = `
-                        <div class="stat-box">
-                            <span class="label">Total Hours Today</span>
-                            <span class="value">${data.total_hours?.toFixed(2) || 0} hrs</span>
-                        </div>
-                        <div class="stat-box">
-                            <span class="label">Active Projects</span>
-                            <span class="value">${data.data.length}</span>
-                        </div>
-                        <div class="stat-box">
-                            <span class="label">Total Employees</span>
-                            <span class="value">${data.total_employees || 0}</span>
-                        </div>
-                    `;
+                    loadedHash = data.content_hash;
+                    renderProjects(data.projects);
+
+                    showRows(data.daily, false);
+
+                    renderWeekly(data.weekly.data);
                 })
                 .catch(error => {
                     document.getElementById('projectSummary').innerHTML =
@@ -396,72 +867,132 @@ def create_html_template():
                 });
         }
 
-        function loadDailySummary(date) {
-            fetch(`/api/daily-summary?date=${date}`)
-                .then(response => response.json())
-                .then(data => {
-                    if (data.error) {
-                        document.getElementById('employeeDetails').innerHTML =
-                            `<div class="error">Error: ${data.error}</div>`;
-                        return;
-                    }
+        function renderProjects(data) {
+            // Update project summary
+            let html = '';
+            if (data.data.length === 0) {
+                html = '<p>No projects found for this date.</p>';
+            } else {
+                html = '<table><thead><tr><th>Project</th><th>Hours</th><th>Employees</th></tr></thead><tbody>';
+                data.data.forEach(project => {
+                    html += `<tr>
+                        <td><span class="project-badge">${project.Project}</span></td>
+                        <td>${project.Total_Hours.toFixed(2)} hrs</td>
+                        <td>${project.Employee_Count}</td>
+                    </tr>`;
+                });
+                html += '</tbody></table>';
+            }
+            document.getElementById('projectSummary').innerHTML = html;
+
+            // Update quick stats
+            document.getElementById('quickStats').innerHTML = `
+                <div class="stat-box">
+                    <span class="label">Total Hours Today</span>
+                    <span class="value">${data.total_hours?.toFixed(2) || 0} hrs</span>
+                </div>
+                <div class="stat-box">
+                    <span class="label">Active Projects</span>
+                    <span class="value">${data.data.length}</span>
+                </div>
+                <div class="stat-box">
+                    <span class="label">Total Employees</span>
+                    <span class="value">${data.total_employees || 0}</span>
+                </div>
+            `;
+        }
 
-                    let html = '';
-                    if (data.data.length === 0) {
-                        html = '<p>No employee time entries found for this date.</p>';
-                    } else {
-                        html = `<table>
-                            <thead>
-                                <tr>
-                                    <th>Employee</th>
-                                    <th>Project</th>
-                                    <th>Hours</th>
-                                    <th>Clock In</th>
-                                    <th>Clock Out</th>
-                                    <th>Status</th>
-                                </tr>
-                            </thead>
-                            <tbody>`;
-
-                        data.data.forEach(entry => {
-                            html += `<tr>
-                                <td>${entry.Employee}</td>
-                                <td><span class="project-badge">${entry.Project}</span></td>
-                                <td>${entry.Hours.toFixed(2)} hrs</td>
-                                <td>${entry.Clock_In || 'N/A'}</td>
-                                <td>${entry.Clock_Out || 'N/A'}</td>
-                                <td>${entry.Status}</td>
-                            </tr>`;
-                        });
-
-                        html += '</tbody></table>';
-                    }
-                    document.getElementById('employeeDetails').innerHTML = html;
-                })
-                .catch(error => {
-                    document.getElementById('employeeDetails').innerHTML =
-                        `<div class="error">Error loading data: ${error}</div>`;
+        function renderEmployeeRows() {
+            const rows = loadedRows;
+            const columns = [['Employee', 'Employee'], ['Project', 'Project'], ['Hours', 'Hours'],
+                             ['Clock_In', 'Clock In'], ['Clock_Out', 'Clock Out'], ['Status', 'Status']];
+
+            let html = '';
+            if (rows.length === 0) {
+                html = '<p>No employee time entries found for this date.</p>';
+            } else {
+                html = '<table><thead><tr>';
+                columns.forEach(([column, label]) => {
+                    const arrow = sortColumn === column ? ' &#9650;' : sortColumn === `-${column}` ? ' &#9660;' : '';
+                    html += `<th style="cursor: pointer;" onclick="setSort('${column}')">${label}${arrow}</th>`;
+                });
+                html += '</tr></thead><tbody>';
+
+                rows.forEach(entry => {
+                    html += `<tr>
+                        <td>${entry.Employee}</td>
+                        <td><span class="project-badge">${entry.Project}</span></td>
+                        <td>${entry.Hours.toFixed(2)} hrs</td>
+                        <td>${entry.Clock_In || 'N/A'}</td>
+                        <td>${entry.Clock_Out || 'N/A'}</td>
+                        <td>${entry.Status}</td>
+                    </tr>`;
                 });
+
+                html += '</tbody></table>';
+            }
+            document.getElementById('employeeDetails').innerHTML = html;
+
+            document.getElementById('loadMore').style.display = rows.length ? 'block' : 'none';
+            document.getElementById('loadMore').querySelector('button').style.display =
+                nextOffset === null ? 'none' : 'inline-block';
+            document.getElementById('rowCount').textContent = `Showing ${rows.length} of ${totalRows}`;
+        }
+
+        function renderWeekly(rows) {
+            if (rows.length === 0) {
+                document.getElementById('weeklyHours').innerHTML = '<p>No weekly data found.</p>';
+                return;
+            }
+
+            const days = Object.keys(rows[0]).filter(key => key !== 'Employee' && key !== 'Project').sort();
+            let html = '<table><thead><tr><th>Employee</th><th>Project</th>';
+            days.forEach(day => html += `<th>${day.slice(5)}</th>`);
+            html += '</tr></thead><tbody>';
+            rows.forEach(row => {
+                html += `<tr><td>${row.Employee}</td><td><span class="project-badge">${row.Project}</span></td>`;
+                days.forEach(day => html += `<td>${row[day] ? row[day].toFixed(2) : '-'}</td>`);
+                html += '</tr>';
+            });
+            html += '</tbody></table>';
+            document.getElementById('weeklyHours').innerHTML = html;
         }
 
         function exportExcel() {
-            const date = document.getElementById('reportDate').value;
-            fetch(`/api/export-excel?date=${date}`)
+            const params = new URLSearchParams({date: document.getElementById('reportDate').value});
+            if (currentForeman()) params.set('foreman', currentForeman());
+            fetch(`/api/export-excel?${params}`)
                 .then(response => response.json())
-                .then(data => {
-                    if (data.success) {
-                        alert(data.message);
+                .then(job => {
+                    if (job.success) {
+                        waitForExport(job);
                     } else {
-                        alert('Error: ' + (data.error || 'Unknown error'));
+                        alert('Error: ' + (job.error || 'Unknown error'));
                     }
                 });
         }
 
+        function waitForExport(job) {
+            // The workbook is built in the background; poll until it can be downloaded
+            if (job.status === 'done') {
+                window.location = job.download_url;
+            } else if (job.status === 'failed') {
+                alert('Error: ' + (job.error || 'Export failed'));
+            } else {
+                setTimeout(() => fetch(job.status_url)
+                    .then(response => response.json())
+                    .then(waitForExport), 1000);
+            }
+        }
+
         // Load data on page load
-        loadData();
+        loadForemen().then(loadData);
 
-        // Auto-refresh every 5 minutes
-        setInterval(loadData, 300000);
+        // Changes are pushed over the event stream; poll every 5 minutes
+        // only in browsers without EventSource
+        if (!window.EventSource) {
+            setInterval(loadData, 300000);
+        }
     </script>
 </body>
 </html>"""
@@ -0,0 +1,90 @@
+"""
+Foreman Project Scopes for Capitol Engineering
+Maps each foreman to the projects (Rippling job codes) they run
+
+Dashboards and reports take a foreman id and read only that foreman's
+projects, so a request does work proportional to one crew instead of the
+whole company. The mapping is a JSON file (FOREMAN_PROJECTS_PATH,
+default foreman_projects.json):
+
+    {
+        "jsmith": {"name": "John Smith", "projects": ["25-1998", "25-2001"]},
+        "mlopez": ["25-2117"]
+    }
+
+Scoping narrows what is shown; it is not access control.
+
+Date created: 2025-10-31
+"""
+
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_FOREMEN_PATH = os.getenv('FOREMAN_PROJECTS_PATH', 'foreman_projects.json')
+
+
+class ForemanDirectory:
+    """Foreman id -> name and project list"""
+
+    def __init__(self, foremen: Optional[Dict[str, object]] = None):
+        """
+        Initialize the directory
+
+        Args:
+            foremen: Foreman id -> list of job codes, or a dict with
+                     'name' and 'projects'
+        """
+        self._foremen: Dict[str, Dict] = {}
+        for foreman_id, value in (foremen or {}).items():
+            if isinstance(value, dict):
+                name, projects = value.get('name', foreman_id), value.get('projects', [])
+            else:
+                name, projects = foreman_id, value
+            self._foremen[str(foreman_id)] = {
+                'id': str(foreman_id),
+                'name': name,
+                'projects': tuple(sorted(set(projects)))
+            }
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_FOREMEN_PATH) -> 'ForemanDirectory':
+        """
+        Load the directory from a JSON file
+
+        A missing file gives an empty directory (no foreman scoping); an
+        invalid one is reported and also gives an empty directory.
+        """
+        if not os.path.exists(path):
+            return cls()
+        try:
+            with open(path) as f:
+                return cls(json.load(f))
+        except (OSError, ValueError, AttributeError, TypeError) as e:
+            print(f"Error loading foreman projects from {path}: {e}")
+            return cls()
+
+    def __len__(self) -> int:
+        return len(self._foremen)
+
+    def projects_for(self, foreman_id: Optional[str]) -> Optional[Tuple[str, ...]]:
+        """
+        Get the job codes a foreman's views are limited to
+
+        Args:
+            foreman_id: Foreman id, or None/'' for no scoping
+
+        Returns:
+            Sorted tuple of job codes, or None for every project
+
+        Raises:
+            KeyError: If the foreman is not in the directory
+        """
+        if not foreman_id:
+            return None
+        return self._foremen[foreman_id]['projects']
+
+    def list_foremen(self) -> List[Dict]:
+        """List foremen (id, name, projects) sorted by name"""
+        return [dict(foreman, projects=list(foreman['projects']))
+                for foreman in sorted(self._foremen.values(), key=lambda foreman: foreman['name'])]
@@ -0,0 +1,22 @@
+"""
+Gunicorn configuration for Capitol Engineering
+Loaded automatically by gunicorn from the working directory
+
+Points the workers at a shared metrics directory so /metrics reports
+totals across all of them (see metrics.py), and empties it at startup so
+counts from an earlier run are not carried over.
+
+Date created: 2025-10-31
+"""
+
+import os
+import tempfile
+
+
+def on_starting(server):
+    """Runs once in the master process before any worker is forked"""
+    directory = os.environ.setdefault(
+        'METRICS_DIR', os.path.join(tempfile.gettempdir(), f'capitol-metrics-{os.getpid()}')
+    )
+    from metrics import clear_metrics_dir
+    clear_metrics_dir(directory)
@@ -0,0 +1,121 @@
+"""
+HTTP caching helpers for the dashboard JSON endpoints
+ETag / If-None-Match, Cache-Control and compressed response bodies
+
+Dashboards poll on a timer and usually get back exactly what they
+already have. Each endpoint tags its snapshot with a content hash: a
+matching If-None-Match gets an empty 304, and otherwise the serialized,
+compressed body is reused for as long as the tag is unchanged.
+
+Brotli is used when the optional `brotli` package is installed and the
+client accepts it; gzip otherwise.
+
+Date created: 2025-10-31
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from flask import current_app, request
+
+from metrics import CACHE_REQUESTS
+from request_timing import stage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed
+MIN_COMPRESS_BYTES = 512
+
+# Serialized bodies kept, keyed by (ETag, encoding)
+MAX_CACHED_BODIES = 64
+
+# (ETag, requested encoding) -> (body, encoding actually used)
+_body_cache: 'OrderedDict[Tuple[str, str], Tuple[bytes, str]]' = OrderedDict()
+_body_cache_lock = threading.Lock()
+
+
+def content_hash(*parts) -> str:
+    """Hash the given strings or bytes into a short hex digest"""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+        digest.update(b'\0')
+    return digest.hexdigest()[:20]
+
+
+def choose_encoding() -> str:
+    """Pick the response encoding from the request's Accept-Encoding header"""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return 'identity'
+
+
+def _encode(body: bytes, encoding: str) -> bytes:
+    """Compress a body with the given content encoding"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=6)
+    return body
+
+
+def cached_json_response(name: str, tag: str, build: Callable[[], Dict],
+                         max_age: int = 0, age: Optional[float] = None):
+    """
+    Build a conditional, compressed JSON response for a snapshot
+
+    Args:
+        name: Endpoint name, combined with tag into the ETag
+        tag: Content hash of the snapshot the payload is built from
+        build: Returns the payload dict; only called when the body is not cached
+        max_age: Seconds browsers may reuse the response without asking again;
+            0 sends no-cache, so every reuse is revalidated with the ETag
+        age: Seconds since the snapshot was fetched, sent as the Age header
+
+    Returns:
+        Flask response: 304 if the client's copy is current, else 200 with
+        the (possibly compressed) JSON body
+    """
+    etag = f'{name}-{tag}'
+    headers = {
+        'ETag': f'"{etag}"',
+        'Cache-Control': f'private, max-age={int(max_age)}' if max_age > 0 else 'private, no-cache',
+        'Vary': 'Accept-Encoding'
+    }
+    if age is not None:
+        headers['Age'] = str(max(0, int(age)))
+
+    if etag in request.if_none_match:
+        return current_app.response_class(status=304, headers=headers)
+
+    key = (etag, choose_encoding())
+    with _body_cache_lock:
+        cached = _body_cache.get(key)
+        if cached is not None:
+            _body_cache.move_to_end(key)
+    CACHE_REQUESTS.inc(cache='http_body', result='miss' if cached is None else 'hit')
+
+    if cached is None:
+        payload = build()
+        with stage('serialize'):
+            raw = current_app.json.dumps(payload).encode()
+            encoding = key[1] if len(raw) >= MIN_COMPRESS_BYTES else 'identity'
+            cached = (_encode(raw, encoding), encoding)
+        with _body_cache_lock:
+            _body_cache[key] = cached
+            while len(_body_cache) > MAX_CACHED_BODIES:
+                _body_cache.popitem(last=False)
+
+    body, encoding = cached
+    if encoding != 'identity':
+        headers['Content-Encoding'] = encoding
+    return current_app.response_class(body, mimetype='application/json', headers=headers)
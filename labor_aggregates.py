@@ -0,0 +1,820 @@
+"""
+Streaming labor aggregates for Capitol Engineering reports
+Per-project and per-employee hour totals maintained incrementally
+
+Long date ranges do not need every time entry in memory at once. A
+LaborTotals object consumes TimeEntryBatch objects (or a raw entry
+stream) and keeps only running totals, so a multi-month export holds
+one batch plus a few numbers per project and employee.
+
+MaterializedLaborAggregates keeps (date, project) and (date, employee)
+totals for the dashboard. A refresh applies only new, changed and
+deleted entries as deltas, so dashboard polls read O(projects) totals
+instead of re-grouping every entry. Listeners are told about each change
+(the changed rows and the new project totals) so it can be pushed to
+open dashboards.
+
+Date created: 2025-10-31
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from metrics import ROWS_PROCESSED
+from report_context import date_range, entry_work_date, project_scope
+from request_timing import stage
+from time_entry_batch import DEFAULT_BATCH_SIZE, TimeEntryBatch, iter_batches
+from time_entry_store import entry_id
+
+# Seconds a day's aggregates are served before the next read refreshes them
+DEFAULT_MAX_AGE = 60
+
+# Daily summary columns that can be sorted on
+SORTABLE_COLUMNS = ['Employee', 'Employee_ID', 'Project', 'Job_Dimension',
+                    'Hours', 'Clock_In', 'Clock_Out', 'Status']
+
+
+def _sum_by_code(batch: TimeEntryBatch, name: str):
+    """Sum hours and count rows per category of a categorical column"""
+    values = batch[name]
+    codes = values.codes
+    valid = codes >= 0
+    size = len(values.categories)
+    hours = np.bincount(codes[valid], weights=batch['hours'][valid], minlength=size)
+    counts = np.bincount(codes[valid], minlength=size)
+    return values.categories, hours, counts
+
+
+class LaborTotals:
+    """Running hour totals per project and per employee"""
+
+    def __init__(self):
+        self.project_hours: Dict[str, float] = defaultdict(float)
+        self.project_entries: Dict[str, int] = defaultdict(int)
+        self.project_employees: Dict[str, set] = defaultdict(set)
+        self.employee_hours: Dict[str, float] = defaultdict(float)
+        self.employee_entries: Dict[str, int] = defaultdict(int)
+        self.entry_count = 0
+        self.total_hours = 0.0
+        self._rejected = []
+
+    def add_batch(self, batch: TimeEntryBatch):
+        """
+        Add a batch of time entries to the totals
+
+        Args:
+            batch: TimeEntryBatch with hours already computed
+        """
+        if not batch.rejected_rows.empty:
+            self._rejected.append(batch.rejected_rows)
+        if not len(batch):
+            return
+
+        self.entry_count += len(batch)
+        self.total_hours += float(batch['hours'].sum())
+
+        for name, hours_by, entries_by in (
+            ('job_code', self.project_hours, self.project_entries),
+            ('employee_id', self.employee_hours, self.employee_entries),
+        ):
+            categories, hours, counts = _sum_by_code(batch, name)
+            for value, value_hours, value_count in zip(categories, hours, counts):
+                if value_count:
+                    hours_by[value] += float(value_hours)
+                    entries_by[value] += int(value_count)
+
+        # Distinct (project, employee) pairs, found on codes rather than strings
+        projects = batch['job_code']
+        employees = batch['employee_id']
+        valid = (projects.codes >= 0) & (employees.codes >= 0)
+        pairs = np.unique(np.stack([projects.codes[valid], employees.codes[valid]]), axis=1)
+        for project_code, employee_code in pairs.T:
+            self.project_employees[projects.categories[project_code]].add(
+                employees.categories[employee_code]
+            )
+
+    def add_entries(self, time_entries: Iterable[Dict], batch_size: int = DEFAULT_BATCH_SIZE,
+                    default_date: Optional[str] = None) -> 'LaborTotals':
+        """
+        Add a stream of raw time entries, batch_size rows at a time
+
+        Args:
+            time_entries: Iterable of time entry dictionaries (e.g. iter_time_entries())
+            batch_size: Rows converted per batch
+            default_date: Work date for entries with neither 'date' nor 'start_time'
+
+        Returns:
+            self, so calls can be chained
+        """
+        for batch in iter_batches(time_entries, batch_size, default_date):
+            self.add_batch(batch)
+        return self
+
+    @property
+    def rejected_rows(self) -> pd.DataFrame:
+        """Entries whose hours could not be computed"""
+        if not self._rejected:
+            return pd.DataFrame()
+        return pd.concat(self._rejected, ignore_index=True)
+
+    def project_frame(self) -> pd.DataFrame:
+        """
+        Get per-project totals
+
+        Returns:
+            DataFrame with columns: Project, Total_Hours, Entry_Count,
+            Employee_Count (distinct employees), sorted by hours descending
+        """
+        if not self.project_hours:
+            return pd.DataFrame()
+
+        projects = list(self.project_hours)
+        df = pd.DataFrame({
+            'Project': projects,
+            'Total_Hours': [round(self.project_hours[p], 2) for p in projects],
+            'Entry_Count': [self.project_entries[p] for p in projects],
+            'Employee_Count': [len(self.project_employees[p]) for p in projects]
+        })
+        return df.sort_values('Total_Hours', ascending=False).reset_index(drop=True)
+
+    def employee_frame(self, employee_map: Optional[Dict[str, Dict]] = None) -> pd.DataFrame:
+        """
+        Get per-employee totals
+
+        Args:
+            employee_map: Optional employees keyed by Rippling user ID, used
+                          for names and badge numbers
+
+        Returns:
+            DataFrame with columns: Employee, Employee_ID, User_ID,
+            Total_Hours, Entry_Count, sorted by hours descending
+        """
+        if not self.employee_hours:
+            return pd.DataFrame()
+
+        employee_map = employee_map or {}
+        user_ids = list(self.employee_hours)
+        employees = [employee_map.get(user_id, {}) for user_id in user_ids]
+        df = pd.DataFrame({
+            'Employee': [f"{emp.get('first_name', '')} {emp.get('last_name', '')}" for emp in employees],
+            'Employee_ID': [emp.get('employee_id', 'N/A') for emp in employees],
+            'User_ID': user_ids,
+            'Total_Hours': [round(self.employee_hours[u], 2) for u in user_ids],
+            'Entry_Count': [self.employee_entries[u] for u in user_ids]
+        })
+        return df.sort_values('Total_Hours', ascending=False).reset_index(drop=True)
+
+
+class SummaryIndex:
+    """Filter and sort indexes over one version of a day's summary rows"""
+
+    def __init__(self, rows: List[Dict]):
+        """
+        Index summary rows
+
+        Args:
+            rows: Summary rows in default (Project, Employee) order
+        """
+        self.rows = rows
+        self.by_project: Dict[str, List[int]] = defaultdict(list)
+        self.by_status: Dict[str, List[int]] = defaultdict(list)
+        self.by_employee: Dict[str, List[int]] = defaultdict(list)
+        self.by_badge: Dict[str, List[int]] = defaultdict(list)
+        for position, row in enumerate(rows):
+            self.by_project[row['Project']].append(position)
+            self.by_status[row['Status']].append(position)
+            self.by_employee[row['Employee']].append(position)
+            self.by_badge[row['Employee_ID']].append(position)
+        self._orders: Dict[Tuple[str, bool], List[int]] = {}
+
+    def order(self, column: str, descending: bool = False) -> List[int]:
+        """Get row positions sorted by a column (ties keep default order), built once per column"""
+        key = (column, descending)
+        if key not in self._orders:
+            rows = self.rows
+            self._orders[key] = sorted(
+                range(len(rows)),
+                key=lambda i: (rows[i][column] is None, rows[i][column]),
+                reverse=descending
+            )
+        return self._orders[key]
+
+    def query(self, project: Optional[str] = None, employee: Optional[str] = None,
+              status: Optional[str] = None, sort: Optional[str] = None,
+              descending: bool = False, offset: int = 0,
+              limit: Optional[int] = None) -> Tuple[List[Dict], int]:
+        """
+        Filter, sort and page the rows
+
+        Args:
+            project: Exact project code
+            employee: Case-insensitive part of the employee name, or an exact badge number
+            status: Exact status
+            sort: Column from SORTABLE_COLUMNS (default order if None)
+            descending: Sort descending
+            offset: Rows to skip
+            limit: Maximum rows to return (all if None)
+
+        Returns:
+            Tuple of (page of rows, number of rows matching the filters)
+        """
+        matches = None
+        if project is not None:
+            matches = set(self.by_project.get(project, ()))
+        if status is not None:
+            found = set(self.by_status.get(status, ()))
+            matches = found if matches is None else matches & found
+        if employee is not None:
+            needle = employee.lower()
+            # Match against each distinct name once, not every row
+            found = set()
+            for name, positions in self.by_employee.items():
+                if needle in (name or '').lower():
+                    found.update(positions)
+            found.update(self.by_badge.get(employee, ()))
+            matches = found if matches is None else matches & found
+
+        if sort is not None:
+            order = self.order(sort, descending)
+            positions = order if matches is None else [i for i in order if i in matches]
+        else:
+            positions = range(len(self.rows)) if matches is None else sorted(matches)
+
+        end = offset + limit if limit is not None else None
+        return [self.rows[i] for i in positions[offset:end]], len(positions)
+
+
+def _fingerprint(entry: Dict, employee_map: Dict[str, Dict]) -> str:
+    """
+    Fingerprint a time entry together with the roster fields its row uses
+
+    The employee's name and badge ID are included so a stored row is
+    rebuilt when the roster changes (e.g. a new hire missing from an
+    earlier, cached /users response), not only when the entry is edited.
+    """
+    user_id = entry.get('employee_id') or entry.get('user_id')
+    employee = employee_map.get(user_id, {})
+    roster = [employee.get('first_name'), employee.get('last_name'), employee.get('employee_id')]
+    return json.dumps([entry, roster], sort_keys=True, default=str)
+
+
+class _DayAggregates:
+    """Materialized state for one work date"""
+
+    def __init__(self):
+        self.fingerprints: Dict[str, str] = {}
+        self.rows: Dict[str, Dict] = {}
+        self.project_totals: Dict[str, List] = {}
+        self.employee_totals: Dict[str, List] = {}
+        self.keys_by_project: Dict[str, set] = {}
+        # Entries whose hours could not be computed (see compute_hours), by key
+        self.rejected: Dict[str, Dict] = {}
+        self.refreshed_at = 0.0
+        self.version = 0
+        # Derived once per version for each project scope (None = every project)
+        self.summaries: Dict[Optional[Tuple[str, ...]], List[Dict]] = {}
+        self.content_hashes: Dict[Optional[Tuple[str, ...]], str] = {}
+        self.summary_indexes: Dict[Optional[Tuple[str, ...]], SummaryIndex] = {}
+
+    def _add(self, totals: Dict[str, List], key: str, hours: float, sign: int):
+        """Apply one entry's contribution (sign +1) or retract it (sign -1)"""
+        total = totals.setdefault(key, [0.0, 0])
+        total[0] += sign * hours
+        total[1] += sign
+        if total[1] <= 0:
+            del totals[key]
+
+    def invalidate(self):
+        """Drop the views derived from the previous version"""
+        self.summaries.clear()
+        self.content_hashes.clear()
+        self.summary_indexes.clear()
+
+    def scope_keys(self, scope: Optional[Tuple[str, ...]]) -> Iterable[str]:
+        """Get the entry keys of the projects in scope (all entries if scope is None)"""
+        if scope is None:
+            return self.rows.keys()
+        return [key for project in scope for key in self.keys_by_project.get(project, ())]
+
+    def retract(self, entry_key: str):
+        """Remove an entry and its contribution to the totals"""
+        row = self.rows.pop(entry_key)
+        self.fingerprints.pop(entry_key, None)
+        self.rejected.pop(entry_key, None)
+        keys = self.keys_by_project[row['Project']]
+        keys.discard(entry_key)
+        if not keys:
+            del self.keys_by_project[row['Project']]
+        self._add(self.project_totals, row['Project'], row['Hours'], -1)
+        self._add(self.employee_totals, row['User_ID'], row['Hours'], -1)
+
+    def apply(self, entry_key: str, fingerprint: str, row: Dict):
+        """Add (or replace) an entry and its contribution to the totals"""
+        if entry_key in self.rows:
+            self.retract(entry_key)
+        self.rows[entry_key] = row
+        self.fingerprints[entry_key] = fingerprint
+        self.keys_by_project.setdefault(row['Project'], set()).add(entry_key)
+        self._add(self.project_totals, row['Project'], row['Hours'], 1)
+        self._add(self.employee_totals, row['User_ID'], row['Hours'], 1)
+
+
+class MaterializedLaborAggregates:
+    """Per-day project and employee totals kept current by delta updates"""
+
+    def __init__(self, generator, max_age: float = DEFAULT_MAX_AGE,
+                 stale_while_revalidate: bool = False):
+        """
+        Initialize the aggregates
+
+        Args:
+            generator: ProjectLaborReportGenerator whose client supplies the
+                       data and whose row format is reused
+            max_age: Seconds a day is served before a read refreshes it
+            stale_while_revalidate: If True, a read of a stale day returns the
+                                    current totals at once and refreshes the
+                                    day in a background thread
+        """
+        self.generator = generator
+        self.max_age = max_age
+        self.stale_while_revalidate = stale_while_revalidate
+        self._days: Dict[str, _DayAggregates] = {}
+        # Date -> Future of the refresh running for it (one at a time per date)
+        self._refreshing: Dict[str, Future] = {}
+        self._listeners: List[Callable[[str, Dict], None]] = []
+        self._lock = threading.RLock()
+
+    def add_listener(self, callback: Callable[[str, Dict], None]):
+        """
+        Register a callback for data changes
+
+        Called after every refresh that changed a day, outside the lock,
+        as callback(date, change). change holds the date, the new version
+        and content hash, 'upserted' summary rows, 'removed' entry ids, the day's 'projects'
+        totals, 'total_hours' / 'total_employees' and the 'changed_projects'
+        (see scope_change()).
+        """
+        self._listeners.append(callback)
+
+    def refresh(self, date: str) -> Dict:
+        """
+        Re-read a day's time entries and apply the differences
+
+        Entries are compared by a fingerprint of their JSON and the roster
+        fields their row uses; only new and changed entries are converted,
+        and deleted entries are retracted.
+        Entries whose work date is another day are skipped, as in
+        ReportContext, so the totals match get_daily_project_summary().
+
+        Only one refresh per date runs at a time: a call made while one is
+        running (from the refresher, a revalidation or a request) waits
+        for it and gets its result, so an older fetch can never be applied
+        after a newer one.
+
+        Args:
+            date: Date in YYYY-MM-DD format
+
+        Returns:
+            Dictionary of added, updated, removed and unchanged counts
+        """
+        future, started = self._begin_refresh(date)
+        if started:
+            self._run_refresh(date, future)
+        return future.result()
+
+    def _begin_refresh(self, date: str) -> Tuple[Future, bool]:
+        """Get the running refresh of a date, or register a new one (True if new)"""
+        with self._lock:
+            future = self._refreshing.get(date)
+            if future is not None:
+                return future, False
+            future = self._refreshing[date] = Future()
+            return future, True
+
+    def _run_refresh(self, date: str, future: Future):
+        """Run a registered refresh and publish its result to everyone waiting"""
+        try:
+            stats, error = self._apply_refresh(date), None
+        except Exception as e:
+            stats, error = None, e
+        # Unregister first so a later call starts a new fetch rather than
+        # reusing this finished one
+        with self._lock:
+            del self._refreshing[date]
+        if error is None:
+            future.set_result(stats)
+        else:
+            future.set_exception(error)
+
+    def _apply_refresh(self, date: str) -> Dict:
+        """Fetch a day and apply the differences (see refresh())"""
+        client = self.generator.client
+        with stage('fetch'):
+            entries = client.get_time_entries(date, date)
+            employee_map = {emp['id']: emp for emp in client.get_employees()}
+
+        incoming: Dict[str, Tuple[str, Dict]] = {}
+        for entry in entries:
+            # Entries without a date or start time count for the day fetched
+            if (entry_work_date(entry) or date) != date:
+                continue
+            incoming[entry_id(entry)] = (_fingerprint(entry, employee_map), entry)
+
+        with self._lock:
+            day = self._days.setdefault(date, _DayAggregates())
+            stats = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0}
+
+            removed = [key for key in day.rows if key not in incoming]
+            changed_projects = {day.rows[key]['Project'] for key in removed}
+            for entry_key in removed:
+                day.retract(entry_key)
+                stats['removed'] += 1
+
+            changed = [(key, fingerprint, entry) for key, (fingerprint, entry) in incoming.items()
+                       if day.fingerprints.get(key) != fingerprint]
+            stats['unchanged'] = len(incoming) - len(changed)
+
+            if changed:
+                with stage('transform'):
+                    # Only the changed entries go through the batch conversion
+                    batch = TimeEntryBatch.from_entries([entry for _, _, entry in changed], default_date=date)
+                    ROWS_PROCESSED.inc(len(changed), stage='time_entries')
+                    frame = self.generator.entry_frame(batch, employee_map)
+                    # 'row' is the entry's position in this conversion
+                    rejected = {changed[record['row']][0]: record
+                                for record in batch.rejected_rows.to_dict(orient='records')}
+                    for (entry_key, fingerprint, _), row in zip(changed, frame.to_dict(orient='records')):
+                        if entry_key in day.rows:
+                            stats['updated'] += 1
+                            changed_projects.add(day.rows[entry_key]['Project'])
+                        else:
+                            stats['added'] += 1
+                        day.apply(entry_key, fingerprint, row)
+                        if entry_key in rejected:
+                            day.rejected[entry_key] = rejected[entry_key]
+                        changed_projects.add(row['Project'])
+
+            change = None
+            if changed or removed:
+                day.version += 1
+                day.invalidate()
+                if self._listeners:
+                    projects = self._project_list(day)
+                    change = {
+                        'date': date,
+                        'version': day.version,
+                        'content_hash': self._content_hash(date, day),
+                        'upserted': [self._summary_row(key, day.rows[key]) for key, _, _ in changed],
+                        'removed': removed,
+                        'projects': projects,
+                        'total_hours': round(sum(item['Total_Hours'] for item in projects), 2),
+                        'total_employees': sum(item['Employee_Count'] for item in projects),
+                        'changed_projects': sorted(changed_projects)
+                    }
+            day.refreshed_at = time.monotonic()
+
+        if change is not None:
+            for callback in self._listeners:
+                try:
+                    callback(date, change)
+                except Exception as e:
+                    print(f"Error notifying aggregate listener: {e}")
+
+        return stats
+
+    def _summary_row(self, entry_key: str, row: Dict) -> Dict:
+        """Get a daily summary row (summary columns plus Entry_ID) from a stored row"""
+        summary = {name: row[name] for name in self.generator.DAILY_SUMMARY_COLUMNS}
+        summary['Entry_ID'] = entry_key
+        return summary
+
+    def _project_list(self, day: _DayAggregates,
+                      scope: Optional[Tuple[str, ...]] = None) -> List[Dict]:
+        """Get a day's project totals sorted by hours descending (caller holds the lock)"""
+        if scope is None:
+            totals = day.project_totals.items()
+        else:
+            totals = [(project, day.project_totals[project]) for project in scope
+                      if project in day.project_totals]
+        data = [{'Project': project, 'Total_Hours': round(hours, 2), 'Employee_Count': count}
+                for project, (hours, count) in totals]
+        return sorted(data, key=lambda item: item['Total_Hours'], reverse=True)
+
+    def scope_change(self, change: Dict, projects: Iterable[str]) -> Optional[Dict]:
+        """
+        Limit a listener change to a set of projects
+
+        Args:
+            change: Change passed to listeners by refresh()
+            projects: Job codes in scope (e.g. one foreman's)
+
+        Returns:
+            The change with only in-scope rows and project totals and the
+            scope's content hash, or None if no project in scope changed.
+            'removed' ids are kept as-is, since removed rows are gone.
+        """
+        scope = project_scope(projects)
+        in_scope = set(scope)
+        if not in_scope.intersection(change['changed_projects']):
+            return None
+
+        with self._lock:
+            day = self._days[change['date']]
+            scoped_hash = self._content_hash(change['date'], day, scope)
+
+        projects = [item for item in change['projects'] if item['Project'] in in_scope]
+        return {
+            **change,
+            'content_hash': scoped_hash,
+            'upserted': [row for row in change['upserted'] if row['Project'] in in_scope],
+            'projects': projects,
+            'total_hours': round(sum(item['Total_Hours'] for item in projects), 2),
+            'total_employees': sum(item['Employee_Count'] for item in projects),
+            'changed_projects': sorted(in_scope.intersection(change['changed_projects']))
+        }
+
+    def _revalidate(self, date: str):
+        """Refresh a day in a background thread, unless a refresh is already running"""
+        future, started = self._begin_refresh(date)
+        if not started:
+            return
+
+        def run():
+            self._run_refresh(date, future)
+            if future.exception() is not None:
+                print(f"Error refreshing aggregates for {date}: {future.exception()}")
+
+        threading.Thread(target=run, name=f'revalidate-{date}', daemon=True).start()
+
+    def _get_day(self, date: str) -> _DayAggregates:
+        """Get a day's aggregates, refreshing them if missing or older than max_age"""
+        with self._lock:
+            day = self._days.get(date)
+            stale = day is not None and time.monotonic() - day.refreshed_at > self.max_age
+
+        if day is None or (stale and not self.stale_while_revalidate):
+            self.refresh(date)
+        elif stale:
+            self._revalidate(date)
+        return self._days[date]
+
+    def get_age(self, date: str) -> float:
+        """Get the seconds since a day was last refreshed (refreshing it first if never loaded)"""
+        return time.monotonic() - self._get_day(date).refreshed_at
+
+    def get_version(self, date: str) -> int:
+        """Get a counter that changes whenever the day's data changes"""
+        return self._get_day(date).version
+
+    def get_content_hash(self, date: str, projects: Optional[Iterable[str]] = None) -> str:
+        """
+        Get a hash of the date and the day's rows, usable as an HTTP ETag
+
+        Computed once per data version (and project scope); identical data
+        gives the same hash in every process.
+
+        Args:
+            date: Date in YYYY-MM-DD format
+            projects: Optional job codes; the hash then covers only their rows
+        """
+        day = self._get_day(date)
+        with self._lock:
+            return self._content_hash(date, day, project_scope(projects))
+
+    def peek_content_hash(self, date: str, projects: Optional[Iterable[str]] = None) -> Optional[str]:
+        """
+        Get a day's content hash without waiting for a fetch
+
+        Unlike get_content_hash, a day that was never loaded is not fetched
+        and a stale day is refreshed in the background, so request handlers
+        can check a cache key without blocking on Rippling.
+
+        Args:
+            date: Date in YYYY-MM-DD format
+            projects: Optional job codes; the hash then covers only their rows
+
+        Returns:
+            Hash of the stored rows, or None if the day is not loaded yet
+        """
+        with self._lock:
+            day = self._days.get(date)
+            if day is None:
+                return None
+            stale = time.monotonic() - day.refreshed_at > self.max_age
+            day_hash = self._content_hash(date, day, project_scope(projects))
+        if stale:
+            self._revalidate(date)
+        return day_hash
+
+    def _content_hash(self, date: str, day: _DayAggregates,
+                      scope: Optional[Tuple[str, ...]] = None) -> str:
+        """Compute (once per version) the content hash of a day's scope (caller holds the lock)"""
+        if scope not in day.content_hashes:
+            rows = [day.rows[key] for key in sorted(day.scope_keys(scope))]
+            payload = [date, rows] if scope is None else [date, list(scope), rows]
+            day.content_hashes[scope] = hashlib.sha1(
+                json.dumps(payload, sort_keys=True, default=str).encode()
+            ).hexdigest()[:20]
+        return day.content_hashes[scope]
+
+    def project_breakdown(self, date: str, projects: Optional[Iterable[str]] = None) -> List[Dict]:
+        """
+        Get total hours per project for a day
+
+        Args:
+            date: Date in YYYY-MM-DD format
+            projects: Optional job codes to limit the totals to
+
+        Returns:
+            List of dicts with Project, Total_Hours and Employee_Count,
+            sorted by hours descending (same shape as get_project_breakdown)
+        """
+        day = self._get_day(date)
+        with stage('aggregate'), self._lock:
+            return self._project_list(day, project_scope(projects))
+
+    def employee_totals(self, date: str, projects: Optional[Iterable[str]] = None) -> List[Dict]:
+        """
+        Get total hours per employee for a day
+
+        Args:
+            date: Date in YYYY-MM-DD format
+            projects: Optional job codes; totals then count only their entries
+
+        Returns:
+            List of dicts with User_ID, Total_Hours and Entry_Count,
+            sorted by hours descending
+        """
+        day = self._get_day(date)
+        scope = project_scope(projects)
+        with stage('aggregate'), self._lock:
+            if scope is None:
+                totals = list(day.employee_totals.items())
+            else:
+                scoped: Dict[str, List] = {}
+                for key in day.scope_keys(scope):
+                    row = day.rows[key]
+                    day._add(scoped, row['User_ID'], row['Hours'], 1)
+                totals = list(scoped.items())
+        data = [{'User_ID': user_id, 'Total_Hours': round(hours, 2), 'Entry_Count': count}
+                for user_id, (hours, count) in totals]
+        return sorted(data, key=lambda item: item['Total_Hours'], reverse=True)
+
+    def weekly_hours(self, start_date: str, end_date: str,
+                     projects: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        Pivot hours per employee and project by day from the stored rows
+
+        Uses the days already materialized (loading any that are missing),
+        so the weekly view needs no fetch of its own.
+
+        Args:
+            start_date: First day (YYYY-MM-DD)
+            end_date: Last day (YYYY-MM-DD)
+            projects: Optional job codes to limit the pivot to
+
+        Returns:
+            DataFrame indexed by (Employee, Project) with one column per
+            Date (same shape as get_employee_weekly_hours)
+        """
+        days = [self._get_day(date) for date in date_range(start_date, end_date)]
+        scope = project_scope(projects)
+        rows = {}
+        with stage('aggregate'):
+            with self._lock:
+                for day in days:
+                    # Each entry is stored under its work date only, so the days' keys do not overlap
+                    rows.update((key, day.rows[key]) for key in day.scope_keys(scope))
+
+            if not rows:
+                return pd.DataFrame()
+
+            df = pd.DataFrame(list(rows.values()), columns=['Employee', 'Project', 'Date', 'Hours'])
+            return df.pivot_table(
+                index=['Employee', 'Project'],
+                columns='Date',
+                values='Hours',
+                aggfunc='sum',
+                fill_value=0
+            )
+
+    def daily_summary(self, date: str, projects: Optional[Iterable[str]] = None) -> List[Dict]:
+        """
+        Get the day's summary rows sorted by project, then employee
+
+        The sorted list is rebuilt only after the day's data changes. With
+        projects, only those projects' rows are read, so the work is
+        proportional to their entries rather than the whole day.
+
+        Args:
+            date: Date in YYYY-MM-DD format
+            projects: Optional job codes to limit the rows to
+
+        Returns:
+            List of dicts with the daily summary columns plus Entry_ID,
+            which identifies the row in pushed changes
+        """
+        day = self._get_day(date)
+        with stage('aggregate'), self._lock:
+            return self._daily_rows(day, project_scope(projects))
+
+    def _daily_rows(self, day: _DayAggregates, scope: Optional[Tuple[str, ...]]) -> List[Dict]:
+        """Get (building once per version) a day's sorted summary rows (caller holds the lock)"""
+        if scope not in day.summaries:
+            keys = sorted(day.scope_keys(scope),
+                          key=lambda key: (day.rows[key]['Project'], day.rows[key]['Employee']))
+            day.summaries[scope] = [self._summary_row(key, day.rows[key]) for key in keys]
+        return day.summaries[scope]
+
+    def report_snapshot(self, date: str, projects: Optional[Iterable[str]] = None
+                        ) -> Tuple[List[str], List[Tuple[str, pd.DataFrame, bool]]]:
+        """
+        Get the sheets of a foreman report and the hashes of the data they hold
+
+        The sheets match ProjectLaborReportGenerator.foreman_report_sheets
+        but are read from the stored rows in one pass under the lock, so an
+        artifact keyed by the hashes holds exactly that data, even if a
+        refresh lands while the file is being written.
+
+        Args:
+            date: Report date (YYYY-MM-DD); the weekly sheet ends on it
+            projects: Optional job codes to limit every sheet to
+
+        Returns:
+            Tuple of (content hash of each day of the week, as from
+            get_content_hash, list of (sheet name, DataFrame, write index)
+            for the non-empty sheets)
+        """
+        scope = project_scope(projects)
+        dates = date_range(*self.generator.weekly_range(date))
+        # Load (or refresh) outside the lock; a refresh must not run under it
+        for day_date in dates:
+            self._get_day(day_date)
+
+        weekly_rows: Dict[str, Dict] = {}
+        rejected: Dict[str, Dict] = {}
+        with stage('aggregate'):
+            with self._lock:
+                days = [self._days[day_date] for day_date in dates]
+                day_hashes = [self._content_hash(day_date, day, scope) for day_date, day in zip(dates, days)]
+                day = days[-1]
+                daily_rows = self._daily_rows(day, scope)
+                projects_list = self._project_list(day, scope)
+                for week_day in days:
+                    keys = list(week_day.scope_keys(scope))
+                    # Each entry is stored under its work date only, so the days' keys do not overlap
+                    weekly_rows.update((key, week_day.rows[key]) for key in keys)
+                    rejected.update((key, week_day.rejected[key]) for key in keys if key in week_day.rejected)
+
+            columns = self.generator.DAILY_SUMMARY_COLUMNS
+            daily_summary = pd.DataFrame(daily_rows, columns=columns) if daily_rows else pd.DataFrame()
+            project_breakdown = pd.DataFrame(projects_list)
+            weekly_hours = pd.DataFrame()
+            if weekly_rows:
+                weekly_hours = pd.DataFrame(
+                    list(weekly_rows.values()), columns=['Employee', 'Project', 'Date', 'Hours']
+                ).pivot_table(index=['Employee', 'Project'], columns='Date', values='Hours',
+                              aggfunc='sum', fill_value=0)
+            rejected_rows = pd.DataFrame(list(rejected.values()))
+
+        sheets = [
+            ('Daily Summary', daily_summary, False),
+            ('Project Totals', project_breakdown, False),
+            ('Weekly Hours', weekly_hours, True),
+            ('Rejected Rows', rejected_rows, False)
+        ]
+        return day_hashes, [sheet for sheet in sheets if not sheet[1].empty]
+
+    def query_daily_summary(self, date: str, projects: Optional[Iterable[str]] = None,
+                            **query) -> Tuple[List[Dict], int]:
+        """
+        Filter, sort and page a day's summary rows
+
+        The index is built once per data version and project scope and
+        shared by all requests.
+
+        Args:
+            date: Date in YYYY-MM-DD format
+            projects: Optional job codes to limit the rows to
+            **query: Filters, sort and paging passed to SummaryIndex.query
+
+        Returns:
+            Tuple of (page of rows, number of rows matching the filters)
+        """
+        rows = self.daily_summary(date, projects)
+        day = self._get_day(date)
+        scope = project_scope(projects)
+        with stage('aggregate'):
+            with self._lock:
+                index = day.summary_indexes.get(scope)
+                if index is None or index.rows is not rows:
+                    index = day.summary_indexes[scope] = SummaryIndex(rows)
+            return index.query(**query)
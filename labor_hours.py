@@ -0,0 +1,113 @@
+"""
+Vectorized hours calculation for Rippling time entries
+Loads raw entries into a DataFrame and computes hours column-wise
+
+Replaces the per-entry ProjectLaborReportGenerator._calculate_hours loop
+for large pulls. Rows whose hours cannot be determined are collected in a
+rejected-rows report instead of being printed one at a time.
+
+Date created: 2025-10-31
+"""
+
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+REJECTED_COLUMNS = ['row', 'id', 'job_code', 'reason', 'hours', 'start_time', 'end_time', 'duration_minutes']
+
+
+def entries_to_frame(time_entries: List[Dict]) -> pd.DataFrame:
+    """
+    Load raw time entry dictionaries into a DataFrame
+
+    Args:
+        time_entries: Time entry dictionaries from the API
+
+    Returns:
+        DataFrame with one row per entry and one column per field
+    """
+    return pd.DataFrame.from_records(time_entries) if time_entries else pd.DataFrame()
+
+
+def column(frame: pd.DataFrame, name: str, default=None) -> pd.Series:
+    """Get a column, or a Series of default if the column is missing"""
+    if name in frame.columns:
+        return frame[name]
+    return pd.Series(default, index=frame.index, dtype=object)
+
+
+def _parse_timestamps(values: pd.Series) -> pd.Series:
+    """Parse ISO 8601 strings to UTC timestamps; unparseable values become NaT"""
+    return pd.to_datetime(values, utc=True, format='ISO8601', errors='coerce')
+
+
+def compute_hours(frame: pd.DataFrame) -> Tuple[pd.Series, pd.DataFrame]:
+    """
+    Compute hours for every row of a time entry frame
+
+    Each row uses the first source that yields a value:
+    explicit 'hours', then 'end_time' - 'start_time', then
+    'duration_minutes' / 60. Rows with no usable source get 0.0.
+
+    Args:
+        frame: DataFrame built by entries_to_frame
+
+    Returns:
+        Tuple of (hours Series aligned with frame, rejected-rows DataFrame).
+        A row is rejected when it had a value for some source that could not
+        be parsed and no later source filled in.
+    """
+    if frame.empty:
+        return pd.Series(dtype=float), pd.DataFrame(columns=REJECTED_COLUMNS)
+
+    raw_hours = column(frame, 'hours')
+    raw_start = column(frame, 'start_time')
+    raw_end = column(frame, 'end_time')
+    raw_duration = column(frame, 'duration_minutes')
+
+    # 1. Explicit hours
+    explicit = pd.to_numeric(raw_hours, errors='coerce')
+    hours = explicit.astype(float)
+    bad_hours = raw_hours.notna() & explicit.isna()
+
+    # 2. Start/end timestamps (only parsed for rows that still need hours)
+    need = hours.isna()
+    has_times = need & raw_start.notna() & raw_end.notna()
+    bad_times = pd.Series(False, index=frame.index)
+    if has_times.any():
+        start = _parse_timestamps(raw_start[has_times])
+        end = _parse_timestamps(raw_end[has_times])
+        from_times = ((end - start).dt.total_seconds() / 3600).round(2)
+        hours = hours.fillna(from_times)
+        bad_times[has_times] = from_times.isna()
+
+    # 3. Duration in minutes
+    need = hours.isna()
+    has_duration = need & raw_duration.notna()
+    bad_duration = pd.Series(False, index=frame.index)
+    if has_duration.any():
+        duration = pd.to_numeric(raw_duration[has_duration], errors='coerce')
+        hours = hours.fillna((duration / 60).round(2))
+        bad_duration[has_duration] = duration.isna()
+
+    unresolved = hours.isna()
+    hours = hours.fillna(0.0)
+
+    reasons = pd.Series('', index=frame.index, dtype=object)
+    reasons = reasons.mask(bad_duration, 'invalid duration_minutes')
+    reasons = reasons.mask(bad_times, 'invalid start_time/end_time')
+    reasons = reasons.mask(bad_hours, 'invalid hours')
+    rejected_mask = unresolved & (bad_hours | bad_times | bad_duration)
+
+    rejected = pd.DataFrame({
+        'row': frame.index[rejected_mask],
+        'id': column(frame, 'id')[rejected_mask].values,
+        'job_code': column(frame, 'job_code')[rejected_mask].values,
+        'reason': reasons[rejected_mask].values,
+        'hours': raw_hours[rejected_mask].values,
+        'start_time': raw_start[rejected_mask].values,
+        'end_time': raw_end[rejected_mask].values,
+        'duration_minutes': raw_duration[rejected_mask].values,
+    }, columns=REJECTED_COLUMNS)
+
+    return hours, rejected
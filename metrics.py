@@ -0,0 +1,336 @@
+"""
+Application Metrics for Capitol Engineering
+Prometheus-style counters and histograms served at /metrics
+
+Counters and histograms are kept in memory per process. Under gunicorn
+each worker is its own process, so when METRICS_DIR is set every worker
+also writes a snapshot of its metrics to that directory (every
+METRICS_FLUSH_SECONDS and whenever it serves /metrics), and /metrics
+sums the snapshots of every worker, including ones that have exited, so
+totals do not drop when gunicorn recycles a worker. gunicorn.conf.py sets
+METRICS_DIR and empties it when gunicorn starts.
+
+    http_request_duration_seconds      route latency by app, route, method, status
+    rippling_request_duration_seconds  Rippling call latency by endpoint and status
+    rippling_pages_total               pages read from paginated endpoints
+    rippling_retries_total             retried Rippling calls by endpoint and status
+    cache_requests_total               response cache and HTTP body cache hits/misses
+    rows_processed_total               time entries converted and report rows written
+    export_duration_seconds            background export build time by status
+
+Date created: 2025-10-31
+"""
+
+import atexit
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_FLUSH_SECONDS = 5.0
+
+# Latency buckets (seconds) for requests and Rippling calls
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Export build buckets (seconds)
+EXPORT_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def metrics_dir() -> Optional[str]:
+    """Directory shared by the worker processes (read on each use; gunicorn sets it after import)"""
+    return os.getenv('METRICS_DIR') or None
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _label_text(names: Iterable[str], values: Iterable[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """Monotonic count per label combination"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def inc(self, amount: float = 1.0, **labels):
+        """Add amount to the count for the given labels"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def snapshot(self) -> List:
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    @staticmethod
+    def merge(total: Dict, samples: List):
+        for key, value in samples:
+            key = tuple(key)
+            total[key] = total.get(key, 0.0) + value
+
+    def render(self, merged: Dict) -> List[str]:
+        return [f'{self.name}{_label_text(self.labelnames, key)} {_format_number(value)}'
+                for key, value in sorted(merged.items())]
+
+
+class Histogram(Counter):
+    """Bucketed observations (with sum and count) per label combination"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        """Record one observation for the given labels"""
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][index] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def snapshot(self) -> List:
+        with self._lock:
+            return [[list(key), [list(counts), total, count]]
+                    for key, (counts, total, count) in self._values.items()]
+
+    @staticmethod
+    def merge(total: Dict, samples: List):
+        for key, (counts, value_sum, count) in samples:
+            key = tuple(key)
+            state = total.get(key)
+            if state is None or len(state[0]) != len(counts):
+                # Snapshots written with other buckets (an older deploy) are replaced
+                total[key] = [list(counts), value_sum, count]
+                continue
+            state[0] = [a + b for a, b in zip(state[0], counts)]
+            state[1] += value_sum
+            state[2] += count
+
+    def render(self, merged: Dict) -> List[str]:
+        lines = []
+        for key, (counts, value_sum, count) in sorted(merged.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = 'le="%g"' % bound
+                lines.append(f'{self.name}_bucket{_label_text(self.labelnames, key, le)} {cumulative}')
+            le = 'le="+Inf"'
+            lines.append(f'{self.name}_bucket{_label_text(self.labelnames, key, le)} {count}')
+            lines.append(f'{self.name}_sum{_label_text(self.labelnames, key)} {_format_number(value_sum)}')
+            lines.append(f'{self.name}_count{_label_text(self.labelnames, key)} {count}')
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics of this process, with snapshots shared through METRICS_DIR"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Counter] = {}
+        self._lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+
+    def counter(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def _register(self, metric: Counter) -> Counter:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def snapshot(self) -> Dict[str, List]:
+        """Current values of every metric in this process"""
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def reset(self):
+        """Zero every metric (a forked worker must not report its parent's counts)"""
+        for metric in self._metrics.values():
+            metric.reset()
+
+    def write_snapshot(self, directory: Optional[str] = None):
+        """Write this process's snapshot to the shared directory (no-op without one)"""
+        directory = directory or metrics_dir()
+        if not directory:
+            return
+        try:
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f'worker-{os.getpid()}.json')
+            temp_path = f'{path}.tmp'
+            with open(temp_path, 'w') as f:
+                json.dump({'pid': os.getpid(), 'written_at': time.time(), 'metrics': self.snapshot()}, f)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Error writing metrics snapshot: {e}")
+
+    def _snapshots(self) -> List[Dict[str, List]]:
+        """This process's snapshot plus every other worker's last written one"""
+        directory = metrics_dir()
+        if not directory:
+            return [self.snapshot()]
+
+        self.write_snapshot(directory)
+        snapshots = []
+        try:
+            names = sorted(os.listdir(directory))
+        except OSError:
+            names = []
+        for name in names:
+            if not (name.startswith('worker-') and name.endswith('.json')):
+                continue
+            try:
+                with open(os.path.join(directory, name)) as f:
+                    snapshots.append(json.load(f)['metrics'])
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Error reading metrics snapshot {name}: {e}")
+        return snapshots
+
+    def render(self) -> str:
+        """Prometheus text exposition of the metrics summed across workers"""
+        snapshots = self._snapshots()
+        lines = []
+        for name, metric in self._metrics.items():
+            merged: Dict = {}
+            for snapshot in snapshots:
+                metric.merge(merged, snapshot.get(name, []))
+            lines.append(f'# HELP {name} {metric.help_text}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            lines.extend(metric.render(merged))
+        lines.append('# HELP metrics_worker_snapshots Worker snapshots summed into this response')
+        lines.append('# TYPE metrics_worker_snapshots gauge')
+        lines.append(f'metrics_worker_snapshots {len(snapshots)}')
+        return '\n'.join(lines) + '\n'
+
+    def start_flusher(self, interval: float = None):
+        """Write this process's snapshot every interval seconds while METRICS_DIR is set"""
+        interval = interval or float(os.getenv('METRICS_FLUSH_SECONDS', DEFAULT_FLUSH_SECONDS))
+        with self._lock:
+            if self._flusher is not None and self._flusher.is_alive():
+                return
+
+            def run():
+                while True:
+                    time.sleep(interval)
+                    self.write_snapshot()
+
+            self._flusher = threading.Thread(target=run, name='metrics-flush', daemon=True)
+            self._flusher.start()
+
+    def _write_at_exit(self):
+        # Only processes serving an app (not the gunicorn master) leave a snapshot
+        if self._flusher is not None:
+            self.write_snapshot()
+
+    def _after_fork(self):
+        """In a forked child: start from zero; the flush thread did not survive the fork"""
+        # Locks may have been held by a parent thread at fork time
+        for metric in self._metrics.values():
+            metric._lock = threading.Lock()
+            metric._values = {}
+        self._lock = threading.Lock()
+        self._flusher = None
+
+
+registry = MetricsRegistry()
+atexit.register(registry._write_at_exit)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=registry._after_fork)
+
+
+def clear_metrics_dir(directory: Optional[str] = None):
+    """Remove every worker snapshot (call once when the server starts)"""
+    directory = directory or metrics_dir()
+    if directory and os.path.isdir(directory):
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    'http_request_duration_seconds', 'Flask request latency',
+    ('app', 'route', 'method', 'status'))
+RIPPLING_REQUEST_SECONDS = registry.histogram(
+    'rippling_request_duration_seconds', 'Rippling API call latency (one HTTP attempt)',
+    ('endpoint', 'status'))
+RIPPLING_PAGES = registry.counter(
+    'rippling_pages_total', 'Pages read from paginated Rippling endpoints (including cached ones)', ('endpoint',))
+RIPPLING_RETRIES = registry.counter(
+    'rippling_retries_total', 'Rippling calls retried after a 429 or 5xx', ('endpoint', 'status'))
+CACHE_REQUESTS = registry.counter(
+    'cache_requests_total', 'Cache lookups by cache and result (hit or miss)', ('cache', 'result'))
+ROWS_PROCESSED = registry.counter(
+    'rows_processed_total', 'Time entries converted and report rows written', ('stage',))
+EXPORT_SECONDS = registry.histogram(
+    'export_duration_seconds', 'Background export build time', ('status',), EXPORT_BUCKETS)
+
+
+def register_metrics(app, name: Optional[str] = None):
+    """
+    Record request latency for a Flask app and serve GET /metrics
+
+    Args:
+        app: Flask app
+        name: Value of the 'app' label (defaults to app.name, which is
+            '__main__' when the module is run directly)
+    """
+    from flask import Response, g, request
+
+    app_label = name or app.name
+    registry.start_flusher()
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            # Route templates, not raw paths, keep the label set small
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, app=app_label, route=route,
+                                         method=request.method, status=response.status_code)
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        """Prometheus metrics, summed across workers"""
+        return Response(registry.render(), mimetype=None, content_type=CONTENT_TYPE)
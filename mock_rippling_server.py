@@ -0,0 +1,343 @@
+"""
+Mock Rippling API Server for Capitol Engineering
+Local stand-in for the Rippling endpoints the clients use, backed by demo data
+
+Serves /users, /time-entries (cursor pagination, start_date/end_date
+filtering), /job-dimensions and /job-dimensions/{id}/jobs from
+DemoDataGenerator data, or a SyntheticWorkload of any size, with
+configurable latency, jitter, page size and injected 5xx/429 failures.
+Point a client at it to measure throughput and tail latency without
+touching production Rippling:
+
+    python mock_rippling_server.py --port 5100 --latency-ms 80 --jitter-ms 40 --rate-limit-rate 0.02
+    python mock_rippling_server.py --employees 500 --projects 200
+    RIPPLING_API_BASE_URL=http://127.0.0.1:5100 RIPPLING_API_TOKEN=test python foreman_dashboard.py
+
+A day's entries are generated from the seed and the date, so every run
+(and every client) sees the same data. Any bearer token is accepted.
+
+Date created: 2025-10-31
+"""
+
+import argparse
+import base64
+import random
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from flask import Flask, jsonify, request
+
+from demo_data_generator import DemoDataGenerator
+from synthetic_workload import SyntheticWorkload
+
+DEFAULT_PORT = 5100
+DEFAULT_PAGE_SIZE = 100
+
+# Longest start_date..end_date range a single request may ask for
+MAX_RANGE_DAYS = 366
+
+# Generated days kept in memory
+MAX_CACHED_DAYS = 90
+
+
+class MockServerConfig:
+    """Latency, paging and fault injection settings for the mock server"""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 page_size: int = DEFAULT_PAGE_SIZE, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, retry_after: float = 1.0,
+                 max_rps: Optional[float] = None, seed: int = 0):
+        """
+        Initialize the configuration
+
+        Args:
+            latency_ms: Delay added to every API response
+            jitter_ms: Extra random delay, uniform between 0 and jitter_ms
+            page_size: Maximum records per page (requests may ask for fewer)
+            error_rate: Fraction of API requests answered with a 503
+            rate_limit_rate: Fraction of API requests answered with a 429
+            retry_after: Retry-After seconds sent with 429 responses
+            max_rps: Answer 429 once more than this many requests arrive in
+                     one second (no limit if None)
+            seed: Seed for the generated data and the injected failures
+        """
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+        for name, rate in (('error_rate', error_rate), ('rate_limit_rate', rate_limit_rate)):
+            if not 0.0 <= rate <= 1.0:
+                raise ValueError(f"{name} must be between 0 and 1")
+
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.page_size = page_size
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.max_rps = max_rps
+        self.seed = seed
+
+
+class MockRipplingData:
+    """Roster, projects and per-day time entries generated on demand"""
+
+    def __init__(self, seed: int = 0, workload: Optional[SyntheticWorkload] = None):
+        """
+        Initialize the data source
+
+        Args:
+            seed: Combined with each date to seed that day's demo entries
+            workload: Generate from this workload instead of the demo data
+        """
+        self.seed = seed
+        self.generator = workload or DemoDataGenerator(seed)
+        self._days: 'OrderedDict[str, List[Dict]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._generate_lock = threading.Lock()
+
+    def employees(self) -> List[Dict]:
+        return self.generator.employees
+
+    def dimensions(self) -> List[Dict]:
+        return self.generator.dimensions
+
+    def jobs_for_dimension(self, dimension_id: str) -> Optional[List[Dict]]:
+        """
+        Jobs of a dimension: projects for dim_001, roles for dim_002
+
+        Returns:
+            List of job dictionaries, or None for an unknown dimension
+        """
+        if dimension_id == 'dim_001':
+            return [{'id': project['code'], 'code': project['code'], 'name': project['name'],
+                     'type': project['type']} for project in self.generator.projects]
+        if dimension_id == 'dim_002':
+            roles = sorted({employee['role'] for employee in self.generator.employees})
+            return [{'id': role, 'code': role, 'name': role} for role in roles]
+        return None
+
+    def day_entries(self, date: str) -> List[Dict]:
+        """Time entries for one day (YYYY-MM-DD), generated once per seed and date"""
+        with self._lock:
+            entries = self._days.get(date)
+            if entries is not None:
+                self._days.move_to_end(date)
+                return entries
+
+        with self._generate_lock:
+            if isinstance(self.generator, DemoDataGenerator):
+                # Reseed so a day does not depend on which days came before it
+                self.generator.random.seed(f'{self.seed}:{date}')
+            entries = self.generator.generate_daily_time_entries(datetime.strptime(date, '%Y-%m-%d'))
+
+        with self._lock:
+            self._days[date] = entries
+            while len(self._days) > MAX_CACHED_DAYS:
+                self._days.popitem(last=False)
+        return entries
+
+    def time_entries(self, start_date: str, end_date: str) -> List[Dict]:
+        """Time entries for every day from start_date to end_date, in day order"""
+        start = datetime.strptime(start_date, '%Y-%m-%d')
+        end = datetime.strptime(end_date, '%Y-%m-%d')
+        entries = []
+        for offset in range((end - start).days + 1):
+            entries.extend(self.day_entries((start + timedelta(days=offset)).strftime('%Y-%m-%d')))
+        return entries
+
+
+def encode_cursor(offset: int) -> str:
+    """Opaque cursor for the page starting at offset"""
+    return base64.urlsafe_b64encode(f'o:{offset}'.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    """
+    Offset a cursor points at (0 for no cursor)
+
+    Raises:
+        ValueError: If the cursor was not produced by encode_cursor
+    """
+    if not cursor:
+        return 0
+    try:
+        text = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        prefix, offset = text.split(':')
+        if prefix != 'o' or int(offset) < 0:
+            raise ValueError
+        return int(offset)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"invalid cursor: {cursor}")
+
+
+def _error(status: int, message: str):
+    return jsonify({'error': message}), status
+
+
+def create_mock_app(config: Optional[MockServerConfig] = None,
+                    workload: Optional[SyntheticWorkload] = None) -> Flask:
+    """
+    Create the mock Rippling API app
+
+    Args:
+        config: Latency and fault settings (defaults: no delay, no faults)
+        workload: Serve this workload's data instead of the demo data
+
+    Returns:
+        Flask app; GET /_mock/stats reports request and injected fault counts
+    """
+    config = config or MockServerConfig()
+    data = MockRipplingData(config.seed, workload)
+    app = Flask(__name__)
+
+    faults = random.Random(config.seed)
+    state_lock = threading.Lock()
+    stats = {'requests': 0, 'errors_injected': 0, 'rate_limited': 0, 'records_served': 0}
+    window = {'second': 0, 'count': 0}
+
+    def draw_fault() -> Tuple[Optional[int], float]:
+        """Decide this request's injected status (if any) and its delay in seconds"""
+        with state_lock:
+            stats['requests'] += 1
+            delay = (config.latency_ms + faults.uniform(0, config.jitter_ms)) / 1000.0
+
+            if config.max_rps:
+                second = int(time.time())
+                if window['second'] != second:
+                    window['second'], window['count'] = second, 0
+                window['count'] += 1
+                if window['count'] > config.max_rps:
+                    stats['rate_limited'] += 1
+                    return 429, delay
+
+            roll = faults.random()
+            if roll < config.rate_limit_rate:
+                stats['rate_limited'] += 1
+                return 429, delay
+            if roll < config.rate_limit_rate + config.error_rate:
+                stats['errors_injected'] += 1
+                return 503, delay
+            return None, delay
+
+    @app.before_request
+    def simulate_network():
+        if request.path.startswith('/_mock/'):
+            return None
+
+        if not request.headers.get('Authorization', '').startswith('Bearer '):
+            return _error(401, 'missing bearer token')
+
+        status, delay = draw_fault()
+        if delay > 0:
+            time.sleep(delay)
+        if status == 429:
+            response = jsonify({'error': 'rate limit exceeded'})
+            response.status_code = 429
+            response.headers['Retry-After'] = f'{config.retry_after:g}'
+            return response
+        if status is not None:
+            return _error(status, 'injected failure')
+        return None
+
+    def page(records: List[Dict]):
+        """Respond with one cursor page of records"""
+        try:
+            offset = decode_cursor(request.args.get('cursor'))
+            limit = int(request.args.get('limit', config.page_size))
+        except ValueError as e:
+            return _error(400, str(e))
+        limit = max(1, min(limit, config.page_size))
+
+        data_page = records[offset:offset + limit]
+        next_offset = offset + len(data_page)
+        with state_lock:
+            stats['records_served'] += len(data_page)
+        return jsonify({
+            'data': data_page,
+            'next_cursor': encode_cursor(next_offset) if next_offset < len(records) else None
+        })
+
+    @app.route('/users')
+    def users():
+        return page(data.employees())
+
+    @app.route('/time-entries')
+    def time_entries():
+        today = datetime.now().strftime('%Y-%m-%d')
+        start_date = request.args.get('start_date', today)
+        end_date = request.args.get('end_date', start_date)
+        try:
+            days = (datetime.strptime(end_date, '%Y-%m-%d') - datetime.strptime(start_date, '%Y-%m-%d')).days + 1
+        except ValueError:
+            return _error(400, 'start_date and end_date must be YYYY-MM-DD')
+        if days < 1:
+            return _error(400, 'end_date is before start_date')
+        if days > MAX_RANGE_DAYS:
+            return _error(400, f'date range is longer than {MAX_RANGE_DAYS} days')
+        return page(data.time_entries(start_date, end_date))
+
+    @app.route('/job-dimensions')
+    def job_dimensions():
+        return jsonify({'data': data.dimensions(), 'next_cursor': None})
+
+    @app.route('/job-dimensions/<dimension_id>/jobs')
+    def dimension_jobs(dimension_id):
+        jobs = data.jobs_for_dimension(dimension_id)
+        if jobs is None:
+            return _error(404, f'unknown job dimension: {dimension_id}')
+        return jsonify({'data': jobs, 'next_cursor': None})
+
+    @app.route('/_mock/stats')
+    def mock_stats():
+        with state_lock:
+            return jsonify(dict(stats))
+
+    return app
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Local mock of the Rippling API for load testing')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Delay added to every response')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Extra random delay, 0 to N ms')
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE, help='Maximum records per page')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered 503')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Fraction of requests answered 429')
+    parser.add_argument('--retry-after', type=float, default=1.0, help='Retry-After seconds on 429')
+    parser.add_argument('--max-rps', type=float, help='Answer 429 above this many requests per second')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for generated data and failures')
+    parser.add_argument('--employees', type=int, help='Serve a synthetic workload with this headcount')
+    parser.add_argument('--projects', type=int, help='Project count of the synthetic workload')
+    args = parser.parse_args()
+
+    try:
+        config = MockServerConfig(
+            latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, page_size=args.page_size,
+            error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+            retry_after=args.retry_after, max_rps=args.max_rps, seed=args.seed
+        )
+        workload = None
+        if args.employees or args.projects:
+            workload = SyntheticWorkload(employees=args.employees or 500,
+                                         projects=args.projects or 200, seed=args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+
+    print("\n" + "="*70)
+    print("CAPITOL ENGINEERING - MOCK RIPPLING API")
+    print("="*70)
+    print(f"\nServing demo data at http://{args.host}:{args.port}")
+    print(f"Latency {args.latency_ms:g} ms + 0-{args.jitter_ms:g} ms jitter, page size {args.page_size}, "
+          f"{args.error_rate:.1%} errors, {args.rate_limit_rate:.1%} rate limited")
+    print(f"\nRIPPLING_API_BASE_URL=http://{args.host}:{args.port}")
+    print("="*70 + "\n")
+
+    create_mock_app(config, workload).run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,24 +6,63 @@ Date created: 2025-10-30 20:15
 """
 
 from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Dict, Iterable, List, Tuple
 import pandas as pd
+from labor_aggregates import LaborTotals
 from rippling_api_client import RipplingAPIClient
+from report_context import ReportContext, project_scope
+from report_writers import open_report_writer, write_report
+from request_timing import stage
+from response_cache import get_shared_cache
+from time_entry_batch import DEFAULT_BATCH_SIZE, TimeEntryBatch
 
 
 class ProjectLaborReportGenerator:
     """Generate daily project labor reports from Rippling time tracking data"""
 
-    def __init__(self, api_token: str = None):
-        """Initialize the report generator with Rippling API client"""
-        self.client = RipplingAPIClient(api_token)
+    DAILY_SUMMARY_COLUMNS = ['Employee', 'Employee_ID', 'Project', 'Job_Dimension',
+                             'Hours', 'Clock_In', 'Clock_Out', 'Status']
 
-    def get_daily_project_summary(self, date: str = None) -> pd.DataFrame:
+    def __init__(self, api_token: str = None, client: RipplingAPIClient = None):
+        """
+        Initialize the report generator with Rippling API client
+
+        Args:
+            api_token: Rippling API token (ignored when client is given)
+            client: Existing API client to reuse, so its pooled connections
+                    and response cache are shared with other generators and dashboards.
+                    A TimeEntryStore can be passed to read from the local store.
+        """
+        self.client = client or RipplingAPIClient(
+            api_token, shared_session=True, cache=get_shared_cache()
+        )
+
+        # Entries whose hours could not be computed by the last report
+        self.last_rejected_rows = pd.DataFrame()
+
+    def build_report_context(self, start_date: str = None, end_date: str = None) -> ReportContext:
+        """
+        Create a report context that fetches shared report inputs once
+
+        Args:
+            start_date: Optional first day to fetch up front (YYYY-MM-DD)
+            end_date: Optional last day to fetch up front (defaults to start_date)
+
+        Returns:
+            ReportContext bound to this generator's client
+        """
+        return ReportContext(self.client, start_date, end_date)
+
+    def get_daily_project_summary(self, date: str = None,
+                                  context: ReportContext = None,
+                                  projects: Iterable[str] = None) -> pd.DataFrame:
         """
         Generate daily project summary showing all employees and their project assignments
 
         Args:
             date: Date in YYYY-MM-DD format (defaults to today)
+            context: Optional report context to read data from and memoize the result in
+            projects: Optional job codes to limit the summary to (e.g. one foreman's)
 
         Returns:
             DataFrame with columns: Employee, Project, Hours, Status
@@ -31,157 +70,364 @@ class ProjectLaborReportGenerator:
         if not date:
             date = datetime.now().strftime('%Y-%m-%d')
 
-        # Get time entries for the specified date
-        time_entries = self.client.get_time_entries(start_date=date, end_date=date)
+        view_key = ('daily_summary', date, project_scope(projects))
+        if context is not None and view_key in context.views:
+            return context.views[view_key]
 
-        # Get employee data
-        employees = self.client.get_employees()
-        employee_map = {emp['id']: emp for emp in employees}
+        # Get time entries and employee data for the specified date
+        batch, employee_map = self._fetch_inputs(date, date, context, projects)
 
         # Process time entries into report format
-        report_data = []
-
-        for entry in time_entries:
-            employee_id = entry.get('employee_id') or entry.get('user_id')
-            employee = employee_map.get(employee_id, {})
-
-            report_data.append({
-                'Employee': f"{employee.get('first_name', '')} {employee.get('last_name', '')}",
-                'Employee_ID': employee.get('employee_id', 'N/A'),
-                'Project': entry.get('job_code', 'No Project'),
-                'Job_Dimension': entry.get('dimension_name', 'N/A'),
-                'Hours': self._calculate_hours(entry),
-                'Clock_In': entry.get('start_time', ''),
-                'Clock_Out': entry.get('end_time', ''),
-                'Status': entry.get('status', 'Active')
-            })
-
-        df = pd.DataFrame(report_data)
+        df = self._build_entry_frame(batch, employee_map, context, (date, date))
+        df = df[self.DAILY_SUMMARY_COLUMNS] if not df.empty else df
 
         if df.empty:
             print(f"No time entries found for {date}")
-            return pd.DataFrame()
-
-        # Sort by project, then employee name
-        df = df.sort_values(['Project', 'Employee'])
-
+            df = pd.DataFrame()
+        else:
+            # Sort by project, then employee name
+            with stage('aggregate'):
+                df = df.sort_values(['Project', 'Employee'])
+
+        if context is not None:
+            context.views[view_key] = df
         return df
 
-    def get_project_breakdown(self, date: str = None) -> pd.DataFrame:
+    def get_project_breakdown(self, date: str = None,
+                              context: ReportContext = None,
+                              projects: Iterable[str] = None) -> pd.DataFrame:
         """
         Generate project-level summary showing total hours per project
 
         Args:
             date: Date in YYYY-MM-DD format (defaults to today)
+            context: Optional report context; the daily summary is reused from it
+            projects: Optional job codes to limit the summary to
 
         Returns:
             DataFrame with columns: Project, Total_Hours, Employee_Count
         """
-        daily_summary = self.get_daily_project_summary(date)
+        daily_summary = self.get_daily_project_summary(date, context, projects)
 
         if daily_summary.empty:
             return pd.DataFrame()
 
-        project_summary = daily_summary.groupby('Project').agg({
-            'Hours': 'sum',
-            'Employee': 'count'
-        }).reset_index()
+        with stage('aggregate'):
+            project_summary = daily_summary.groupby('Project').agg({
+                'Hours': 'sum',
+                'Employee': 'count'
+            }).reset_index()
 
-        project_summary.columns = ['Project', 'Total_Hours', 'Employee_Count']
-        project_summary = project_summary.sort_values('Total_Hours', ascending=False)
+            project_summary.columns = ['Project', 'Total_Hours', 'Employee_Count']
+            project_summary = project_summary.sort_values('Total_Hours', ascending=False)
 
         return project_summary
 
-    def get_employee_weekly_hours(self, employee_id: str = None) -> pd.DataFrame:
+    def get_employee_weekly_hours(self, employee_id: str = None,
+                                  context: ReportContext = None,
+                                  end_date: str = None,
+                                  projects: Iterable[str] = None) -> pd.DataFrame:
         """
         Get weekly hours breakdown for specific employee or all employees
 
         Args:
             employee_id: Optional specific employee ID
+            context: Optional report context to read data from
+            end_date: Last day of the week (YYYY-MM-DD, defaults to today)
+            projects: Optional job codes to limit the pivot to
 
         Returns:
             DataFrame with employee hours by day
         """
-        # Get last 7 days
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=6)
+        # Get the 7 days ending on end_date
+        start_date, end_date = self.weekly_range(end_date)
+        batch, employee_map = self._fetch_inputs(start_date, end_date, context, projects)
 
-        time_entries = self.client.get_time_entries(
-            start_date=start_date.strftime('%Y-%m-%d'),
-            end_date=end_date.strftime('%Y-%m-%d')
-        )
-
-        employees = self.client.get_employees()
-        employee_map = {emp['id']: emp for emp in employees}
-
-        weekly_data = []
+        df = self._build_entry_frame(batch, employee_map, context, (start_date, end_date))
 
-        for entry in time_entries:
-            emp_id = entry.get('employee_id') or entry.get('user_id')
-
-            # Filter by specific employee if requested
-            if employee_id and emp_id != employee_id:
-                continue
-
-            employee = employee_map.get(emp_id, {})
-            entry_date = entry.get('date', entry.get('start_time', ''))[:10]
-
-            weekly_data.append({
-                'Employee': f"{employee.get('first_name', '')} {employee.get('last_name', '')}",
-                'Date': entry_date,
-                'Project': entry.get('job_code', 'No Project'),
-                'Hours': self._calculate_hours(entry)
-            })
-
-        df = pd.DataFrame(weekly_data)
+        # Filter by specific employee if requested
+        if employee_id and not df.empty:
+            df = df[df['User_ID'] == employee_id]
 
         if df.empty:
             return pd.DataFrame()
 
         # Pivot to show days as columns
-        pivot = df.pivot_table(
-            index=['Employee', 'Project'],
-            columns='Date',
-            values='Hours',
-            aggfunc='sum',
-            fill_value=0
-        )
+        with stage('aggregate'):
+            pivot = df.pivot_table(
+                index=['Employee', 'Project'],
+                columns='Date',
+                values='Hours',
+                aggfunc='sum',
+                fill_value=0
+            )
 
         return pivot
 
-    def export_foreman_report(self, output_path: str, date: str = None):
+    def export_foreman_report(self, output_path: str, date: str = None,
+                              context: ReportContext = None, report_format: str = 'xlsx',
+                              projects: Iterable[str] = None):
         """
         Export comprehensive foreman report to Excel with multiple sheets
 
+        Sheets are streamed to the file row by row (see report_writers.py).
+
         Args:
             output_path: Path to save Excel file
             date: Date for the report (defaults to today)
+            context: Optional report context; one is created if not given so
+                     every sheet shares a single data pull
+            report_format: 'xlsx', 'csv' or 'parquet' (a .zip with one file per sheet)
+            projects: Optional job codes to limit every sheet to, e.g. the
+                      projects of one foreman (see foreman_scopes.py)
         """
         if not date:
             date = datetime.now().strftime('%Y-%m-%d')
+        if context is None:
+            context = self.build_report_context(*self.weekly_range(date))
 
-        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-            # Sheet 1: Daily project summary
-            daily_summary = self.get_daily_project_summary(date)
-            if not daily_summary.empty:
-                daily_summary.to_excel(writer, sheet_name='Daily Summary', index=False)
+        sheets = self.foreman_report_sheets(date, context, projects)
+        with stage('render'):
+            write_report(output_path, sheets, report_format)
 
-            # Sheet 2: Project breakdown
-            project_breakdown = self.get_project_breakdown(date)
-            if not project_breakdown.empty:
-                project_breakdown.to_excel(writer, sheet_name='Project Totals', index=False)
+        print(f"Report generated successfully: {output_path}")
 
-            # Sheet 3: Weekly hours
-            weekly_hours = self.get_employee_weekly_hours()
-            if not weekly_hours.empty:
-                weekly_hours.to_excel(writer, sheet_name='Weekly Hours')
+    def foreman_report_sheets(self, date: str, context: ReportContext = None,
+                              projects: Iterable[str] = None,
+                              include_rejected: bool = True) -> List[Tuple[str, pd.DataFrame, bool]]:
+        """
+        Build the sheets of a foreman report without writing them
 
-        print(f"Report generated successfully: {output_path}")
+        Args:
+            date: Date for the report (YYYY-MM-DD)
+            context: Optional report context to read data from
+            projects: Optional job codes to limit every sheet to
+            include_rejected: Add the context's rejected rows (which cover
+                              every date it fetched, not just this one)
+
+        Returns:
+            List of (sheet name, DataFrame, write index) for the non-empty sheets
+        """
+        # Sheet 1: Daily project summary
+        daily_summary = self.get_daily_project_summary(date, context, projects)
+
+        # Sheet 2: Project breakdown
+        project_breakdown = self.get_project_breakdown(date, context, projects)
+
+        # Sheet 3: Weekly hours for the 7 days ending on the report date
+        weekly_hours = self.get_employee_weekly_hours(context=context, end_date=date, projects=projects)
+
+        # Sheet 4: Entries whose hours could not be computed
+        rejected_rows = self.get_rejected_rows(context, projects) if include_rejected else pd.DataFrame()
+
+        sheets = [
+            ('Daily Summary', daily_summary, False),
+            ('Project Totals', project_breakdown, False),
+            ('Weekly Hours', weekly_hours, True),
+            ('Rejected Rows', rejected_rows, False)
+        ]
+        return [sheet for sheet in sheets if not sheet[1].empty]
+
+    def get_range_totals(self, start_date: str, end_date: str,
+                         batch_size: int = DEFAULT_BATCH_SIZE) -> LaborTotals:
+        """
+        Stream a date range of time entries into per-project and per-employee totals
+
+        Entries are read page by page and folded into running totals
+        batch_size rows at a time, so memory does not grow with the range.
+
+        Args:
+            start_date: First day (YYYY-MM-DD)
+            end_date: Last day (YYYY-MM-DD)
+            batch_size: Rows converted per batch
+
+        Returns:
+            LaborTotals for the range
+        """
+        if hasattr(self.client, 'iter_time_entries'):
+            time_entries = self.client.iter_time_entries(start_date, end_date)
+        else:
+            time_entries = self.client.get_time_entries(start_date, end_date)
+
+        totals = LaborTotals().add_entries(time_entries, batch_size, default_date=start_date)
+        self.last_rejected_rows = totals.rejected_rows
+        return totals
+
+    def export_range_report(self, output_path: str, start_date: str, end_date: str,
+                            batch_size: int = DEFAULT_BATCH_SIZE, report_format: str = 'xlsx'):
+        """
+        Export project and employee totals for a date range (e.g. a month) to Excel
+
+        Args:
+            output_path: Path to save Excel file
+            start_date: First day (YYYY-MM-DD)
+            end_date: Last day (YYYY-MM-DD)
+            batch_size: Rows converted per batch while streaming
+            report_format: 'xlsx', 'csv' or 'parquet' (a .zip with one file per sheet)
+        """
+        totals = self.get_range_totals(start_date, end_date, batch_size)
+        employee_map = {emp['id']: emp for emp in self.client.get_employees()}
+
+        with open_report_writer(output_path, report_format) as writer:
+            summary = pd.DataFrame({
+                'Start_Date': [start_date],
+                'End_Date': [end_date],
+                'Total_Hours': [round(totals.total_hours, 2)],
+                'Entry_Count': [totals.entry_count]
+            })
+            writer.write_frame('Summary', summary)
+
+            project_totals = totals.project_frame()
+            if not project_totals.empty:
+                writer.write_frame('Project Totals', project_totals)
+
+            employee_totals = totals.employee_frame(employee_map)
+            if not employee_totals.empty:
+                writer.write_frame('Employee Totals', employee_totals)
+
+            rejected_rows = totals.rejected_rows
+            if not rejected_rows.empty:
+                writer.write_frame('Rejected Rows', rejected_rows)
+
+        print(f"Range report generated successfully: {output_path}")
+
+    def weekly_range(self, end_date: str = None) -> Tuple[str, str]:
+        """Get the (start, end) dates of the trailing 7-day window ending on end_date (default today)"""
+        end_date = datetime.strptime(end_date, '%Y-%m-%d') if end_date else datetime.now()
+        start_date = end_date - timedelta(days=6)
+        return start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')
+
+    def range_entry_frame(self, context: ReportContext, start_date: str, end_date: str,
+                          projects: Iterable[str] = None) -> pd.DataFrame:
+        """
+        Get every time entry of a date range as a report frame
+
+        Args:
+            context: Report context to read data from (fetching any missing days)
+            start_date: First day (YYYY-MM-DD)
+            end_date: Last day (YYYY-MM-DD)
+            projects: Optional job codes to limit the entries to
+
+        Returns:
+            DataFrame with the daily summary columns plus User_ID and Date
+            (empty if there are no entries)
+        """
+        batch, employee_map = self._fetch_inputs(start_date, end_date, context, projects)
+        return self._build_entry_frame(batch, employee_map, context, (start_date, end_date))
+
+    def _fetch_inputs(self, start_date: str, end_date: str, context: ReportContext = None,
+                      projects: Iterable[str] = None) -> Tuple[TimeEntryBatch, Dict[str, Dict]]:
+        """
+        Get time entries and the employee roster for a date range
+
+        Without a context, a one-off context is used so the roster and time
+        entries are still fetched concurrently. With projects, entries for
+        other job codes are dropped here, before any frame is built.
+
+        Returns:
+            Tuple of (time entry batch, employee_map)
+        """
+        if context is None:
+            context = ReportContext(self.client)
+        with stage('fetch'):
+            context.prefetch(start_date, end_date)
+            batch = context.get_time_entry_batch(start_date, end_date)
+            if projects is not None:
+                batch = batch.in_values('job_code', projects)
+            return batch, context.employee_map
+
+    def _build_entry_frame(self, batch: TimeEntryBatch, employee_map: Dict[str, Dict],
+                           context: ReportContext = None,
+                           date_range: Tuple[str, str] = None) -> pd.DataFrame:
+        """
+        Turn a time entry batch into a report frame and record its rejected rows
+
+        Args:
+            batch: Time entries with hours already computed
+            employee_map: Employees keyed by Rippling user ID
+            context: Optional report context to record rejected rows in
+            date_range: (start, end) the entries were fetched for
+
+        Returns:
+            DataFrame with the daily summary columns plus User_ID and Date
+        """
+        rejected = batch.rejected_rows
+        self.last_rejected_rows = rejected
+        if context is not None:
+            context.views[('rejected_rows',) + tuple(date_range or ())] = rejected
+        return self.entry_frame(batch, employee_map)
+
+    def entry_frame(self, batch: TimeEntryBatch, employee_map: Dict[str, Dict]) -> pd.DataFrame:
+        """
+        Turn a time entry batch into a report frame
+
+        Employee lookups run once per distinct employee and are then
+        broadcast by category code. Unlike the report methods, this does
+        not record the batch's rejected rows, so it is safe to call from
+        background refreshes.
+
+        Args:
+            batch: Time entries with hours already computed
+            employee_map: Employees keyed by Rippling user ID
+
+        Returns:
+            DataFrame with the daily summary columns plus User_ID and Date
+            (empty if the batch has no rows)
+        """
+        if not len(batch):
+            return pd.DataFrame()
+
+        with stage('transform'):
+            names = {emp_id: f"{emp.get('first_name', '')} {emp.get('last_name', '')}"
+                     for emp_id, emp in employee_map.items()}
+            badge_ids = {emp_id: emp.get('employee_id', 'N/A') for emp_id, emp in employee_map.items()}
+
+            return pd.DataFrame({
+                'Employee': batch.map_values('employee_id', names, ' '),
+                'Employee_ID': batch.map_values('employee_id', badge_ids, 'N/A'),
+                'Project': batch.values('job_code'),
+                'Job_Dimension': batch.values('dimension_name'),
+                'Hours': batch['hours'],
+                'Clock_In': batch['start_time'],
+                'Clock_Out': batch['end_time'],
+                'Status': batch.values('status'),
+                'User_ID': batch.values('employee_id'),
+                'Date': batch.values('date'),
+            })
+
+    def get_rejected_rows(self, context: ReportContext = None,
+                          projects: Iterable[str] = None) -> pd.DataFrame:
+        """
+        Get time entries whose hours could not be computed
+
+        Args:
+            context: Report context to collect rejected rows from; the last
+                     report's rejected rows are returned if not given
+            projects: Optional job codes to limit the rows to
+
+        Returns:
+            DataFrame with row, id, job_code, reason and the raw hour fields
+        """
+        if context is None:
+            rejected = self.last_rejected_rows
+        else:
+            frames = [view for key, view in context.views.items()
+                      if key[0] == 'rejected_rows' and not view.empty]
+            if not frames:
+                return pd.DataFrame()
+            rejected = pd.concat(frames, ignore_index=True).drop_duplicates(subset=['id', 'reason'])
+
+        if projects is not None and not rejected.empty:
+            rejected = rejected[rejected['job_code'].isin(set(projects))]
+        return rejected
 
     def _calculate_hours(self, time_entry: Dict) -> float:
         """
         Calculate hours from a time entry
 
+        Per-entry reference implementation; reports use hours computed by
+        labor_hours.compute_hours when a TimeEntryBatch is built.
+
         Args:
             time_entry: Time entry dictionary from API
 
@@ -209,12 +455,13 @@ class ProjectLaborReportGenerator:
 
         return 0.0
 
-    def print_daily_summary(self, date: str = None):
+    def print_daily_summary(self, date: str = None, context: ReportContext = None):
         """
         Print a formatted daily summary to console
 
         Args:
             date: Date in YYYY-MM-DD format (defaults to today)
+            context: Optional report context shared with other reports
         """
         if not date:
             date = datetime.now().strftime('%Y-%m-%d')
@@ -224,14 +471,16 @@ class ProjectLaborReportGenerator:
         print(f"Date: {date}")
         print(f"{'='*80}\n")
 
-        daily_summary = self.get_daily_project_summary(date)
+        if context is None:
+            context = self.build_report_context(date)
+        daily_summary = self.get_daily_project_summary(date, context)
 
         if daily_summary.empty:
             print("No time entries found for this date.")
             return
 
         # Print project breakdown
-        project_breakdown = self.get_project_breakdown(date)
+        project_breakdown = self.get_project_breakdown(date, context)
         print("PROJECT SUMMARY:")
         print("-" * 80)
         for _, row in project_breakdown.iterrows():
@@ -258,12 +507,15 @@ def main():
     # Get today's date
     today = datetime.now().strftime('%Y-%m-%d')
 
+    # Fetch today's data and the trailing week once for both outputs
+    context = generator.build_report_context(*generator.weekly_range())
+
     # Print console summary
-    generator.print_daily_summary(today)
+    generator.print_daily_summary(today, context)
 
     # Export to Excel
     output_file = f"Capitol_Labor_Report_{today}.xlsx"
-    generator.export_foreman_report(output_file, today)
+    generator.export_foreman_report(output_file, today, context)
 
 
 if __name__ == "__main__":
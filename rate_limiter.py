@@ -0,0 +1,265 @@
+"""
+Client-side rate limiting for Rippling API requests
+Token bucket scheduler shared by every API client in the process
+
+Keeps request throughput just under Rippling's rate limit instead of
+failing whole reports on 429 responses, and tracks per-endpoint queue
+depth and wait times.
+
+Date created: 2025-10-31
+"""
+
+import asyncio
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+# Default request rate (requests/second) and burst size. Override with the
+# RIPPLING_RATE_LIMIT and RIPPLING_RATE_BURST environment variables.
+DEFAULT_RATE = 10.0
+DEFAULT_BURST = 20
+
+# Retry policy for 429 and 5xx responses
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 30.0
+
+# Longest Retry-After honored; a 429 pauses every caller in the process,
+# so one bad header must not stall them all for an hour
+DEFAULT_RETRY_AFTER_MAX = 60.0
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Path segments that identify a record rather than a resource type: numbers,
+# UUIDs, long hex ids and prefixed ids like dim_001. Version and name
+# segments such as 'v1' or '2024-reports' are kept as they are.
+_ID_SEGMENT = re.compile(
+    r'^(?:\d+'
+    r'|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}'
+    r'|(?=[a-fA-F]*\d)[0-9a-fA-F]{16,}'
+    r'|[A-Za-z]+_\d+)$'
+)
+
+
+def endpoint_key(endpoint: str) -> str:
+    """
+    Normalize an endpoint path for per-endpoint statistics
+
+    '/job-dimensions/dim_001/jobs' becomes '/job-dimensions/{id}/jobs'
+    """
+    segments = endpoint.split('?', 1)[0].split('/')
+    return '/'.join('{id}' if _ID_SEGMENT.match(seg) else seg for seg in segments)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header value into seconds
+
+    Args:
+        value: Header value, either delta-seconds or an HTTP date
+
+    Returns:
+        Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RateLimitScheduler:
+    """Token bucket request scheduler with retry backoff and per-endpoint stats"""
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff_base: float = DEFAULT_BACKOFF_BASE,
+                 backoff_max: float = DEFAULT_BACKOFF_MAX,
+                 retry_after_max: float = DEFAULT_RETRY_AFTER_MAX):
+        """
+        Initialize the scheduler
+
+        Args:
+            rate: Sustained requests per second
+            burst: Maximum requests allowed back-to-back after an idle period
+            max_retries: Retries for 429 and 5xx responses before giving up
+            backoff_base: First retry delay in seconds when no Retry-After is given
+            backoff_max: Upper bound for a single retry delay in seconds
+            retry_after_max: Upper bound for a Retry-After delay in seconds
+        """
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_after_max = retry_after_max
+
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._stats: Dict[str, Dict] = {}
+
+    def _endpoint_stats(self, key: str) -> Dict:
+        """Get (creating if needed) the stats record for an endpoint; caller holds the lock"""
+        if key not in self._stats:
+            self._stats[key] = {
+                'requests': 0,
+                'queue_depth': 0,
+                'max_queue_depth': 0,
+                'total_wait': 0.0,
+                'max_wait': 0.0,
+                'retries': 0,
+                'throttled': 0,
+                'server_errors': 0
+            }
+        return self._stats[key]
+
+    def _reserve(self, endpoint: str) -> float:
+        """Take a token and return how long the caller must wait before sending"""
+        key = endpoint_key(endpoint)
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            # Tokens may go negative: each queued caller waits for its own slot
+            self._tokens -= 1
+            wait = max(0.0, -self._tokens / self.rate, self._paused_until - now)
+
+            stats = self._endpoint_stats(key)
+            stats['queue_depth'] += 1
+            stats['max_queue_depth'] = max(stats['max_queue_depth'], stats['queue_depth'])
+        return wait
+
+    def _release(self, endpoint: str, waited: float):
+        """Record a finished wait for an endpoint"""
+        key = endpoint_key(endpoint)
+        with self._lock:
+            stats = self._endpoint_stats(key)
+            stats['queue_depth'] -= 1
+            stats['requests'] += 1
+            stats['total_wait'] += waited
+            stats['max_wait'] = max(stats['max_wait'], waited)
+
+    def acquire(self, endpoint: str) -> float:
+        """
+        Block until a request to endpoint may be sent
+
+        Returns:
+            Seconds spent waiting
+        """
+        wait = self._reserve(endpoint)
+        try:
+            if wait > 0:
+                time.sleep(wait)
+        finally:
+            self._release(endpoint, wait)
+        return wait
+
+    async def acquire_async(self, endpoint: str) -> float:
+        """asyncio version of acquire()"""
+        wait = self._reserve(endpoint)
+        try:
+            if wait > 0:
+                await asyncio.sleep(wait)
+        finally:
+            self._release(endpoint, wait)
+        return wait
+
+    def retry_delay(self, endpoint: str, attempt: int, status_code: int,
+                    retry_after: Optional[float] = None) -> float:
+        """
+        Work out how long to wait before retrying a throttled or failed request
+
+        A Retry-After value is honored up to retry_after_max and pauses
+        every caller sharing this scheduler. Otherwise the delay is exponential backoff with full
+        jitter.
+
+        Args:
+            endpoint: Endpoint that failed
+            attempt: Zero-based retry attempt number
+            status_code: HTTP status of the failed response
+            retry_after: Parsed Retry-After header in seconds, if any
+
+        Returns:
+            Seconds to wait before the retry
+        """
+        if retry_after is not None:
+            delay = min(retry_after, self.retry_after_max)
+            if delay < retry_after:
+                print(f"Retry-After of {retry_after:.0f}s from {endpoint_key(endpoint)} "
+                      f"capped at {self.retry_after_max:.0f}s")
+        else:
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+        with self._lock:
+            stats = self._endpoint_stats(endpoint_key(endpoint))
+            stats['retries'] += 1
+            if status_code == 429:
+                stats['throttled'] += 1
+            else:
+                stats['server_errors'] += 1
+
+            if status_code == 429:
+                # The limit is account-wide, so hold back every queued request
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                self._tokens = min(self._tokens, 0.0)
+
+        return delay
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """
+        Get per-endpoint scheduler statistics
+
+        Returns:
+            Dictionary keyed by normalized endpoint with request count,
+            current and max queue depth, average/max wait (ms), retries,
+            throttled (429) and server error counts
+        """
+        with self._lock:
+            result = {}
+            for key, stats in self._stats.items():
+                result[key] = {
+                    'requests': stats['requests'],
+                    'queue_depth': stats['queue_depth'],
+                    'max_queue_depth': stats['max_queue_depth'],
+                    'avg_wait_ms': round(stats['total_wait'] / stats['requests'] * 1000, 1) if stats['requests'] else 0.0,
+                    'max_wait_ms': round(stats['max_wait'] * 1000, 1),
+                    'retries': stats['retries'],
+                    'throttled': stats['throttled'],
+                    'server_errors': stats['server_errors']
+                }
+            return result
+
+
+_shared_scheduler = None
+_shared_scheduler_lock = threading.Lock()
+
+
+def get_shared_scheduler() -> RateLimitScheduler:
+    """Get the process-wide scheduler shared by all API clients"""
+    global _shared_scheduler
+    with _shared_scheduler_lock:
+        if _shared_scheduler is None:
+            _shared_scheduler = RateLimitScheduler(
+                rate=float(os.getenv('RIPPLING_RATE_LIMIT', DEFAULT_RATE)),
+                burst=int(os.getenv('RIPPLING_RATE_BURST', DEFAULT_BURST))
+            )
+        return _shared_scheduler
@@ -0,0 +1,150 @@
+"""
+Report Context for Capitol Engineering labor reports
+Fetches raw Rippling data once and shares it between report views
+
+A foreman report needs the daily summary, project totals and the weekly
+pivot. Each of those used to download the roster and time entries on its
+own. A ReportContext downloads the roster once and each day of time
+entries once, keeps the entries as columnar TimeEntryBatch objects, and
+memoizes the derived views.
+
+Date created: 2025-10-31
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from metrics import ROWS_PROCESSED
+from request_timing import propagate, stage
+from time_entry_batch import TimeEntryBatch
+
+
+def entry_work_date(entry: Dict) -> str:
+    """Get the YYYY-MM-DD work date of a time entry"""
+    return (entry.get('date') or entry.get('start_time') or '')[:10]
+
+
+def date_range(start_date: str, end_date: str) -> List[str]:
+    """List every YYYY-MM-DD day from start_date to end_date inclusive"""
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    end = datetime.strptime(end_date, '%Y-%m-%d')
+    return [(start + timedelta(days=i)).strftime('%Y-%m-%d') for i in range((end - start).days + 1)]
+
+
+def project_scope(projects: Optional[Iterable[str]] = None) -> Optional[Tuple[str, ...]]:
+    """Normalize a set of job codes into a hashable key (None means every project)"""
+    return None if projects is None else tuple(sorted(set(projects)))
+
+
+class ReportContext:
+    """Raw report inputs for one roster snapshot and a set of dates"""
+
+    def __init__(self, client, start_date: Optional[str] = None,
+                 end_date: Optional[str] = None):
+        """
+        Initialize the context
+
+        Args:
+            client: RipplingAPIClient (or TimeEntryStore) to read from
+            start_date: Optional first day to fetch up front (YYYY-MM-DD)
+            end_date: Optional last day to fetch up front (defaults to start_date)
+        """
+        self.client = client
+        self.views: Dict[Tuple, object] = {}
+        self.fetch_count = 0
+
+        self._lock = threading.RLock()
+        self._employees: Optional[List[Dict]] = None
+        self._employee_map: Optional[Dict[str, Dict]] = None
+        self._fetched_days = set()
+        self._batches: List[TimeEntryBatch] = []
+
+        if start_date:
+            self.prefetch(start_date, end_date or start_date)
+
+    def _missing_spans(self, start_date: str, end_date: str) -> List[Tuple[str, str]]:
+        """Group the days not fetched yet into contiguous (start, end) spans"""
+        spans = []
+        for day in date_range(start_date, end_date):
+            if day in self._fetched_days:
+                continue
+            if spans and spans[-1][1] == (
+                datetime.strptime(day, '%Y-%m-%d') - timedelta(days=1)
+            ).strftime('%Y-%m-%d'):
+                spans[-1] = (spans[-1][0], day)
+            else:
+                spans.append((day, day))
+        return spans
+
+    def _store_entries(self, start_date: str, end_date: str, entries: List[Dict]):
+        """Convert a fetched span of entries to a batch; the raw dicts are not kept"""
+        with stage('transform'):
+            self._batches.append(TimeEntryBatch.from_entries(entries, default_date=start_date))
+        ROWS_PROCESSED.inc(len(entries), stage='time_entries')
+        self._fetched_days.update(date_range(start_date, end_date))
+        self.fetch_count += 1
+
+    def prefetch(self, start_date: str, end_date: str):
+        """
+        Fetch the roster and any missing days of time entries concurrently
+
+        Args:
+            start_date: First day (YYYY-MM-DD)
+            end_date: Last day (YYYY-MM-DD)
+        """
+        with self._lock:
+            spans = self._missing_spans(start_date, end_date)
+            need_roster = self._employees is None
+            if not spans and not need_roster:
+                return
+
+            with ThreadPoolExecutor(max_workers=len(spans) + 1) as executor:
+                roster_future = executor.submit(propagate(self.client.get_employees)) if need_roster else None
+                span_futures = [
+                    (span, executor.submit(propagate(self.client.get_time_entries),
+                                           start_date=span[0], end_date=span[1]))
+                    for span in spans
+                ]
+
+                if roster_future is not None:
+                    self._employees = roster_future.result()
+                    self._employee_map = {emp['id']: emp for emp in self._employees}
+                for (span_start, span_end), future in span_futures:
+                    self._store_entries(span_start, span_end, future.result())
+
+    def get_employees(self) -> List[Dict]:
+        """Get the roster snapshot, fetching it on first use"""
+        with self._lock:
+            if self._employees is None:
+                self._employees = self.client.get_employees()
+                self._employee_map = {emp['id']: emp for emp in self._employees}
+            return self._employees
+
+    @property
+    def employee_map(self) -> Dict[str, Dict]:
+        """Employees keyed by Rippling user ID"""
+        self.get_employees()
+        return self._employee_map
+
+    def get_time_entry_batch(self, start_date: str, end_date: str) -> TimeEntryBatch:
+        """
+        Get time entries for a date range, fetching only days not seen yet
+
+        Args:
+            start_date: First day (YYYY-MM-DD)
+            end_date: Last day (YYYY-MM-DD)
+
+        Returns:
+            TimeEntryBatch of the entries whose work date is in the range
+        """
+        with self._lock:
+            for span_start, span_end in self._missing_spans(start_date, end_date):
+                self._store_entries(
+                    span_start, span_end,
+                    self.client.get_time_entries(start_date=span_start, end_date=span_end)
+                )
+            batches = list(self._batches)
+
+        return TimeEntryBatch.concat(batch.between_dates(start_date, end_date) for batch in batches)
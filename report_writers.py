@@ -0,0 +1,335 @@
+"""
+Streaming report writers for Capitol Engineering
+Write report sheets chunk by chunk to xlsx, CSV or Parquet
+
+pd.ExcelWriter with openpyxl builds a cell object for every value and
+holds the whole workbook until it is saved, so memory grows with the
+report (roughly a kilobyte per row for the daily summary). These writers
+take each sheet as a stream of DataFrame chunks and write rows as they
+arrive:
+
+    xlsx     write-only worksheets; XlsxWriter in constant-memory mode
+             when the optional `xlsxwriter` package is installed,
+             openpyxl write-only mode otherwise
+    csv      a .zip with one CSV file per sheet
+    parquet  a .zip with one Parquet file per sheet (needs `pyarrow`)
+
+Values are written as-is, without pandas' header styling or merged index
+cells; sheets written with index=True get their index as leading columns.
+An xlsx sheet holds at most 1,048,576 rows, so longer sheets continue on
+'<name> (2)', '<name> (3)', ... each with the header repeated.
+
+Date created: 2025-10-31
+"""
+
+import io
+import os
+import tempfile
+import zipfile
+from abc import ABC, abstractmethod
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from metrics import ROWS_PROCESSED
+
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+
+REPORT_FORMATS = ('xlsx', 'csv', 'parquet')
+
+# File extension of each format's artifact
+FORMAT_EXTENSIONS = {'xlsx': '.xlsx', 'csv': '.zip', 'parquet': '.zip'}
+
+# Rows converted and written at a time when a sheet is given as one DataFrame
+DEFAULT_CHUNK_ROWS = 10000
+
+# Rows (header included) an xlsx worksheet can hold, and its name length limit
+XLSX_MAX_ROWS = 1048576
+XLSX_MAX_SHEET_NAME = 31
+
+
+def frame_chunks(df: pd.DataFrame, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                 index: bool = False) -> Iterator[pd.DataFrame]:
+    """
+    Split a DataFrame into row chunks for a report writer
+
+    Args:
+        df: Sheet data
+        chunk_rows: Rows per chunk
+        index: Include the index as leading columns
+
+    Yields:
+        DataFrame slices of at most chunk_rows rows
+    """
+    if index:
+        df = df.reset_index()
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def _python_rows(chunk: pd.DataFrame) -> Iterator[tuple]:
+    """Rows of a chunk as tuples of plain Python values, with missing values as None"""
+    values = chunk.astype(object)
+    return values.where(chunk.notna(), None).itertuples(index=False, name=None)
+
+
+class ReportWriter(ABC):
+    """Base class: writes named sheets, each from a stream of DataFrame chunks"""
+
+    extension = ''
+
+    def __init__(self, output_path: str):
+        """
+        Initialize the writer
+
+        Args:
+            output_path: Path of the artifact to create
+        """
+        self.output_path = output_path
+        self.rows_written = 0
+
+    def write_frame(self, sheet_name: str, df: pd.DataFrame, index: bool = False,
+                    chunk_rows: int = DEFAULT_CHUNK_ROWS):
+        """
+        Write a DataFrame as a sheet, chunk_rows at a time
+
+        Args:
+            sheet_name: Sheet (or file) name
+            df: Sheet data
+            index: Include the index as leading columns
+            chunk_rows: Rows converted and written at a time
+        """
+        columns = list(df.reset_index().columns) if index else list(df.columns)
+        self.write_chunks(sheet_name, frame_chunks(df, chunk_rows, index), columns)
+
+    @abstractmethod
+    def write_chunks(self, sheet_name: str, chunks: Iterable[pd.DataFrame],
+                     columns: Optional[List[str]] = None):
+        """
+        Write a sheet from DataFrame chunks as they are produced
+
+        Args:
+            sheet_name: Sheet (or file) name
+            chunks: DataFrames with the same columns, written in order
+            columns: Header row; taken from the first chunk if not given
+        """
+
+    def close(self):
+        """Finish and close the artifact"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        if exc_type is None:
+            ROWS_PROCESSED.inc(self.rows_written, stage='report_rows')
+
+
+class XlsxReportWriter(ReportWriter):
+    """xlsx workbook written row by row without keeping cells in memory"""
+
+    extension = '.xlsx'
+    max_rows = XLSX_MAX_ROWS
+
+    def __init__(self, output_path: str, engine: Optional[str] = None):
+        """
+        Initialize the writer
+
+        Args:
+            output_path: Path of the workbook to create
+            engine: 'xlsxwriter' or 'openpyxl' (defaults to xlsxwriter when installed)
+        """
+        super().__init__(output_path)
+        self.engine = engine or ('xlsxwriter' if xlsxwriter is not None else 'openpyxl')
+
+        if self.engine == 'xlsxwriter':
+            if xlsxwriter is None:
+                raise ImportError("xlsxwriter is not installed")
+            self._workbook = xlsxwriter.Workbook(output_path, {
+                'constant_memory': True,
+                'strings_to_numbers': False,
+                'strings_to_formulas': False,
+                'strings_to_urls': False
+            })
+        else:
+            from openpyxl import Workbook
+            self._workbook = Workbook(write_only=True)
+
+    def write_chunks(self, sheet_name: str, chunks: Iterable[pd.DataFrame],
+                     columns: Optional[List[str]] = None):
+        append = self._add_sheet(sheet_name)
+        header = [str(name) for name in columns] if columns is not None else None
+        if header is not None:
+            append(header)
+        sheet_rows = 1
+        part = 1
+
+        for chunk in chunks:
+            if header is None:
+                header = [str(name) for name in chunk.columns]
+                append(header)
+            start = 0
+            while start < len(chunk):
+                if sheet_rows >= self.max_rows:
+                    # Sheet full: continue on the next one under the same header
+                    part += 1
+                    append = self._add_sheet(_continuation_name(sheet_name, part))
+                    append(header)
+                    sheet_rows = 1
+                take = min(len(chunk) - start, self.max_rows - sheet_rows)
+                for row in _python_rows(chunk.iloc[start:start + take]):
+                    append(row)
+                start += take
+                sheet_rows += take
+            self.rows_written += len(chunk)
+
+    def _add_sheet(self, sheet_name: str):
+        """Add a worksheet and return an append(row) function for it"""
+        if self.engine == 'xlsxwriter':
+            return self._xlsxwriter_appender(self._workbook.add_worksheet(sheet_name))
+        return self._workbook.create_sheet(sheet_name).append
+
+    @staticmethod
+    def _xlsxwriter_appender(worksheet):
+        """Return an append(row) function for an XlsxWriter worksheet"""
+        next_row = [0]
+
+        def append(row):
+            worksheet.write_row(next_row[0], 0, row)
+            next_row[0] += 1
+        return append
+
+    def close(self):
+        if self.engine == 'xlsxwriter':
+            self._workbook.close()
+        else:
+            self._workbook.save(self.output_path)
+
+
+def _continuation_name(sheet_name: str, part: int) -> str:
+    """Name of a sheet's part-th worksheet, e.g. 'Daily Summary (2)', within Excel's length limit"""
+    suffix = f' ({part})'
+    return sheet_name[:XLSX_MAX_SHEET_NAME - len(suffix)] + suffix
+
+
+class CsvReportWriter(ReportWriter):
+    """Zip archive with one CSV file per sheet"""
+
+    extension = '.zip'
+
+    def __init__(self, output_path: str):
+        super().__init__(output_path)
+        self._archive = zipfile.ZipFile(output_path, 'w', compression=zipfile.ZIP_DEFLATED)
+
+    def write_chunks(self, sheet_name: str, chunks: Iterable[pd.DataFrame],
+                     columns: Optional[List[str]] = None):
+        with self._archive.open(f'{sheet_name}.csv', 'w') as member:
+            with io.TextIOWrapper(member, encoding='utf-8', newline='') as stream:
+                if columns is not None:
+                    pd.DataFrame(columns=columns).to_csv(stream, index=False)
+                for chunk in chunks:
+                    chunk.to_csv(stream, index=False, header=columns is None)
+                    columns = list(chunk.columns)
+                    self.rows_written += len(chunk)
+
+    def close(self):
+        self._archive.close()
+
+
+class ParquetReportWriter(ReportWriter):
+    """Zip archive with one Parquet file per sheet, one row group per chunk"""
+
+    extension = '.zip'
+
+    def __init__(self, output_path: str):
+        # Imported here: pyarrow is optional and slow to import
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("pyarrow is required for Parquet reports")
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        super().__init__(output_path)
+        self._archive = zipfile.ZipFile(output_path, 'w', compression=zipfile.ZIP_STORED)
+
+    def write_chunks(self, sheet_name: str, chunks: Iterable[pd.DataFrame],
+                     columns: Optional[List[str]] = None):
+        # Parquet needs a seekable file, so each sheet goes to a temporary
+        # file first and is then copied into the archive
+        pa, pq = self._pa, self._pq
+        handle, temp_path = tempfile.mkstemp(suffix='.parquet')
+        os.close(handle)
+        writer = None
+        try:
+            for chunk in chunks:
+                # Categories differ between chunks; store plain values
+                chunk = chunk.astype({name: object for name, dtype in chunk.dtypes.items()
+                                      if isinstance(dtype, pd.CategoricalDtype)})
+                if writer is None:
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    # Columns that are all missing in the first chunk hold text later
+                    schema = pa.schema([field.with_type(pa.string()) if pa.types.is_null(field.type)
+                                        else field for field in table.schema])
+                    writer = pq.ParquetWriter(temp_path, schema)
+                table = pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False)
+                writer.write_table(table)
+                self.rows_written += len(chunk)
+
+            if writer is None:
+                schema = pa.schema([(str(name), pa.string()) for name in columns or []])
+                writer = pq.ParquetWriter(temp_path, schema)
+            writer.close()
+            writer = None
+            self._archive.write(temp_path, f'{sheet_name}.parquet')
+        finally:
+            if writer is not None:
+                writer.close()
+            os.remove(temp_path)
+
+    def close(self):
+        self._archive.close()
+
+
+def open_report_writer(output_path: str, report_format: str = 'xlsx') -> ReportWriter:
+    """
+    Create the writer for a report format
+
+    Args:
+        output_path: Path of the artifact to create
+        report_format: One of REPORT_FORMATS
+
+    Returns:
+        ReportWriter; use it as a context manager so the artifact is closed
+    """
+    if report_format == 'xlsx':
+        return XlsxReportWriter(output_path)
+    if report_format == 'csv':
+        return CsvReportWriter(output_path)
+    if report_format == 'parquet':
+        return ParquetReportWriter(output_path)
+    raise ValueError(f"Unknown report format: {report_format} (expected one of {', '.join(REPORT_FORMATS)})")
+
+
+def write_report(output_path: str, sheets: Iterable[Tuple[str, pd.DataFrame, bool]],
+                 report_format: str = 'xlsx') -> int:
+    """
+    Write prepared sheets to a report file
+
+    Args:
+        output_path: Path of the artifact to create
+        sheets: (sheet name, DataFrame, write index) in sheet order
+        report_format: One of REPORT_FORMATS
+
+    Returns:
+        Number of data rows written
+    """
+    with open_report_writer(output_path, report_format) as writer:
+        for sheet_name, sheet, index in sheets:
+            writer.write_frame(sheet_name, sheet, index=index)
+    return writer.rows_written
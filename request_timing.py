@@ -0,0 +1,334 @@
+"""
+Request Timing for Capitol Engineering
+Per-stage timings, Server-Timing headers and slow-request profiles
+
+Code on the request path marks its stages with stage():
+
+    with stage('rippling'):
+        response = session.get(...)
+
+Inside a Flask request (see register_request_timing) each stage's time
+and call count are summed into a per-request breakdown, sent back as a
+Server-Timing header (shown in the browser's network panel) and logged as
+one JSON line. Outside a request stage() only costs a context variable
+lookup. Stages run on worker threads count when the work is submitted
+through propagate(); their time is summed, so a stage can add up to more
+than the request's wall time.
+
+Stages used: rippling (HTTP calls to Rippling), rippling_wait (rate limit
+and retry waits), fetch (report inputs, including rippling), transform
+(entries to batches and frames, including hours), aggregate (sort,
+group and pivot), render (report files), serialize (JSON and
+compression) and total.
+
+Configuration (environment variables):
+
+    REQUEST_TIMING_LOG    true to log every request (slow ones are always logged)
+    SLOW_REQUEST_MS       requests at least this slow are logged and profiled (1000)
+    PROFILE_MODE          cprofile or sampling to profile slow requests (off by default)
+    PROFILE_DIR           where profiles are written (profiles)
+    PROFILE_SAMPLE_MS     sampling interval for PROFILE_MODE=sampling (5)
+
+cProfile traces every function call of a request while enabled and
+keeps the .prof file (open with pstats or snakeviz) only for slow ones.
+Only one cProfile profiler can run at a time (Python 3.12+ rejects a
+second, and before that they distort each other), so with concurrent
+requests only one is profiled and the rest are just timed.
+Sampling mode is much cheaper: a background thread records the request
+thread's stack every few milliseconds and writes collapsed stacks
+(.folded, for flamegraph.pl or speedscope).
+
+Timing lines go to the 'request_timing' logger, which prints them to
+stdout unless the application configures a handler for it.
+
+Date created: 2025-10-31
+"""
+
+import contextvars
+import cProfile
+import functools
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+
+SLOW_REQUEST_MS = float(os.getenv('SLOW_REQUEST_MS', '1000'))
+LOG_ALL_REQUESTS = os.getenv('REQUEST_TIMING_LOG', 'false').lower() == 'true'
+
+PROFILE_MODES = ('cprofile', 'sampling')
+PROFILE_MODE = os.getenv('PROFILE_MODE', '').lower()
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+PROFILE_SAMPLE_MS = float(os.getenv('PROFILE_SAMPLE_MS', '5'))
+
+# Server-Timing metric names are HTTP tokens
+_TOKEN_UNSAFE = re.compile(r'[^A-Za-z0-9_.-]')
+
+logger = logging.getLogger('request_timing')
+if not logger.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+# Held by the request being profiled with cProfile
+_cprofile_lock = threading.Lock()
+
+_current: 'contextvars.ContextVar[Optional[RequestTimings]]' = contextvars.ContextVar(
+    'request_timings', default=None
+)
+
+
+class RequestTimings:
+    """Summed time and call count per stage for one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._stages: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float):
+        """Add one timed call of a stage"""
+        with self._lock:
+            totals = self._stages.setdefault(name, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += 1
+
+    def elapsed(self) -> float:
+        """Seconds since the request started"""
+        return time.perf_counter() - self.started
+
+    def stages(self) -> Dict[str, Tuple[float, int]]:
+        """Stage name -> (seconds, calls), in the order stages first ran"""
+        with self._lock:
+            return {name: (seconds, calls) for name, (seconds, calls) in self._stages.items()}
+
+    def server_timing(self, total: Optional[float] = None) -> str:
+        """Format the stages (and total) as a Server-Timing header value"""
+        metrics = [f'{_TOKEN_UNSAFE.sub("_", name)};dur={seconds * 1000:.1f};desc="{calls}x"'
+                   for name, (seconds, calls) in self.stages().items()]
+        metrics.append(f'total;dur={(self.elapsed() if total is None else total) * 1000:.1f}')
+        return ', '.join(metrics)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    """Timings of the request being handled, or None outside a request"""
+    return _current.get()
+
+
+@contextmanager
+def stage(name: str):
+    """Time the enclosed block as one call of a stage of the current request"""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
+
+def timed(name: str) -> Callable:
+    """Decorator form of stage()"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def propagate(func: Callable) -> Callable:
+    """
+    Carry the current request's timings into func when it runs on another thread
+
+    Wrap callables handed to a thread pool; returns func unchanged outside
+    a request.
+    """
+    timings = _current.get()
+    if timings is None:
+        return func
+
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        token = _current.set(timings)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current.reset(token)
+    return run
+
+
+class StackSampler:
+    """Background thread that samples the stacks of registered threads"""
+
+    def __init__(self, interval: float):
+        """
+        Initialize the sampler
+
+        Args:
+            interval: Seconds between samples
+        """
+        self.interval = interval
+        self._threads: Dict[int, Counter] = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def begin(self, thread_id: int):
+        """Start collecting samples for a thread"""
+        with self._lock:
+            self._threads[thread_id] = Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+                self._thread.start()
+
+    def end(self, thread_id: int) -> Counter:
+        """Stop collecting for a thread and return its collapsed stack counts"""
+        with self._lock:
+            return self._threads.pop(thread_id, Counter())
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._threads:
+                    continue
+                frames = sys._current_frames()
+                for thread_id, counts in self._threads.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        counts[_collapse(frame)] += 1
+
+
+def _collapse(frame) -> str:
+    """One stack as 'outer;...;inner' of module:function names"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+_sampler: Optional[StackSampler] = None
+_sampler_lock = threading.Lock()
+
+
+def _get_sampler() -> StackSampler:
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = StackSampler(PROFILE_SAMPLE_MS / 1000.0)
+        return _sampler
+
+
+def _profile_path(method: str, path: str, total_ms: float, extension: str) -> str:
+    """File name for a slow request's profile"""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    route = _TOKEN_UNSAFE.sub('_', path.strip('/')) or 'index'
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+    return os.path.join(PROFILE_DIR, f'{stamp}_{method}_{route}_{total_ms:.0f}ms{extension}')
+
+
+def register_request_timing(app, profile_mode: Optional[str] = None):
+    """
+    Time every request of a Flask app
+
+    Adds the Server-Timing header and the timing log, and profiles slow
+    requests when a profile mode is set.
+
+    Args:
+        app: Flask app
+        profile_mode: 'cprofile', 'sampling' or None (defaults to PROFILE_MODE)
+    """
+    # Imported here so the client and report modules do not need Flask
+    from flask import g, request
+
+    profile_mode = PROFILE_MODE if profile_mode is None else profile_mode
+    if profile_mode and profile_mode not in PROFILE_MODES:
+        logger.warning(f"Unknown PROFILE_MODE '{profile_mode}' (expected one of {', '.join(PROFILE_MODES)}); "
+                       "profiling disabled")
+        profile_mode = None
+
+    def stop_cprofile():
+        """Stop this request's cProfile profiler, if it has one, and return it"""
+        profile = g.pop('request_profile', None)
+        if profile is not None:
+            profile.disable()
+            _cprofile_lock.release()
+        return profile
+
+    @app.before_request
+    def start_timing():
+        g.request_timing_token = _current.set(RequestTimings())
+        if profile_mode == 'cprofile':
+            # Skip profiling (not timing) while another request holds the profiler
+            if _cprofile_lock.acquire(blocking=False):
+                g.request_profile = cProfile.Profile()
+                g.request_profile.enable()
+        elif profile_mode == 'sampling':
+            _get_sampler().begin(threading.get_ident())
+
+    @app.after_request
+    def finish_timing(response):
+        timings = _current.get()
+        if timings is None:
+            return response
+        total = timings.elapsed()
+        total_ms = total * 1000
+        slow = total_ms >= SLOW_REQUEST_MS
+
+        profile_path = None
+        try:
+            profile = stop_cprofile()
+            if profile is not None:
+                if slow:
+                    profile_path = _profile_path(request.method, request.path, total_ms, '.prof')
+                    profile.dump_stats(profile_path)
+            elif profile_mode == 'sampling':
+                samples = _get_sampler().end(threading.get_ident())
+                if slow and samples:
+                    profile_path = _profile_path(request.method, request.path, total_ms, '.folded')
+                    with open(profile_path, 'w') as f:
+                        for stack, count in samples.most_common():
+                            f.write(f'{stack} {count}\n')
+        except OSError as e:
+            logger.error(f"Error writing request profile: {e}")
+
+        response.headers['Server-Timing'] = timings.server_timing(total)
+        if slow or LOG_ALL_REQUESTS:
+            record = {
+                'event': 'request_timing',
+                'method': request.method,
+                'path': request.path,
+                'query': request.query_string.decode(errors='replace'),
+                'status': response.status_code,
+                'total_ms': round(total_ms, 1),
+                'slow': slow,
+                'stages': {name: {'ms': round(seconds * 1000, 1), 'calls': calls}
+                           for name, (seconds, calls) in timings.stages().items()}
+            }
+            if profile_path:
+                record['profile'] = profile_path
+            logger.log(logging.WARNING if slow else logging.INFO, json.dumps(record))
+        return response
+
+    @app.teardown_request
+    def clear_timing(exc):
+        # after_request is skipped when a view raises, so stop profiling here too
+        stop_cprofile()
+        if profile_mode == 'sampling':
+            _get_sampler().end(threading.get_ident())
+        token = g.pop('request_timing_token', None)
+        if token is not None:
+            _current.reset(token)
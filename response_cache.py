@@ -0,0 +1,189 @@
+"""
+Response cache for Rippling API requests
+TTL + LRU cache keyed by endpoint and query parameters
+
+The employee roster and job dimensions change rarely, but every report
+and dashboard endpoint asks for them again. Caching GET responses with
+per-endpoint TTLs avoids those repeat downloads.
+
+Date created: 2025-10-31
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional
+
+from metrics import CACHE_REQUESTS
+
+# Default time-to-live per endpoint, in seconds
+DEFAULT_TTLS = {
+    '/users': 6 * 3600,
+    '/job-dimensions': 6 * 3600,
+    '/time-entries': 3600,
+}
+
+# Time entries for ranges that include today are still being edited
+TODAY_TIME_ENTRIES_TTL = 60
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def cache_key(endpoint: str, params: Optional[Dict] = None) -> str:
+    """Build a cache key from an endpoint and its query parameters"""
+    return f"{endpoint}?{json.dumps(params or {}, sort_keys=True, default=str)}"
+
+
+class ResponseCache:
+    """Thread-safe TTL + LRU cache for API responses with a memory cap"""
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None,
+                 default_ttl: float = 300,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize the cache
+
+        Args:
+            ttls: TTL in seconds per endpoint prefix (merged over DEFAULT_TTLS)
+            default_ttl: TTL for endpoints without a configured prefix
+            max_bytes: Approximate memory cap; least recently used responses are evicted past it
+        """
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        # key -> (expires_at, size, endpoint, response)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def ttl_for(self, endpoint: str, params: Optional[Dict] = None) -> float:
+        """
+        Get the TTL for an endpoint
+
+        Time entry ranges ending today or later use TODAY_TIME_ENTRIES_TTL.
+        Other endpoints use the longest matching prefix in self.ttls.
+        """
+        if endpoint.startswith('/time-entries'):
+            end_date = (params or {}).get('end_date')
+            if not end_date or end_date >= datetime.now().strftime('%Y-%m-%d'):
+                return min(TODAY_TIME_ENTRIES_TTL, self.ttls.get('/time-entries', TODAY_TIME_ENTRIES_TTL))
+
+        matches = [prefix for prefix in self.ttls if endpoint.startswith(prefix)]
+        if matches:
+            return self.ttls[max(matches, key=len)]
+        return self.default_ttl
+
+    def get(self, endpoint: str, params: Optional[Dict] = None) -> Optional[Dict]:
+        """
+        Look up a cached response
+
+        The returned object is shared with the cache and must not be mutated.
+
+        Returns:
+            The cached response, or None on a miss or expired entry
+        """
+        key = cache_key(endpoint, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                self._bytes -= entry[1]
+                entry = None
+
+            if entry is None:
+                self._misses += 1
+                response = None
+            else:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                response = entry[3]
+
+        CACHE_REQUESTS.inc(cache='rippling_response', result='miss' if response is None else 'hit')
+        return response
+
+    def set(self, endpoint: str, params: Optional[Dict], response: Dict):
+        """Store a response, evicting least recently used entries past the memory cap"""
+        ttl = self.ttl_for(endpoint, params)
+        if ttl <= 0:
+            return
+
+        key = cache_key(endpoint, params)
+        size = len(json.dumps(response, default=str))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+
+            self._entries[key] = (time.monotonic() + ttl, size, endpoint, response)
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size, _, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._evictions += 1
+
+    def invalidate(self, endpoint: Optional[str] = None) -> int:
+        """
+        Drop cached responses
+
+        Args:
+            endpoint: Endpoint prefix to drop (e.g. '/time-entries'); all entries if None
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            if endpoint is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                self._bytes = 0
+                return removed
+
+            keys = [key for key, entry in self._entries.items() if entry[2].startswith(endpoint)]
+            for key in keys:
+                self._bytes -= self._entries.pop(key)[1]
+            return len(keys)
+
+    def get_stats(self) -> Dict:
+        """
+        Get cache statistics
+
+        Returns:
+            Dictionary with entry count, approximate bytes, hits, misses,
+            hit ratio and evictions
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': round(self._hits / lookups, 3) if lookups else 0.0,
+                'evictions': self._evictions
+            }
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_cache() -> ResponseCache:
+    """Get the process-wide response cache used by report generators"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = ResponseCache()
+        return _shared_cache
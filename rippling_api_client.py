@@ -7,38 +7,254 @@ employee time tracking data for project management and foreman monitoring.
 """
 
 import os
+import threading
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 import json
 
+from metrics import RIPPLING_PAGES, RIPPLING_REQUEST_SECONDS, RIPPLING_RETRIES
+from rate_limiter import (
+    RETRYABLE_STATUS_CODES,
+    RateLimitScheduler,
+    endpoint_key,
+    get_shared_scheduler,
+    parse_retry_after,
+)
+from request_timing import propagate, stage
+from response_cache import ResponseCache
+
+
+# Default connection pool settings. pool_connections is the number of
+# distinct hosts kept in the pool; pool_maxsize is the number of keep-alive
+# connections kept open per host.
+DEFAULT_POOL_CONNECTIONS = 4
+DEFAULT_POOL_MAXSIZE = 10
+
+# Rippling REST API root. Point RIPPLING_API_BASE_URL at mock_rippling_server.py
+# to run against local demo data.
+DEFAULT_BASE_URL = os.getenv('RIPPLING_API_BASE_URL', 'https://rest.ripplingapis.com')
+
+# Concurrency settings for paginated endpoints. Date ranges longer than
+# DEFAULT_SPLIT_RANGE_DAYS are fetched as per-day sub-ranges using up to
+# DEFAULT_MAX_WORKERS threads.
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_SPLIT_RANGE_DAYS = 3
+
+# Session shared by every client created with shared_session=True
+_shared_session = None
+_shared_session_lock = threading.Lock()
+
+
+def _build_session(pool_connections: int, pool_maxsize: int,
+                   pool_block: bool, keep_alive: bool) -> requests.Session:
+    """Create a requests Session backed by a sized urllib3 connection pool"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=pool_block
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if not keep_alive:
+        session.headers['Connection'] = 'close'
+    return session
+
+
+def get_shared_session(pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+                       pool_maxsize: int = DEFAULT_POOL_MAXSIZE) -> requests.Session:
+    """
+    Get the process-wide Session used by clients in shared-session mode
+
+    The pool settings only apply the first time the session is created.
+    """
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is None:
+            _shared_session = _build_session(pool_connections, pool_maxsize,
+                                             pool_block=False, keep_alive=True)
+        return _shared_session
+
+
+def dedupe_by_id(records: List[Dict]) -> List[Dict]:
+    """Drop records whose 'id' was already seen, keeping the first occurrence"""
+    seen = set()
+    unique = []
+    for record in records:
+        record_id = record.get('id')
+        if record_id is not None:
+            if record_id in seen:
+                continue
+            seen.add(record_id)
+        unique.append(record)
+    return unique
+
+
+def stream_spans(start_date: str, end_date: str, split_range_days: int) -> List[Tuple[str, str]]:
+    """
+    Split a date range into the (start, end) spans a streaming read walks in order
+
+    Ranges longer than split_range_days are walked one day at a time, so
+    only one day's pages are in flight at once.
+    """
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    num_days = (datetime.strptime(end_date, '%Y-%m-%d') - start).days + 1
+    if num_days <= split_range_days:
+        return [(start_date, end_date)]
+    days = [(start + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(num_days)]
+    return [(day, day) for day in days]
+
+
+class RecentIds:
+    """
+    Entry ids seen in the current and previous span of a streaming read
+
+    Entries spanning midnight are only ever repeated by the next day, so
+    ids from older spans are dropped to keep memory bounded.
+    """
+
+    def __init__(self):
+        self.previous = set()
+        self.current = set()
+
+    def next_span(self):
+        """Start a new span, forgetting ids from two spans back"""
+        self.previous, self.current = self.current, set()
+
+    def seen(self, record: Dict) -> bool:
+        """Check whether a record's id was already yielded, remembering it if not"""
+        record_id = record.get('id')
+        if record_id is None:
+            return False
+        if record_id in self.current or record_id in self.previous:
+            return True
+        self.current.add(record_id)
+        return False
+
 
 class RipplingAPIClient:
     """Client for interacting with Rippling REST API"""
 
-    def __init__(self, api_token: Optional[str] = None):
+    def __init__(self, api_token: Optional[str] = None,
+                 pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                 pool_block: bool = False,
+                 keep_alive: bool = True,
+                 shared_session: bool = False,
+                 timeout: Optional[float] = 30,
+                 prefetch_pages: bool = True,
+                 max_workers: int = DEFAULT_MAX_WORKERS,
+                 split_range_days: int = DEFAULT_SPLIT_RANGE_DAYS,
+                 scheduler: Optional[RateLimitScheduler] = None,
+                 cache: Optional[ResponseCache] = None,
+                 base_url: Optional[str] = None):
         """
         Initialize the Rippling API client
 
         Args:
             api_token: Rippling API token. If not provided, will look for RIPPLING_API_TOKEN env var
+            pool_connections: Number of per-host connection pools to keep
+            pool_maxsize: Maximum keep-alive connections per host
+            pool_block: Block when the per-host pool is exhausted instead of opening extra connections
+            keep_alive: Reuse connections between requests (sends Connection: close when False)
+            shared_session: Use the process-wide session shared by all clients
+            timeout: Request timeout in seconds
+            prefetch_pages: Fetch the next page while the current one is being processed
+            max_workers: Maximum concurrent sub-range requests for long date ranges
+            split_range_days: Date ranges longer than this are fetched as concurrent per-day requests
+            scheduler: Rate limit scheduler (defaults to the one shared by all clients in the process)
+            cache: Response cache for GET requests (no caching if None)
+            base_url: API root (defaults to DEFAULT_BASE_URL)
         """
         self.api_token = api_token or os.getenv('RIPPLING_API_TOKEN')
         if not self.api_token:
             raise ValueError("API token must be provided or set in RIPPLING_API_TOKEN environment variable")
 
-        self.base_url = "https://rest.ripplingapis.com"
+        self.base_url = (base_url or DEFAULT_BASE_URL).rstrip('/')
         self.headers = {
             'Authorization': f'Bearer {self.api_token}',
             'Accept': 'application/json',
             'Content-Type': 'application/json'
         }
+        self.timeout = timeout
+        self.prefetch_pages = prefetch_pages
+        self.max_workers = max(1, max_workers)
+        self.split_range_days = split_range_days
+        self.scheduler = scheduler or get_shared_scheduler()
+        self.cache = cache
+
+        # Connection pool - one Session per client unless shared mode is used
+        self.shared_session = shared_session
+        if shared_session:
+            self.session = get_shared_session(pool_connections, pool_maxsize)
+        else:
+            self.session = _build_session(pool_connections, pool_maxsize,
+                                          pool_block, keep_alive)
+
+        # Request statistics for measuring connection reuse
+        self._stats_lock = threading.Lock()
+        self._request_count = 0
+        self._request_seconds = 0.0
+
+    def close(self):
+        """Close pooled connections (the shared session is left open)"""
+        if not self.shared_session:
+            self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_connection_stats(self) -> Dict:
+        """
+        Get connection reuse statistics for this client's session
+
+        In shared-session mode the connection count covers every client
+        using the shared session.
+
+        Returns:
+            Dictionary with request count, connections opened, connections
+            reused and average request latency in milliseconds
+        """
+        connections_opened = 0
+        # The same adapter is mounted for http:// and https://
+        adapters = {id(a): a for a in self.session.adapters.values()}.values()
+        for adapter in adapters:
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:
+                    connections_opened += pool.num_connections
+
+        with self._stats_lock:
+            requests_made = self._request_count
+            total_seconds = self._request_seconds
+
+        return {
+            'requests': requests_made,
+            'connections_opened': connections_opened,
+            'connections_reused': max(requests_made - connections_opened, 0),
+            'reuse_ratio': round(1 - connections_opened / requests_made, 3) if requests_made else 0.0,
+            'avg_request_ms': round(total_seconds / requests_made * 1000, 1) if requests_made else 0.0,
+            'shared_session': self.shared_session
+        }
 
     def _make_request(self, method: str, endpoint: str, params: Optional[Dict] = None,
                      data: Optional[Dict] = None) -> Dict:
         """
         Make an authenticated request to the Rippling API
 
+        GET responses are served from the response cache when one is
+        configured. Requests are paced by the rate limit scheduler. 429
+        responses (and 5xx responses to idempotent requests) are retried with
+        the delay from Retry-After, or exponential backoff with jitter.
+
         Args:
             method: HTTP method (GET, POST, etc.)
             endpoint: API endpoint (without base URL)
@@ -48,24 +264,73 @@ class RipplingAPIClient:
         Returns:
             JSON response as dictionary
         """
+        cacheable = self.cache is not None and method.upper() == 'GET' and data is None
+        if cacheable:
+            cached = self.cache.get(endpoint, params)
+            if cached is not None:
+                return cached
+
         url = f"{self.base_url}{endpoint}"
+        idempotent = method.upper() in ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+        metric_endpoint = endpoint_key(endpoint)
 
         try:
-            response = requests.request(
-                method=method,
-                url=url,
-                headers=self.headers,
-                params=params,
-                json=data
-            )
+            attempt = 0
+            while True:
+                with stage('rippling_wait'):
+                    self.scheduler.acquire(endpoint)
+                started = time.perf_counter()
+                status = 'error'
+                try:
+                    response = self._send(method, url, params, data)
+                    status = response.status_code
+                finally:
+                    RIPPLING_REQUEST_SECONDS.observe(time.perf_counter() - started,
+                                                     endpoint=metric_endpoint, status=status)
+
+                retryable = status == 429 or (idempotent and status in RETRYABLE_STATUS_CODES)
+                if not retryable or attempt >= self.scheduler.max_retries:
+                    break
+                RIPPLING_RETRIES.inc(endpoint=metric_endpoint, status=status)
+
+                delay = self.scheduler.retry_delay(
+                    endpoint, attempt, status,
+                    parse_retry_after(response.headers.get('Retry-After'))
+                )
+                with stage('rippling_wait'):
+                    time.sleep(delay)
+                attempt += 1
+
             response.raise_for_status()
-            return response.json()
+            result = response.json()
+            if cacheable:
+                self.cache.set(endpoint, params, result)
+            return result
         except requests.exceptions.RequestException as e:
             print(f"API Request Error: {e}")
             if hasattr(e.response, 'text'):
                 print(f"Response: {e.response.text}")
             raise
 
+    def _send(self, method: str, url: str, params: Optional[Dict],
+              data: Optional[Dict]) -> requests.Response:
+        """Send a single HTTP request over the pooled session and record its latency"""
+        started = time.perf_counter()
+        try:
+            with stage('rippling'):
+                return self.session.request(
+                    method=method,
+                    url=url,
+                    headers=self.headers,
+                    params=params,
+                    json=data,
+                    timeout=self.timeout
+                )
+        finally:
+            with self._stats_lock:
+                self._request_count += 1
+                self._request_seconds += time.perf_counter() - started
+
     def get_employees(self, limit: int = 100) -> List[Dict]:
         """
         Get list of all employees
@@ -76,24 +341,23 @@ class RipplingAPIClient:
         Returns:
             List of employee dictionaries
         """
-        employees = []
-        cursor = None
+        return list(self.iter_employees(limit))
 
-        while True:
-            params = {'limit': limit}
-            if cursor:
-                params['cursor'] = cursor
-
-            response = self._make_request('GET', '/users', params=params)
-
-            employees.extend(response.get('data', []))
+    def iter_employees(self, limit: int = 100) -> Iterator[Dict]:
+        """
+        Iterate over all employees as pages arrive
 
-            # Check for next page
-            cursor = response.get('next_cursor')
-            if not cursor:
-                break
+        Args:
+            limit: Maximum number of results per page (default 100)
 
-        return employees
+        Yields:
+            Employee dictionaries, skipping repeated ids
+        """
+        seen = RecentIds()
+        for page in self._iter_pages('/users', {'limit': limit}):
+            for employee in page:
+                if not seen.seen(employee):
+                    yield employee
 
     def get_time_entries(self, start_date: Optional[str] = None,
                         end_date: Optional[str] = None,
@@ -114,29 +378,124 @@ class RipplingAPIClient:
         if not end_date:
             end_date = datetime.now().strftime('%Y-%m-%d')
 
-        time_entries = []
-        cursor = None
+        start = datetime.strptime(start_date, '%Y-%m-%d')
+        end = datetime.strptime(end_date, '%Y-%m-%d')
+        num_days = (end - start).days + 1
+
+        if num_days > self.split_range_days and self.max_workers > 1:
+            # Fetch each day concurrently; map() keeps results in day order
+            days = [(start + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(num_days)]
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, num_days)) as executor:
+                daily_results = executor.map(
+                    propagate(lambda day: self._fetch_time_entries_range(day, day, limit)), days
+                )
+                time_entries = [entry for entries in daily_results for entry in entries]
+        else:
+            time_entries = self._fetch_time_entries_range(start_date, end_date, limit)
+
+        # Entries spanning midnight can be returned for both days
+        return dedupe_by_id(time_entries)
+
+    def iter_time_entries(self, start_date: Optional[str] = None,
+                          end_date: Optional[str] = None,
+                          limit: int = 100) -> Iterator[Dict]:
+        """
+        Iterate over time entries for a date range as pages arrive
+
+        Unlike get_time_entries nothing is accumulated: long ranges are
+        walked one day at a time (with the next page prefetched), so memory
+        stays bounded by a page or two however long the range is.
 
-        while True:
+        Args:
+            start_date: Start date in YYYY-MM-DD format (defaults to today)
+            end_date: End date in YYYY-MM-DD format (defaults to today)
+            limit: Maximum number of results per page
+
+        Yields:
+            Time entry dictionaries in day order, skipping repeated ids
+        """
+        if not start_date:
+            start_date = datetime.now().strftime('%Y-%m-%d')
+        if not end_date:
+            end_date = datetime.now().strftime('%Y-%m-%d')
+
+        seen = RecentIds()
+        for span_start, span_end in stream_spans(start_date, end_date, self.split_range_days):
+            seen.next_span()
             params = {
                 'limit': limit,
-                'start_date': start_date,
-                'end_date': end_date
+                'start_date': span_start,
+                'end_date': span_end
             }
+            for page in self._iter_pages('/time-entries', params):
+                for entry in page:
+                    if not seen.seen(entry):
+                        yield entry
+
+    def _fetch_time_entries_range(self, start_date: str, end_date: str,
+                                  limit: int) -> List[Dict]:
+        """Fetch every page of time entries for a single date range"""
+        params = {
+            'limit': limit,
+            'start_date': start_date,
+            'end_date': end_date
+        }
+
+        time_entries = []
+        # Note: The exact endpoint may vary - check Rippling documentation
+        # Common endpoints: /time-entries or /time_tracking/entries
+        for page in self._iter_pages('/time-entries', params):
+            time_entries.extend(page)
+
+        return time_entries
+
+    def _iter_pages(self, endpoint: str, params: Optional[Dict] = None) -> Iterator[List[Dict]]:
+        """
+        Iterate over the pages of a cursor-paginated endpoint
+
+        With prefetch_pages enabled, the request for page N+1 is started as
+        soon as page N's cursor is known, so it runs while the caller is
+        still processing page N.
+
+        Args:
+            endpoint: API endpoint (without base URL)
+            params: Query parameters sent with every page request
+
+        Yields:
+            The 'data' list of each page, in order
+        """
+        params = dict(params or {})
+
+        @propagate
+        def fetch(cursor: Optional[str]) -> Dict:
+            page_params = dict(params)
             if cursor:
-                params['cursor'] = cursor
+                page_params['cursor'] = cursor
+            response = self._make_request('GET', endpoint, params=page_params)
+            RIPPLING_PAGES.inc(endpoint=endpoint_key(endpoint))
+            return response
 
-            # Note: The exact endpoint may vary - check Rippling documentation
-            # Common endpoints: /time-entries or /time_tracking/entries
-            response = self._make_request('GET', '/time-entries', params=params)
+        if not self.prefetch_pages:
+            cursor = None
+            while True:
+                response = fetch(cursor)
+                yield response.get('data', [])
 
-            time_entries.extend(response.get('data', []))
+                cursor = response.get('next_cursor')
+                if not cursor:
+                    break
+            return
 
-            cursor = response.get('next_cursor')
-            if not cursor:
-                break
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending = executor.submit(fetch, None)
+            while pending is not None:
+                response = pending.result()
 
-        return time_entries
+                # Start the next page before handing this one to the caller
+                cursor = response.get('next_cursor')
+                pending = executor.submit(fetch, cursor) if cursor else None
+
+                yield response.get('data', [])
 
     def get_job_dimensions(self) -> List[Dict]:
         """
@@ -177,6 +536,10 @@ def test_connection():
         time_entries = client.get_time_entries(start_date=today, end_date=today)
         print(f"✓ Successfully retrieved {len(time_entries)} time entries for today")
 
+        stats = client.get_connection_stats()
+        print(f"✓ {stats['requests']} requests over {stats['connections_opened']} connection(s), "
+              f"avg {stats['avg_request_ms']} ms")
+
         print("\nConnection test successful!")
         return True
 
@@ -0,0 +1,396 @@
+"""
+Synthetic Workload Generator for Capitol Engineering
+Seeded, scalable time entry data for load and stress testing
+
+DemoDataGenerator is a fixed 15-person, 7-project shop. SyntheticWorkload
+generates a company of any size (e.g. 500 employees x 200 projects x a
+year) with numpy, one vectorized draw per day, so it produces millions of
+entries a minute. Entries have the same fields as DemoDataGenerator's, and
+the class has the same methods, so it can stand in for it in the demo apps
+and the mock Rippling server.
+
+A day's entries depend only on the seed, the size settings and the date,
+so any day can be generated on its own and comes out the same every run.
+
+    python synthetic_workload.py --employees 500 --projects 200 --days 365 --out workload.ndjson
+    python synthetic_workload.py --employees 2000 --start 2025-01-01 --end 2025-12-31 --format parquet --out workload.parquet
+
+Date created: 2025-10-31
+"""
+
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Entry fields in DemoDataGenerator order
+ENTRY_FIELDS = ['id', 'employee_id', 'user_id', 'date', 'start_time', 'end_time', 'hours',
+                'job_code', 'job_name', 'dimension_name', 'status', 'notes']
+
+OUTPUT_FORMATS = ('ndjson', 'parquet')
+
+DEFAULT_STATUS_MIX = {'Approved': 0.9, 'Pending': 0.1}
+
+# Share of single-project days an employee spends on their crew's project
+HOME_PROJECT_SHARE = 0.8
+
+# Days generated per output chunk
+DEFAULT_CHUNK_DAYS = 7
+
+FIRST_NAMES = ['John', 'Sarah', 'Mike', 'Lisa', 'David', 'Emily', 'James', 'Maria', 'Robert',
+               'Jennifer', 'Chris', 'Amanda', 'Daniel', 'Jessica', 'Kevin', 'Carlos', 'Ana',
+               'Brian', 'Michelle', 'Luis', 'Angela', 'Jose', 'Rachel', 'Mark', 'Laura']
+LAST_NAMES = ['Martinez', 'Johnson', 'Thompson', 'Anderson', 'Garcia', 'Rodriguez', 'Williams',
+              'Lopez', 'Davis', 'Miller', 'Wilson', 'Brown', 'Taylor', 'Moore', 'Jackson',
+              'Hernandez', 'Clark', 'Lewis', 'Walker', 'Young', 'Allen', 'King', 'Scott', 'Green']
+
+# Role -> (share of headcount, labor rate)
+ROLES = {
+    'Welder': (0.25, 35),
+    'Fabricator': (0.22, 32),
+    'Fitter': (0.2, 30),
+    'Painter': (0.08, 28),
+    'QC Inspector': (0.07, 38),
+    'Foreman': (0.08, 45),
+    'Detailer': (0.06, 40),
+    'Admin': (0.04, 25)
+}
+
+PROJECT_CLIENTS = ['Lithium Nevada', 'Forest Energy', 'Industrial Complex', 'Mining Support',
+                   'Refinery', 'Water Treatment', 'Power Station', 'Copper Mine', 'Data Center',
+                   'Chemical Plant', 'Airport Hangar', 'Cement Works']
+PROJECT_SCOPES = {
+    'Fabrication': (85, ['Ducting', 'Platform Assembly', 'Hoppers', 'Stack Ducting']),
+    'Structural': (95, ['Steel Frame', 'Support Structure', 'Pipe Rack', 'Mezzanine']),
+    'Piping': (80, ['Process Piping', 'Water Piping', 'Steam Lines'])
+}
+
+CLOCK_IN_MINUTES = np.array([0, 15, 30, 45])
+
+
+class SyntheticWorkload:
+    """Seeded generator for a company of configurable size"""
+
+    def __init__(self, employees: int = 500, projects: int = 200, seed: int = 0,
+                 attendance: float = 0.9, split_shift_ratio: float = 0.2,
+                 status_mix: Optional[Dict[str, float]] = None):
+        """
+        Initialize the generator
+
+        Args:
+            employees: Headcount
+            projects: Number of active projects (job codes)
+            seed: Seed for the roster, the projects and every day's entries
+            attendance: Chance an employee works on a given day
+            split_shift_ratio: Chance a working employee splits the day
+                               between two projects
+            status_mix: Entry status -> weight (defaults to 90% Approved,
+                        10% Pending)
+        """
+        if employees < 1 or projects < 2:
+            raise ValueError("need at least 1 employee and 2 projects")
+        for name, rate in (('attendance', attendance), ('split_shift_ratio', split_shift_ratio)):
+            if not 0.0 <= rate <= 1.0:
+                raise ValueError(f"{name} must be between 0 and 1")
+
+        status_mix = status_mix or DEFAULT_STATUS_MIX
+        weights = np.array(list(status_mix.values()), dtype=float)
+        if (weights < 0).any() or weights.sum() <= 0:
+            raise ValueError("status_mix weights must be non-negative and not all zero")
+
+        self.seed = seed
+        self.attendance = attendance
+        self.split_shift_ratio = split_shift_ratio
+        self.statuses = np.array(list(status_mix.keys()), dtype=object)
+        self.status_weights = weights / weights.sum()
+
+        rng = np.random.default_rng([seed, 0])
+        self.employees = self._build_employees(rng, employees)
+        self.projects = self._build_projects(rng, projects)
+        self.labor_rates = {role: rate for role, (_, rate) in ROLES.items()}
+        self.dimensions = [
+            {"id": "dim_001", "name": "Project Code", "type": "project"},
+            {"id": "dim_002", "name": "Cost Center", "type": "department"},
+        ]
+
+        # Per-row lookups for vectorized entry building
+        self._employee_ids = np.array([emp['id'] for emp in self.employees], dtype=object)
+        self._project_codes = np.array([proj['code'] for proj in self.projects], dtype=object)
+        self._project_names = np.array([proj['name'] for proj in self.projects], dtype=object)
+        # Each employee belongs to a crew that works one home project
+        self._home_projects = rng.integers(0, projects, size=employees)
+
+    @staticmethod
+    def _build_employees(rng: np.random.Generator, count: int) -> List[Dict]:
+        roles = list(ROLES)
+        shares = np.array([share for share, _ in ROLES.values()])
+        role_index = rng.choice(len(roles), size=count, p=shares / shares.sum())
+        first = rng.integers(0, len(FIRST_NAMES), size=count)
+        last = rng.integers(0, len(LAST_NAMES), size=count)
+        return [{
+            "id": f"emp_{i + 1:05d}",
+            "first_name": FIRST_NAMES[first[i]],
+            "last_name": LAST_NAMES[last[i]],
+            "employee_id": f"CE-{1001 + i}",
+            "role": roles[role_index[i]]
+        } for i in range(count)]
+
+    @staticmethod
+    def _build_projects(rng: np.random.Generator, count: int) -> List[Dict]:
+        projects = [{"code": "SHOP", "name": "Shop Maintenance & Cleanup", "type": "Internal",
+                     "budget_hours": 999, "hourly_rate": 75, "estimated_total": 0}]
+        types = list(PROJECT_SCOPES)
+        for i in range(count - 1):
+            project_type = types[rng.integers(0, len(types))]
+            rate, scopes = PROJECT_SCOPES[project_type]
+            budget_hours = int(rng.integers(8, 100)) * 20
+            projects.append({
+                "code": f"{24 + i // 9000}-{1000 + i % 9000}",
+                "name": f"{PROJECT_CLIENTS[rng.integers(0, len(PROJECT_CLIENTS))]} - "
+                        f"{scopes[rng.integers(0, len(scopes))]}",
+                "type": project_type,
+                "budget_hours": budget_hours,
+                "hourly_rate": rate,
+                "estimated_total": budget_hours * rate
+            })
+        return projects
+
+    def _day_arrays(self, date: datetime) -> Dict[str, np.ndarray]:
+        """Draw one day's entries as numeric arrays (employee, project, start, hours, status)"""
+        rng = np.random.default_rng([self.seed, 1, date.toordinal()])
+        n_employees = len(self.employees)
+        n_projects = len(self.projects)
+
+        working = np.flatnonzero(rng.random(n_employees) < self.attendance)
+        split = rng.random(len(working)) < self.split_shift_ratio
+        at_home = rng.random(len(working)) < HOME_PROJECT_SHARE
+        first_project = np.where(at_home, self._home_projects[working],
+                                 rng.integers(0, n_projects, size=len(working)))
+        # A different project for the second half of a split day
+        second_project = (first_project + rng.integers(1, n_projects, size=len(working))) % n_projects
+
+        clock_in = rng.integers(6, 9, size=len(working)) * 60 + rng.choice(CLOCK_IN_MINUTES, size=len(working))
+        hours = np.where(split, rng.uniform(3.0, 6.0, size=len(working)),
+                         rng.uniform(6.0, 10.0, size=len(working))).round(2)
+        second_hours = rng.uniform(3.0, 6.0, size=int(split.sum())).round(2)
+
+        # Second entries start when the first one ends
+        split_rows = np.flatnonzero(split)
+        employee = np.concatenate([working, working[split_rows]])
+        project = np.concatenate([first_project, second_project[split_rows]])
+        start_seconds = np.concatenate([clock_in * 60, clock_in[split_rows] * 60
+                                        + np.round(hours[split_rows] * 3600).astype(np.int64)])
+        all_hours = np.concatenate([hours, second_hours])
+        status = rng.choice(len(self.statuses), size=len(employee), p=self.status_weights)
+
+        order = np.lexsort((start_seconds, employee))
+        return {
+            'employee': employee[order],
+            'project': project[order],
+            'start_seconds': start_seconds[order].astype(np.int64),
+            'hours': all_hours[order],
+            'status': status[order]
+        }
+
+    def time_entry_frame(self, start_date: str, end_date: Optional[str] = None) -> pd.DataFrame:
+        """
+        Generate entries for a date range as a DataFrame
+
+        Args:
+            start_date: First day (YYYY-MM-DD)
+            end_date: Last day (YYYY-MM-DD, defaults to start_date)
+
+        Returns:
+            DataFrame with ENTRY_FIELDS columns, in date then employee order
+        """
+        start = datetime.strptime(start_date, '%Y-%m-%d')
+        end = datetime.strptime(end_date or start_date, '%Y-%m-%d')
+        days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+        parts = [self._day_arrays(day) for day in days]
+        if not parts:
+            return pd.DataFrame(columns=ENTRY_FIELDS)
+
+        counts = [len(part['employee']) for part in parts]
+        employee = np.concatenate([part['employee'] for part in parts])
+        project = np.concatenate([part['project'] for part in parts])
+        hours = np.concatenate([part['hours'] for part in parts])
+        status = np.concatenate([part['status'] for part in parts])
+        day_starts = np.repeat(np.array([np.datetime64(day.date(), 's') for day in days]), counts)
+        start_times = day_starts + np.concatenate([part['start_seconds'] for part in parts]).astype('timedelta64[s]')
+        end_times = start_times + np.round(hours * 3600).astype(np.int64).astype('timedelta64[s]')
+
+        employee_ids = pd.Series(self._employee_ids[employee])
+        job_codes = pd.Series(self._project_codes[project])
+        dates = pd.Series(np.repeat(np.array([day.strftime('%Y-%m-%d') for day in days], dtype=object), counts))
+        compact_dates = pd.Series(np.repeat(np.array([day.strftime('%Y%m%d') for day in days], dtype=object), counts))
+
+        return pd.DataFrame({
+            'id': 'time_' + employee_ids + '_' + compact_dates + '_' + job_codes,
+            'employee_id': employee_ids,
+            'user_id': employee_ids,
+            'date': dates,
+            'start_time': np.datetime_as_string(start_times, unit='s').astype(object),
+            'end_time': np.datetime_as_string(end_times, unit='s').astype(object),
+            'hours': hours,
+            'job_code': job_codes,
+            'job_name': self._project_names[project],
+            'dimension_name': 'Project Code',
+            'status': self.statuses[status],
+            'notes': ''
+        })
+
+    def iter_frames(self, start_date: str, end_date: str,
+                    chunk_days: int = DEFAULT_CHUNK_DAYS) -> Iterator[pd.DataFrame]:
+        """
+        Generate a date range as DataFrames of chunk_days days each
+
+        Yields:
+            DataFrames with ENTRY_FIELDS columns, in date order
+        """
+        start = datetime.strptime(start_date, '%Y-%m-%d')
+        end = datetime.strptime(end_date, '%Y-%m-%d')
+        while start <= end:
+            chunk_end = min(start + timedelta(days=chunk_days - 1), end)
+            yield self.time_entry_frame(start.strftime('%Y-%m-%d'), chunk_end.strftime('%Y-%m-%d'))
+            start = chunk_end + timedelta(days=1)
+
+    def generate_daily_time_entries(self, date: datetime = None) -> List[Dict]:
+        """
+        Generate time entries for one day, as DemoDataGenerator does
+
+        Args:
+            date: Date to generate entries for (defaults to today)
+
+        Returns:
+            List of time entry dictionaries
+        """
+        date = date or datetime.now()
+        return self.time_entry_frame(date.strftime('%Y-%m-%d')).to_dict('records')
+
+    def generate_sample_employees(self) -> List[Dict]:
+        """Get the generated roster"""
+        return self.employees
+
+    def generate_sample_projects(self) -> List[Dict]:
+        """Get the generated projects"""
+        return self.projects
+
+    def write_ndjson(self, output_path: str, start_date: str, end_date: str,
+                     chunk_days: int = DEFAULT_CHUNK_DAYS) -> int:
+        """
+        Write a date range as newline-delimited JSON, one entry per line
+
+        Returns:
+            Number of entries written
+        """
+        rows = 0
+        with open(output_path, 'w', encoding='utf-8') as f:
+            for frame in self.iter_frames(start_date, end_date, chunk_days):
+                if frame.empty:
+                    continue
+                text = frame.to_json(orient='records', lines=True)
+                f.write(text if text.endswith('\n') else text + '\n')
+                rows += len(frame)
+        return rows
+
+    def write_parquet(self, output_path: str, start_date: str, end_date: str,
+                      chunk_days: int = DEFAULT_CHUNK_DAYS) -> int:
+        """
+        Write a date range as a Parquet file, one row group per chunk
+
+        Returns:
+            Number of entries written
+        """
+        # Imported here: pyarrow is optional and slow to import
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("pyarrow is required for Parquet output")
+
+        schema = pa.schema([(name, pa.float64() if name == 'hours' else pa.string())
+                            for name in ENTRY_FIELDS])
+        rows = 0
+        with pq.ParquetWriter(output_path, schema) as writer:
+            for frame in self.iter_frames(start_date, end_date, chunk_days):
+                writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+                rows += len(frame)
+        return rows
+
+
+def create_demo_generator():
+    """
+    Generator for the demo apps, sized by environment variables
+
+    DEMO_EMPLOYEES and DEMO_PROJECTS switch to a SyntheticWorkload of that
+    size; DEMO_SEED makes either generator reproducible.
+
+    Returns:
+        SyntheticWorkload, or DemoDataGenerator when no size is set
+    """
+    seed = os.getenv('DEMO_SEED')
+    seed = int(seed) if seed else None
+    employees = os.getenv('DEMO_EMPLOYEES')
+    projects = os.getenv('DEMO_PROJECTS')
+    if employees or projects:
+        return SyntheticWorkload(employees=int(employees or 500), projects=int(projects or 200),
+                                 seed=seed or 0)
+
+    from demo_data_generator import DemoDataGenerator
+    return DemoDataGenerator(seed=seed)
+
+
+def _parse_status_mix(text: str) -> Dict[str, float]:
+    """Parse 'Approved=0.85,Pending=0.1,Rejected=0.05'"""
+    mix = {}
+    for part in text.split(','):
+        status, _, weight = part.partition('=')
+        mix[status.strip()] = float(weight)
+    return mix
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Generate a synthetic time entry workload')
+    parser.add_argument('--employees', type=int, default=500)
+    parser.add_argument('--projects', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--start', help='First day (YYYY-MM-DD, defaults to --days before --end)')
+    parser.add_argument('--end', help='Last day (YYYY-MM-DD, defaults to yesterday)')
+    parser.add_argument('--days', type=int, default=365, help='Days to generate when --start is not given')
+    parser.add_argument('--attendance', type=float, default=0.9, help='Chance an employee works a day')
+    parser.add_argument('--split-ratio', type=float, default=0.2, help='Chance a work day is split across two projects')
+    parser.add_argument('--status-mix', help='Status weights, e.g. Approved=0.85,Pending=0.1,Rejected=0.05')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='ndjson')
+    parser.add_argument('--out', required=True, help='Output file')
+    args = parser.parse_args()
+
+    end = args.end or (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+    start = args.start or (datetime.strptime(end, '%Y-%m-%d') - timedelta(days=args.days - 1)).strftime('%Y-%m-%d')
+    try:
+        workload = SyntheticWorkload(
+            employees=args.employees, projects=args.projects, seed=args.seed,
+            attendance=args.attendance, split_shift_ratio=args.split_ratio,
+            status_mix=_parse_status_mix(args.status_mix) if args.status_mix else None
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    started = time.perf_counter()
+    if args.format == 'parquet':
+        rows = workload.write_parquet(args.out, start, end)
+    else:
+        rows = workload.write_ndjson(args.out, start, end)
+    seconds = time.perf_counter() - started
+
+    print(f"Wrote {rows:,} entries for {args.employees} employees x {args.projects} projects, "
+          f"{start} to {end}, to {args.out}")
+    print(f"  {seconds:.2f}s ({rows / seconds * 60 / 1e6:.1f}M entries/minute)")
+
+
+if __name__ == "__main__":
+    main()
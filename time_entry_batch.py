@@ -0,0 +1,250 @@
+"""
+Columnar time entry batches for Capitol Engineering reports
+Compact, typed representation of Rippling time entries
+
+Raw time entries are JSON dicts (hundreds of bytes each, with every
+job code and status string repeated per entry). A TimeEntryBatch is built
+once on ingestion and stores each field as a column: repeated strings are
+categoricals (small integer codes plus one copy of each value) and hours
+are float64 computed up front.
+
+Date created: 2025-10-31
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from labor_hours import column, compute_hours, entries_to_frame
+
+# Low-cardinality string fields stored as categoricals
+CATEGORICAL_FIELDS = ['employee_id', 'job_code', 'job_name', 'dimension_name', 'status', 'date']
+
+# Clock times are kept as the original ISO strings, so reports show them
+# exactly as Rippling sent them
+TIME_FIELDS = ['start_time', 'end_time']
+
+FIELDS = ['id'] + CATEGORICAL_FIELDS + TIME_FIELDS + ['hours']
+
+# Rows per batch when grouping a stream of entries
+DEFAULT_BATCH_SIZE = 5000
+
+
+class TimeEntryBatch:
+    """Column-oriented batch of time entries"""
+
+    def __init__(self, columns: Dict[str, object],
+                 rejected_rows: Optional[pd.DataFrame] = None):
+        """
+        Initialize a batch from prepared columns
+
+        Use from_entries() or concat() rather than calling this directly.
+
+        Args:
+            columns: Field name -> numpy array or pandas Categorical, all the same length
+            rejected_rows: Entries whose hours could not be computed
+        """
+        self.columns = columns
+        self.rejected_rows = rejected_rows if rejected_rows is not None else pd.DataFrame()
+
+    @classmethod
+    def from_entries(cls, time_entries: List[Dict],
+                     default_date: Optional[str] = None) -> 'TimeEntryBatch':
+        """
+        Build a batch from raw time entry dictionaries
+
+        Args:
+            time_entries: Time entry dictionaries from the API
+            default_date: Work date for entries with neither 'date' nor 'start_time'
+
+        Returns:
+            TimeEntryBatch with one row per entry
+        """
+        frame = entries_to_frame(time_entries)
+        if frame.empty:
+            return cls.empty()
+
+        hours, rejected = compute_hours(frame)
+        start_times = column(frame, 'start_time')
+
+        user_ids = column(frame, 'employee_id').fillna(column(frame, 'user_id'))
+        dates = column(frame, 'date')
+        missing_dates = dates.isna()
+        if missing_dates.any():
+            dates = dates.copy()
+            dates[missing_dates] = start_times[missing_dates].fillna('').astype(str).str[:10]
+        if default_date:
+            dates = dates.mask(dates.isna() | (dates == ''), default_date)
+
+        source = {
+            'employee_id': user_ids,
+            'job_code': column(frame, 'job_code').fillna('No Project'),
+            'job_name': column(frame, 'job_name'),
+            'dimension_name': column(frame, 'dimension_name').fillna('N/A'),
+            'status': column(frame, 'status').fillna('Active'),
+            'date': dates,
+        }
+
+        columns = {'id': column(frame, 'id').to_numpy(dtype=object)}
+        for name in CATEGORICAL_FIELDS:
+            columns[name] = pd.Categorical(source[name].astype(object))
+        columns['start_time'] = start_times.fillna('').to_numpy(dtype=object)
+        columns['end_time'] = column(frame, 'end_time').fillna('').to_numpy(dtype=object)
+        columns['hours'] = hours.to_numpy(dtype=np.float64)
+
+        return cls(columns, rejected)
+
+    @classmethod
+    def empty(cls) -> 'TimeEntryBatch':
+        """Create a batch with no rows"""
+        columns = {'id': np.array([], dtype=object)}
+        for name in CATEGORICAL_FIELDS:
+            columns[name] = pd.Categorical([])
+        for name in TIME_FIELDS:
+            columns[name] = np.array([], dtype=object)
+        columns['hours'] = np.array([], dtype=np.float64)
+        return cls(columns)
+
+    @classmethod
+    def concat(cls, batches: Iterable['TimeEntryBatch']) -> 'TimeEntryBatch':
+        """
+        Concatenate batches in order, dropping repeated entry ids
+
+        Categoricals are unioned so codes stay compact.
+        """
+        batches = [batch for batch in batches if len(batch)]
+        if not batches:
+            return cls.empty()
+        if len(batches) == 1:
+            return batches[0]
+
+        columns = {}
+        for name in FIELDS:
+            parts = [batch.columns[name] for batch in batches]
+            if name in CATEGORICAL_FIELDS:
+                columns[name] = pd.api.types.union_categoricals(parts)
+            else:
+                columns[name] = np.concatenate(parts)
+
+        rejected = [batch.rejected_rows for batch in batches if not batch.rejected_rows.empty]
+        result = cls(columns, pd.concat(rejected, ignore_index=True) if rejected else None)
+
+        # Entries spanning midnight can appear in two day batches
+        ids = pd.Series(columns['id'])
+        duplicated = ids.notna() & ids.duplicated()
+        if duplicated.any():
+            result = result.filter(~duplicated.to_numpy())
+        return result
+
+    def __len__(self) -> int:
+        return len(self.columns['hours'])
+
+    def __getitem__(self, name: str):
+        return self.columns[name]
+
+    def filter(self, mask: np.ndarray) -> 'TimeEntryBatch':
+        """Get a new batch with the rows where mask is True"""
+        columns = {name: values[mask] for name, values in self.columns.items()}
+        return TimeEntryBatch(columns, self.rejected_rows)
+
+    def between_dates(self, start_date: str, end_date: str) -> 'TimeEntryBatch':
+        """Get the rows whose work date is within [start_date, end_date]"""
+        dates = self.columns['date']
+        # Compare each distinct date once, then look rows up by category code
+        in_range = np.array([start_date <= day <= end_date for day in dates.categories], dtype=bool)
+        codes = dates.codes
+        mask = np.zeros(len(codes), dtype=bool)
+        valid = codes >= 0
+        mask[valid] = in_range[codes[valid]]
+        return self.filter(mask)
+
+    def in_values(self, name: str, values: Iterable[str]) -> 'TimeEntryBatch':
+        """
+        Get the rows whose categorical column value is one of values
+
+        Rejected rows are filtered the same way when they carry the column.
+
+        Args:
+            name: Categorical column name, e.g. 'job_code'
+            values: Values to keep
+
+        Returns:
+            TimeEntryBatch with the matching rows
+        """
+        values = set(values)
+        column_values = self.columns[name]
+        # Test each distinct value once, then look rows up by category code
+        keep = np.array([value in values for value in column_values.categories], dtype=bool)
+        codes = column_values.codes
+        mask = np.zeros(len(codes), dtype=bool)
+        valid = codes >= 0
+        mask[valid] = keep[codes[valid]]
+
+        rejected = self.rejected_rows
+        if name in rejected.columns:
+            rejected = rejected[rejected[name].isin(values)]
+        return TimeEntryBatch({column: data[mask] for column, data in self.columns.items()}, rejected)
+
+    def map_values(self, name: str, mapping: Dict, default=None) -> np.ndarray:
+        """
+        Map a categorical column through a dictionary
+
+        Each distinct value is looked up once; rows are then filled by
+        category code.
+
+        Args:
+            name: Categorical column name
+            mapping: Value -> mapped value
+            default: Result for missing values and values not in mapping
+
+        Returns:
+            Object array with one mapped value per row
+        """
+        values = self.columns[name]
+        lookup = np.array([mapping.get(value, default) for value in values.categories] + [default],
+                          dtype=object)
+        # Code -1 (missing) indexes the trailing default
+        return lookup[values.codes]
+
+    def values(self, name: str, missing=None) -> np.ndarray:
+        """Get a categorical column as a plain object array"""
+        values = self.columns[name]
+        lookup = np.array(list(values.categories) + [missing], dtype=object)
+        return lookup[values.codes]
+
+    def to_frame(self) -> pd.DataFrame:
+        """Get the batch as a DataFrame (categoricals are kept, not copied to strings)"""
+        return pd.DataFrame({name: self.columns[name] for name in FIELDS})
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory used by the batch's columns, in bytes"""
+        return int(self.to_frame().memory_usage(index=False, deep=True).sum())
+
+
+def iter_batches(time_entries: Iterable[Dict], batch_size: int = DEFAULT_BATCH_SIZE,
+                 default_date: Optional[str] = None) -> Iterator[TimeEntryBatch]:
+    """
+    Group a stream of time entries into batches of at most batch_size rows
+
+    Only one batch's worth of raw dictionaries is held at a time, so a
+    stream from RipplingAPIClient.iter_time_entries can be consumed in
+    bounded memory.
+
+    Args:
+        time_entries: Iterable of time entry dictionaries
+        batch_size: Maximum rows per batch
+        default_date: Work date for entries with neither 'date' nor 'start_time'
+
+    Yields:
+        TimeEntryBatch objects in stream order
+    """
+    pending = []
+    for entry in time_entries:
+        pending.append(entry)
+        if len(pending) >= batch_size:
+            yield TimeEntryBatch.from_entries(pending, default_date)
+            pending = []
+    if pending:
+        yield TimeEntryBatch.from_entries(pending, default_date)
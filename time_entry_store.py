@@ -0,0 +1,311 @@
+"""
+Local Time Entry Store for Capitol Engineering
+SQLite mirror of Rippling /time-entries and /users with incremental sync
+
+Closed days never change, so they are downloaded once and read from disk
+afterwards. Only days after the sync watermark (plus a short reopen
+window for late edits and approvals) are pulled again.
+
+Usage:
+    python time_entry_store.py sync [--db PATH] [--start YYYY-MM-DD] [--reopen-days N]
+
+Date created: 2025-10-31
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+from report_context import entry_work_date
+
+DEFAULT_DB_PATH = os.getenv('RIPPLING_STORE_PATH', 'rippling_store.db')
+
+# Days before today that may still be edited (late punches, approvals)
+DEFAULT_REOPEN_DAYS = 2
+
+# How far back the first sync goes when no start date is given
+DEFAULT_INITIAL_DAYS = 30
+
+WATERMARK_KEY = 'time_entries_watermark'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    synced_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS time_entries (
+    id TEXT PRIMARY KEY,
+    entry_date TEXT NOT NULL,
+    employee_id TEXT,
+    data TEXT NOT NULL,
+    synced_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_time_entries_date ON time_entries (entry_date);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def entry_id(entry: Dict) -> str:
+    """Get a stable primary key for a time entry, hashing it if the API gave no id"""
+    if entry.get('id') is not None:
+        return str(entry['id'])
+    return 'sha1:' + hashlib.sha1(json.dumps(entry, sort_keys=True).encode()).hexdigest()
+
+
+def _iter_client_entries(client, start_date: str, end_date: str, limit: int) -> Iterator[Dict]:
+    """Stream time entries from a client, falling back to get_time_entries if it cannot stream"""
+    if hasattr(client, 'iter_time_entries'):
+        return client.iter_time_entries(start_date, end_date, limit)
+    return iter(client.get_time_entries(start_date, end_date, limit))
+
+
+class TimeEntryStore:
+    """On-disk store of Rippling users and time entries"""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, live_client=None,
+                 reopen_days: int = DEFAULT_REOPEN_DAYS):
+        """
+        Initialize the store, creating the database if needed
+
+        Args:
+            db_path: Path of the SQLite database file
+            live_client: Optional RipplingAPIClient used for days after the
+                         sync watermark, so today's data is never stale
+            reopen_days: Days before today that are re-pulled on every sync
+        """
+        self.db_path = db_path
+        self.live_client = live_client
+        self.reopen_days = reopen_days
+
+        with closing(self._connect()) as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection (one per call, so the store is safe to share across threads)"""
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def get_watermark(self) -> Optional[str]:
+        """Get the last closed day that has been fully synced, if any"""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                'SELECT value FROM sync_state WHERE key = ?', (WATERMARK_KEY,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def sync(self, client, start_date: Optional[str] = None,
+             end_date: Optional[str] = None) -> Dict:
+        """
+        Pull new and changed data from the API into the store
+
+        The roster is refreshed in full. Time entries are re-pulled for every
+        day after the watermark, replacing what the store held for those days.
+        The watermark then advances to the last day outside the reopen window.
+
+        Args:
+            client: RipplingAPIClient to read from
+            start_date: First day to sync when the store is empty
+                        (defaults to DEFAULT_INITIAL_DAYS ago)
+            end_date: Last day to sync (defaults to today)
+
+        Returns:
+            Dictionary with the synced range and counts of users and
+            inserted, updated, unchanged and deleted time entries
+        """
+        today = datetime.now().date()
+        end = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else today
+
+        watermark = self.get_watermark()
+        if watermark:
+            start = datetime.strptime(watermark, '%Y-%m-%d').date() + timedelta(days=1)
+        elif start_date:
+            start = datetime.strptime(start_date, '%Y-%m-%d').date()
+        else:
+            start = today - timedelta(days=DEFAULT_INITIAL_DAYS)
+
+        stats = {
+            'start_date': start.isoformat(),
+            'end_date': end.isoformat(),
+            'users': 0,
+            'inserted': 0,
+            'updated': 0,
+            'unchanged': 0,
+            'deleted': 0
+        }
+        synced_at = datetime.now().isoformat()
+
+        employees = client.get_employees()
+        entries = client.get_time_entries(start.isoformat(), end.isoformat()) if start <= end else []
+
+        with closing(self._connect()) as conn, conn:
+            conn.execute('DELETE FROM users')
+            conn.executemany(
+                'INSERT INTO users (id, data, synced_at) VALUES (?, ?, ?)',
+                [(str(emp['id']), json.dumps(emp), synced_at) for emp in employees if 'id' in emp]
+            )
+            stats['users'] = len(employees)
+
+            existing = {
+                row[0]: row[1] for row in conn.execute(
+                    'SELECT id, data FROM time_entries WHERE entry_date BETWEEN ? AND ?',
+                    (start.isoformat(), end.isoformat())
+                )
+            }
+
+            rows = []
+            for entry in entries:
+                key = entry_id(entry)
+                data = json.dumps(entry, sort_keys=True)
+                previous = existing.pop(key, None)
+                if previous is None:
+                    stats['inserted'] += 1
+                elif previous != data:
+                    stats['updated'] += 1
+                else:
+                    stats['unchanged'] += 1
+                    continue
+                rows.append((key, entry_work_date(entry),
+                             entry.get('employee_id') or entry.get('user_id'), data, synced_at))
+
+            conn.executemany(
+                'INSERT OR REPLACE INTO time_entries (id, entry_date, employee_id, data, synced_at) '
+                'VALUES (?, ?, ?, ?, ?)', rows
+            )
+
+            # Anything left in the synced range was deleted upstream
+            conn.executemany('DELETE FROM time_entries WHERE id = ?', [(key,) for key in existing])
+            stats['deleted'] = len(existing)
+
+            closed_through = min(end, today - timedelta(days=self.reopen_days + 1))
+            if closed_through >= start:
+                conn.execute(
+                    'INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)',
+                    (WATERMARK_KEY, closed_through.isoformat())
+                )
+
+        return stats
+
+    def get_employees(self, limit: int = 100) -> List[Dict]:
+        """
+        Get list of all employees from the store
+
+        Same signature as RipplingAPIClient.get_employees, so the store can
+        stand in for the client. The live client is used if nothing has been
+        synced yet.
+        """
+        with closing(self._connect()) as conn:
+            employees = [json.loads(row[0]) for row in conn.execute('SELECT data FROM users ORDER BY id')]
+
+        if not employees and self.live_client is not None:
+            return self.live_client.get_employees(limit)
+        return employees
+
+    def iter_employees(self, limit: int = 100) -> Iterator[Dict]:
+        """Iterate over all employees (same signature as RipplingAPIClient.iter_employees)"""
+        return iter(self.get_employees(limit))
+
+    def get_time_entries(self, start_date: Optional[str] = None,
+                         end_date: Optional[str] = None,
+                         limit: int = 100) -> List[Dict]:
+        """
+        Get time entries for a date range from the store
+
+        Same signature as RipplingAPIClient.get_time_entries. Days after the
+        sync watermark are fetched through the live client when one is set.
+
+        Args:
+            start_date: Start date in YYYY-MM-DD format (defaults to today)
+            end_date: End date in YYYY-MM-DD format (defaults to today)
+            limit: Page size used for live requests
+
+        Returns:
+            List of time entry dictionaries
+        """
+        return list(self.iter_time_entries(start_date, end_date, limit))
+
+    def iter_time_entries(self, start_date: Optional[str] = None,
+                          end_date: Optional[str] = None,
+                          limit: int = 100) -> Iterator[Dict]:
+        """
+        Iterate over time entries for a date range without loading them all
+
+        Same signature as RipplingAPIClient.iter_time_entries. Stored rows
+        are decoded one at a time from the database cursor.
+
+        Args:
+            start_date: Start date in YYYY-MM-DD format (defaults to today)
+            end_date: End date in YYYY-MM-DD format (defaults to today)
+            limit: Page size used for live requests
+
+        Yields:
+            Time entry dictionaries in day order
+        """
+        if not start_date:
+            start_date = datetime.now().strftime('%Y-%m-%d')
+        if not end_date:
+            end_date = datetime.now().strftime('%Y-%m-%d')
+
+        stored_end = end_date
+        watermark = self.get_watermark()
+        live_start = None
+        if self.live_client is not None:
+            if watermark is None:
+                yield from _iter_client_entries(self.live_client, start_date, end_date, limit)
+                return
+            if end_date > watermark:
+                stored_end = min(end_date, watermark)
+                live_start = max(start_date, (
+                    datetime.strptime(watermark, '%Y-%m-%d') + timedelta(days=1)
+                ).strftime('%Y-%m-%d'))
+
+        if start_date <= stored_end:
+            with closing(self._connect()) as conn:
+                for row in conn.execute(
+                    'SELECT data FROM time_entries WHERE entry_date BETWEEN ? AND ? '
+                    'ORDER BY entry_date, id',
+                    (start_date, stored_end)
+                ):
+                    yield json.loads(row[0])
+
+        if live_start is not None:
+            yield from _iter_client_entries(self.live_client, live_start, end_date, limit)
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Capitol Engineering local time entry store')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    sync_parser = subparsers.add_parser('sync', help='Pull new and changed data from Rippling')
+    sync_parser.add_argument('--db', default=DEFAULT_DB_PATH, help='SQLite database path')
+    sync_parser.add_argument('--start', help='First day to sync when the store is empty (YYYY-MM-DD)')
+    sync_parser.add_argument('--end', help='Last day to sync (YYYY-MM-DD, defaults to today)')
+    sync_parser.add_argument('--reopen-days', type=int, default=DEFAULT_REOPEN_DAYS,
+                             help='Days before today that are re-pulled on every sync')
+
+    args = parser.parse_args()
+
+    if args.command == 'sync':
+        from rippling_api_client import RipplingAPIClient
+
+        store = TimeEntryStore(args.db, reopen_days=args.reopen_days)
+        stats = store.sync(RipplingAPIClient(), start_date=args.start, end_date=args.end)
+
+        print(f"Synced {stats['start_date']} to {stats['end_date']} into {args.db}")
+        print(f"  Users: {stats['users']}")
+        print(f"  Time entries: {stats['inserted']} new, {stats['updated']} updated, "
+              f"{stats['unchanged']} unchanged, {stats['deleted']} deleted")
+        print(f"  Watermark: {store.get_watermark() or 'none'}")
+
+
+if __name__ == "__main__":
+    main()